@@ -1,10 +1,12 @@
+import random
+
 from fitness.evaluation import evaluate_fitness
 from operators.crossover import crossover
 from operators.initialisation import initialisation
 from operators.mutation import mutation
 from operators.replacement import replacement
 from operators.selection import selection
-from stats.stats import get_stats
+from representation.individual import Individual
 
 
 class Agent:
@@ -17,56 +19,86 @@ class Agent:
     Act     - method responsible to process the information given by Sense
               method
     Update  - method responsible to update the state of the agent
+
+    Agents never hold references to each other. They share their genetic
+    information by sending messages through a router (see agent.router), so
+    agents can be run concurrently in separate processes.
     """
 
-    def __init__(self, ip):
+    def __init__(self, ip, index, cnx, cursor, logger, cycle_number):
         # Interaction probability received in constructor
         self.interaction_probability = ip
 
+        # Index of the agent, used as its address by the router
+        self.index = index
+
         # Only initialize single individual. Single agent can only have single
         # genetic information
         self.individual = initialisation(1)
 
         # Evaluate the fitness for the the individual    
-        self.individual = evaluate_fitness(self.individual)
+        self.individual = evaluate_fitness(self.individual, cnx, cursor,
+                                           logger, cycle_number)
+
+        # Messages received from other agents since the last sense
+        self.inbox = []
 
         # Flag which store the boolean value for other neighbouring agents
         # found or not
         self.agents_found = False
 
-    def sense(self, agents):
+    def broadcast(self, router):
+        # Send a copy of the genetic information of the agent to a sample of
+        # the other agents. Only the genome and fitness are sent, the
+        # receiving agents rebuild the individual.
+
+        # Getting values to sample agents for interaction
+        n_agents = router.n_agents
+        range_min = int((self.interaction_probability * n_agents) / 3)
+        range_max = int((self.interaction_probability * n_agents) / 2)
+        range_avg = int((range_min + range_max) / 2)
+
+        # Sample the agents from the list of agents. The number of samples
+        # depend on above values
+        no_agents_found = random.sample(range(n_agents), random.choice(
+            [range_min, range_max, range_avg]))
+
+        message = (self.individual[0].genome, self.individual[0].fitness)
+
+        for id in no_agents_found:
+            if id != self.index:
+                router.send(id, message)
+
+    def sense(self):
         # This part makes this GE algorithm useful for multi-agent systems.
         # This method is responsible to sense information from the environment
         # This method would be overridden by actual robots following the
         # different logic for near by agents discovery
 
-        import random
-
         # Logic that defines how a agent discovers nearby agents
         # If the random value is greater than the interaction probability
         # parameter that denotes the agent has found some nearby agents.
         # Higher the probability, better the chance of agent to share its
         # genome with other agents
-        if random.random() > self.interaction_probability:
+        self.agents_found = False
+
+        if random.random() > self.interaction_probability and self.inbox:
             # Turn the flag to True
             self.agents_found = True
 
-            # Getting values to sample agents for interaction
-            range_min = int((self.interaction_probability * len(agents)) / 3)
-            range_max = int((self.interaction_probability * len(agents)) / 2)
-            range_avg = int((range_min + range_max) / 2)
+            # Rebuild the individuals received from the nearby agents and
+            # store the individuals in the class variable
+            self.nearby_agents = []
 
-            # Sample the agents from the list of agents. The number of samples
-            # depend on above values
-            no_agents_found = random.sample(range(len(agents)), random.choice(
-                [range_min, range_max, range_avg]))
+            for genome, fitness in self.inbox:
+                ind = Individual(list(genome), None)
+                ind.fitness = fitness
+                self.nearby_agents.append(ind)
 
-            # Extract the individuals from the nearby agents and store the
-            # individuals in the class variable
-            self.nearby_agents = [agents[id].individual[0] for id in
-                                  no_agents_found]
+        # Messages are only sensed once
+        self.inbox = []
 
-    def act(self):
+    def act(self, cnx, cursor, logger, cycle_number):
         # Process the information if the agent has sense nearby agents
         if self.agents_found:
             # Combine the original individual and individuals found by
@@ -83,14 +115,12 @@ class Agent:
             new_pop = mutation(cross_pop)
 
             # Evaluate the fitness of the new population.
-            new_pop = evaluate_fitness(new_pop)
+            new_pop = evaluate_fitness(new_pop, cnx, cursor, logger,
+                                       cycle_number)
 
             # Replace the old population with the new population.
             individuals = replacement(new_pop, individuals)
 
-            # Generate statistics for run so far
-            get_stats(individuals)
-
             # Sort the individuals list 
             individuals.sort(reverse=True)
 
@@ -0,0 +1,69 @@
+from queue import Empty
+
+
+class Router:
+    """
+    Routes messages between agents. Agents are split into shards, each run by
+    its own process. Messages to agents in the same shard are delivered
+    directly, messages to agents in other shards are sent through the inbox
+    queue of the receiving shard. Messages are always copies, agents never
+    hold references to each other.
+    """
+
+    def __init__(self, shard, shards, inboxes):
+        """
+        :param shard: The index of the shard run by the current process.
+        :param shards: The list of agent indices in each shard.
+        :param inboxes: The inbox queue of each shard.
+        """
+
+        self.shard = shard
+        self.inboxes = inboxes
+
+        # Look up the shard of every agent.
+        self.shard_of = {index: i for i, agents in enumerate(shards) for
+                         index in agents}
+
+        # The total number of agents across all shards.
+        self.n_agents = len(self.shard_of)
+
+        # Messages waiting for agents in the current shard.
+        self.local = []
+
+    def send(self, index, message):
+        """
+        Send a message to an agent.
+
+        :param index: The index of the receiving agent.
+        :param message: A picklable message.
+        :return: Nothing.
+        """
+
+        if self.shard_of[index] == self.shard:
+            self.local.append((index, message))
+
+        else:
+            self.inboxes[self.shard_of[index]].put((index, message))
+
+    def deliver(self, agents):
+        """
+        Deliver all messages received so far to the agents of the current
+        shard, without waiting for messages which have not yet arrived.
+
+        :param agents: The agents of the current shard.
+        :return: Nothing.
+        """
+
+        agents = {agent.index: agent for agent in agents}
+
+        try:
+            while True:
+                self.local.append(self.inboxes[self.shard].get_nowait())
+
+        except Empty:
+            pass
+
+        for index, message in self.local:
+            agents[index].inbox.append(message)
+
+        self.local = []
@@ -1,33 +1,172 @@
+from multiprocessing import Process, Queue
+from queue import Empty
+from random import getrandbits, seed
+
 from agent.agent import Agent
+from agent.router import Router
 from algorithm.parameters import params
-from stats.stats import stats
+from db.bug_store import get_bug_store
+from db.db_connector import connect_to_mysql, load_db_config
+from representation.individual import Individual
+from stats.stats import get_stats, stats
+from utilities.algorithm.initialise_run import pool_init
+from utilities.stats import metrics, trackers
+
 
+def create_agents(indices, p, cnx, cursor, logger, cycle_number):
+    """
+    Create a list of agent specified by indices parameter
+    """
+    return [Agent(p, index, cnx, cursor, logger, cycle_number)
+            for index in indices]
 
-# from fitness.evaluation import evaluate_fitness
-# from utilities.stats import trackers
-# from operators.initialisation import initialisation
-# from utilities.algorithm.initialise_run import pool_init
 
-def create_agents(n, p):
+def run_shard(shard, shards, inboxes, reports, params_, logger,
+              cycle_number):
     """
-    Create a list of agent specified by n parameter
+    Run the agents of a single shard in the current process, on a database
+    session of its own. After every generation a snapshot of the agents of
+    the shard is put on the reports queue.
     """
-    return [Agent(p) for a in range(n)]
+    pool_init(params_)
+
+    # Forked processes share the random state of the parent, give each shard
+    # its own random stream.
+    seed(getrandbits(64) + shard)
+
+    # Only count the evaluations, errors and bugs of this shard.
+    trackers.evaluations, trackers.bugs_found = 0, 0
+    trackers.error_counts, trackers.new_bugs = {}, []
+    trackers.first_bug_time = None
+
+    cnx = connect_to_mysql(load_db_config())
+    if cnx is None:
+        raise ConnectionError("Failed to establish a database connection.")
+    cursor = cnx.cursor()
+
+    try:
+        # Messages still waiting for agents which have already finished are
+        # dropped, rather than stopping this process from exiting.
+        for inbox in inboxes:
+            inbox.cancel_join_thread()
+
+        router = Router(shard, shards, inboxes)
+
+        # Create the agents of this shard
+        agents = create_agents(shards[shard],
+                               params['INTERACTION_PROBABILITY'], cnx, cursor,
+                               logger, cycle_number)
+
+        def report(generation):
+            reports.put((generation,
+                         [(agent.individual[0].genome,
+                           agent.individual[0].fitness) for agent in agents],
+                         trackers.evaluations, trackers.error_counts,
+                         trackers.bugs_found, trackers.first_bug_time,
+                         trackers.new_bugs,
+                         metrics.take_metrics() if metrics.enabled else
+                         None))
+            trackers.evaluations, trackers.bugs_found = 0, 0
+            trackers.error_counts, trackers.new_bugs = {}, []
+
+        report(0)
+
+        # Share the initial genetic information with other agents
+        for agent in agents:
+            agent.broadcast(router)
+
+        for generation in range(1, (params['GENERATIONS'] + 1)):
+            # New generation
+            agents = params['STEP'](agents, router, cnx, cursor, logger,
+                                    cycle_number)
 
+            report(generation)
 
-def search_loop():
+    finally:
+        cursor.close()
+        cnx.close()
+
+        # Forked processes leave without running atexit hooks, so the
+        # counters of the bugs found by this shard are written here.
+        get_bug_store().flush()
+
+
+def search_loop(cnx, cursor, logger, cycle_number):
     """
-    This loop is used when the multi-agent parameter is passed
+    This loop is used when the multi-agent parameter is passed. Agents are
+    split into AGENT_WORKERS shards, each run concurrently by its own process
+    with its own database session. Agents only exchange genetic information
+    by message passing. This process collects a snapshot of all agents after
+    every generation to generate statistics.
     """
-    # Create a list of agents based on the parameter passed
-    agents = create_agents(params['AGENT_SIZE'],
-                           params['INTERACTION_PROBABILITY'])
+    n_agents = params['AGENT_SIZE']
+    n_shards = max(1, min(params['AGENT_WORKERS'], n_agents))
+
+    # Split the agents into shards
+    shards = [list(range(n_agents))[i::n_shards] for i in range(n_shards)]
+    inboxes = [Queue() for _ in shards]
+    reports = Queue()
+
+    processes = [Process(target=run_shard,
+                         args=(shard, shards, inboxes, reports, params,
+                               logger, cycle_number), daemon=True)
+                 for shard in range(n_shards)]
+
+    for process in processes:
+        process.start()
+
+    # Shards run independently, so snapshots of different generations may
+    # arrive in any order. Collect them until a generation is complete.
+    snapshots, individuals = {}, []
 
-    # Multi-Agent based GE
-    for generation in range(1, (params['GENERATIONS'] + 1)):
+    for generation in range(0, (params['GENERATIONS'] + 1)):
         stats['gen'] = generation
 
-        # New generation
-        agents = params['STEP'](agents)
+        while len(snapshots.get(generation, [])) < n_shards:
+            try:
+                gen, agents, evaluations, error_counts, bugs, first_bug, \
+                    new_bugs, recorded = reports.get(timeout=10)
+
+            except Empty:
+                if any(process.exitcode for process in processes) or \
+                        not any(process.is_alive() for process in processes):
+                    for process in processes:
+                        process.terminate()
+                    raise Exception("algorithm.distributed_algorithm."
+                                    "search_loop.search_loop\n"
+                                    "Error: An agent process has stopped.")
+                continue
+
+            snapshots.setdefault(gen, []).append(agents)
+
+            # Merge the evaluations, errors and bugs of the shard
+            trackers.evaluations += evaluations
+            for errno, count in error_counts.items():
+                trackers.error_counts[errno] = \
+                    trackers.error_counts.get(errno, 0) + count
+            trackers.bugs_found += bugs
+            trackers.new_bugs.extend(new_bugs)
+            if first_bug is not None and (trackers.first_bug_time is None
+                                          or first_bug <
+                                          trackers.first_bug_time):
+                trackers.first_bug_time = first_bug
+
+            # Serve the metrics recorded by the shard
+            if recorded is not None:
+                metrics.merge_metrics(recorded)
+
+        # Rebuild the individuals of all agents
+        individuals = []
+        for agents in snapshots.pop(generation):
+            for genome, fitness in agents:
+                ind = Individual(genome, None)
+                ind.fitness = fitness
+                individuals.append(ind)
+
+        # Generate statistics for run so far
+        get_stats(individuals)
+
+    for process in processes:
+        process.join()
 
-    return [agent.individual[0] for agent in agents]
+    return individuals
@@ -1,16 +1,25 @@
-def step(agents):
+def step(agents, router, cnx, cursor, logger, cycle_number):
     """
-    Runs a single generation of the evolutionary algorithm process
+    Runs a single generation of the evolutionary algorithm process for the
+    agents of a single shard
     """
+    # Deliver the messages received from other agents since the last
+    # generation
+    router.deliver(agents)
+
     # Loop over all the agents and apply their generic methods in sequence
     for agent in agents:
         # Sense the environment
-        agent.sense(agents)
+        agent.sense()
 
         # Based on the values from the sensor perform action
-        agent.act()
+        agent.act(cnx, cursor, logger, cycle_number)
 
         # Update the state of the agent
         agent.update()
 
+    # Share the updated genetic information with other agents
+    for agent in agents:
+        agent.broadcast(router)
+
     return agents
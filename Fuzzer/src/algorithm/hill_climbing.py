@@ -1,4 +1,5 @@
 from algorithm.parameters import params
+from fitness.async_evaluation import AsyncEvaluator
 from fitness.evaluation import evaluate_fitness
 from stats.stats import get_stats, stats
 from utilities.stats import trackers
@@ -51,10 +52,55 @@ that. We update it every L steps to the current cost value.
 
 There are also two variants: instead of counting all steps, we can
 count only accepted, or only improving moves.
+
+A single SQL statement takes far longer to evaluate than to generate, so
+both loops evaluate a batch of HILL_CLIMBING_NEIGHBOURS neighbours of the
+current point at each step, on ASYNC_WORKERS parallel database sessions,
+and apply the acceptance rule to the best neighbour of the batch. With a
+single neighbour this reduces to the usual one-mutant-per-step loops.
 """
 
 
-def LAHC_search_loop():
+def get_neighbour_evaluator(cnx, cursor, logger, cycle_number):
+    """
+    Return an evaluator running neighbourhood batches on parallel database
+    sessions, or None if batches are evaluated on the session of the cycle.
+
+    :return: An AsyncEvaluator or None.
+    """
+
+    if params['HILL_CLIMBING_NEIGHBOURS'] > 1 and params['ASYNC_WORKERS'] > 1:
+        return AsyncEvaluator(cnx, cursor, logger, cycle_number)
+
+    return None
+
+
+def best_neighbour(best, n, evaluator, cnx, cursor, logger, cycle_number):
+    """
+    Generate n neighbours of the current point by mutation, evaluate them as
+    a single batch and return the best of them.
+
+    :param best: The current point of the search.
+    :param n: The number of neighbours to generate.
+    :param evaluator: An AsyncEvaluator, or None to evaluate the batch on
+    the session of the cycle.
+    :return: The best neighbour.
+    """
+
+    # Mutation changes the genome in place, so always mutate a copy.
+    neighbours = [params['MUTATION'](best.deep_copy()) for _ in range(n)]
+
+    if evaluator:
+        neighbours = evaluator.evaluate_all(neighbours)
+
+    else:
+        neighbours = evaluate_fitness(neighbours, cnx, cursor, logger,
+                                      cycle_number)
+
+    return max(neighbours)
+
+
+def LAHC_search_loop(cnx, cursor, logger, cycle_number):
     """
     Search loop for Late Acceptance Hill Climbing.
     
@@ -84,7 +130,8 @@ def LAHC_search_loop():
     individuals = params['INITIALISATION'](params['POPULATION_SIZE'])
 
     # Evaluate initial population
-    individuals = evaluate_fitness(individuals)
+    individuals = evaluate_fitness(individuals, cnx, cursor, logger,
+                                   cycle_number)
 
     # Generate statistics for run so far
     get_stats(individuals)
@@ -96,57 +143,75 @@ def LAHC_search_loop():
     Lfa = params['HILL_CLIMBING_HISTORY']
     history = [best for _ in range(Lfa)]
 
-    # iters is the number of individuals examined so far.
-    iters = len(individuals)
+    # iters is the number of individuals examined so far, steps is the
+    # number of acceptance decisions made so far.
+    iters = steps = len(individuals)
+
+    evaluator = get_neighbour_evaluator(cnx, cursor, logger, cycle_number)
+
+    try:
+        for generation in range(1, (params['GENERATIONS'] + 1)):
 
-    for generation in range(1, (params['GENERATIONS'] + 1)):
+            this_gen = []
 
-        this_gen = []
+            # even though there is no population, we will take account of
+            # the pop size parameter: ie we'll save stats after every
+            # "generation"
+            gen_its = 0
 
-        # even though there is no population, we will take account of
-        # the pop size parameter: ie we'll save stats after every
-        # "generation"
-        for j in range(params['POPULATION_SIZE']):
+            while gen_its < params['POPULATION_SIZE']:
 
-            this_gen.append(best)  # collect this "generation"
+                this_gen.append(best)  # collect this "generation"
 
-            # Mutate the best to get the candidate best
-            candidate_best = params['MUTATION'](best)
-            if not candidate_best.invalid:
-                candidate_best.evaluate()
+                # Mutate the best to get a batch of candidates and take the
+                # best of the batch as the candidate best. At least one
+                # candidate is examined, even if the initial population has
+                # used up the budget (e.g. with a single generation).
+                n = max(min(params['HILL_CLIMBING_NEIGHBOURS'],
+                            params['POPULATION_SIZE'] - gen_its,
+                            max_its - iters), 1)
+                candidate_best = best_neighbour(best, n, evaluator, cnx,
+                                                cursor, logger, cycle_number)
 
-            # Find the index of the relevant individual from the late
-            # acceptance history.
-            idx = iters % Lfa
+                # Find the index of the relevant individual from the late
+                # acceptance history.
+                idx = steps % Lfa
 
-            if candidate_best >= history[idx]:
-                best = candidate_best  # Accept the candidate
+                if candidate_best >= history[idx]:
+                    best = candidate_best  # Accept the candidate
 
-            else:
-                pass  # reject the candidate
+                else:
+                    pass  # reject the candidate
 
-            # Set the new best into the history.
-            history[idx] = best
+                # Set the new best into the history.
+                history[idx] = best
 
-            # Increment evaluation counter.
-            iters += 1
+                # Increment evaluation and step counters.
+                iters += n
+                gen_its += n
+                steps += 1
+
+                if iters >= max_its:
+                    # We have completed the total number of iterations.
+                    break
+
+            # Get stats for this "generation".
+            stats['gen'] = generation
+            get_stats(this_gen)
 
             if iters >= max_its:
                 # We have completed the total number of iterations.
                 break
 
-        # Get stats for this "generation".
-        stats['gen'] = generation
-        get_stats(this_gen)
-
-        if iters >= max_its:
-            # We have completed the total number of iterations.
-            break
+    finally:
+        if evaluator:
+            # Close the parallel database sessions.
+            evaluator.close()
 
     return individuals
 
 
-def SCHC_search_loop():
+def SCHC_search_loop(cnx, cursor, logger, cycle_number):
     """
     Search Loop for Step-Counting Hill-Climbing.
     
@@ -202,7 +267,8 @@ def SCHC_search_loop():
     individuals = params['INITIALISATION'](params['POPULATION_SIZE'])
 
     # Evaluate initial population
-    individuals = evaluate_fitness(individuals)
+    individuals = evaluate_fitness(individuals, cnx, cursor, logger,
+                                   cycle_number)
 
     # Generate statistics for run so far
     get_stats(individuals)
@@ -218,63 +284,79 @@ def SCHC_search_loop():
     # iters is the number of individuals examined/iterations so far.
     iters = len(individuals)
 
-    for generation in range(1, (params['GENERATIONS'] + 1)):
+    evaluator = get_neighbour_evaluator(cnx, cursor, logger, cycle_number)
 
-        this_gen = []
+    try:
+        for generation in range(1, (params['GENERATIONS'] + 1)):
 
-        # even though there is no population, we will take account of
-        # the pop size parameter: ie we'll save stats after every
-        # "generation"
-        for j in range(params['POPULATION_SIZE']):
+            this_gen = []
 
-            this_gen.append(best)  # collect this "generation"
+            # even though there is no population, we will take account of
+            # the pop size parameter: ie we'll save stats after every
+            # "generation"
+            gen_its = 0
 
-            # Mutate best to get candidate best.
-            candidate_best = params['MUTATION'](best)
-            if not candidate_best.invalid:
-                candidate_best.evaluate()
+            while gen_its < params['POPULATION_SIZE']:
 
-            # count
-            if count_method == "count_all":  # we count all iterations (moves)
-                counter += 1  # increment the counter
+                this_gen.append(best)  # collect this "generation"
 
-            elif count_method == "acp":  # we count accepted moves only
-                if candidate_best > cost_bound or candidate_best >= best:
-                    counter += 1  # increment the counter
+                # Mutate best to get a batch of candidates and take the best
+                # of the batch as the candidate best. At least one candidate
+                # is examined, even if the initial population has used up the
+                # budget (e.g. with a single generation).
+                n = max(min(params['HILL_CLIMBING_NEIGHBOURS'],
+                            params['POPULATION_SIZE'] - gen_its,
+                            max_its - iters), 1)
+                candidate_best = best_neighbour(best, n, evaluator, cnx,
+                                                cursor, logger, cycle_number)
 
-            elif count_method == "imp":  # we count improving moves only
-                if candidate_best > best:
+                # count
+                if count_method == "count_all":  # we count all iterations (moves)
                     counter += 1  # increment the counter
 
-            else:
-                s = "algorithm.hill_climbing.SCHC_search_loop\n" \
-                    "Error: Unknown count method: %s" % (count_method)
-                raise Exception(s)
+                elif count_method == "acp":  # we count accepted moves only
+                    if candidate_best > cost_bound or candidate_best >= best:
+                        counter += 1  # increment the counter
+
+                elif count_method == "imp":  # we count improving moves only
+                    if candidate_best > best:
+                        counter += 1  # increment the counter
 
-            # accept
-            if candidate_best > cost_bound or candidate_best >= best:
-                best = candidate_best  # accept the candidate
+                else:
+                    s = "algorithm.hill_climbing.SCHC_search_loop\n" \
+                        "Error: Unknown count method: %s" % (count_method)
+                    raise Exception(s)
+
+                # accept
+                if candidate_best > cost_bound or candidate_best >= best:
+                    best = candidate_best  # accept the candidate
 
-            else:
-                pass  # reject the candidate
+                else:
+                    pass  # reject the candidate
 
-            if counter >= history:
-                cost_bound = best  # update the bound
-                counter = 0  # reset the counter
+                if counter >= history:
+                    cost_bound = best  # update the bound
+                    counter = 0  # reset the counter
 
-            # Increment iteration counter.
-            iters += 1
+                # Increment iteration counters.
+                iters += n
+                gen_its += n
+
+                if iters >= max_its:
+                    # We have completed the total number of iterations.
+                    break
+
+            # Get stats for this "generation".
+            stats['gen'] = generation
+            get_stats(this_gen)
 
             if iters >= max_its:
                 # We have completed the total number of iterations.
                 break
 
-        # Get stats for this "generation".
-        stats['gen'] = generation
-        get_stats(this_gen)
-
-        if iters >= max_its:
-            # We have completed the total number of iterations.
-            break
+    finally:
+        if evaluator:
+            # Close the parallel database sessions.
+            evaluator.close()
 
     return individuals
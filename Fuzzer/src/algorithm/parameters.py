@@ -15,6 +15,8 @@ params = {
     "GENERATIONS": 5,
     "HILL_CLIMBING_HISTORY": 1000,
     "SCHC_COUNT_METHOD": "count_all",
+    # Number of neighbours evaluated as a batch at each hill-climbing step.
+    "HILL_CLIMBING_NEIGHBOURS": 1,
     # Set optional experiment name
     "EXPERIMENT_NAME": None,
     # Set default number of runs to be done.
@@ -32,6 +34,13 @@ params = {
     # (starting from the minimum path of the grammar).
     # Mainly for use with the grammar analyser script.
     "PERMUTATION_RAMPS": 5,
+    # Cache the fully analysed grammar on disk, keyed by the grammar file
+    # contents and the parameters which affect its analysis, so that later
+    # runs can load it rather than re-analysing it.
+    "GRAMMAR_CACHE": True,
+    # Set the folder for grammar cache files (None defaults to a
+    # .grammar_cache folder alongside the grammar file).
+    "GRAMMAR_CACHE_DIR": None,
     # Select error metric
     "ERROR_METRIC": None,
     # Optimise constants in the supervised_learning fitness function.
@@ -55,6 +64,9 @@ params = {
     "MAX_INIT_TREE_DEPTH": 10,
     # Set the minimum tree depth for initialisation.
     "MIN_INIT_TREE_DEPTH": None,
+    # Sample rhh and PI_grow trees uniformly at each depth using the grammar's
+    # tree counts instead of random derivation.
+    "UNIFORM_INIT": False,
     # SELECTION
     # Set selection operator.
     "SELECTION": "operators.selection.tournament",
@@ -68,6 +80,43 @@ params = {
     # Boolean flag for selecting whether or not mutation is confined to
     # within the used portion of the genome. Default set to True.
     "WITHIN_USED": True,
+    # Boolean flag for performing linear crossover and mutation on the
+    # whole population at once over a padded genome matrix, rather than
+    # individual by individual.
+    "BATCH_VARIATION": False,
+    # Boolean flag for choosing the crossover and mutation operator of each
+    # offspring with a multi-armed bandit which learns which operators yield
+    # new error codes, new oracle disagreements or fitness improvements per
+    # database statement. Overrides CROSSOVER and MUTATION.
+    "ADAPTIVE_OPERATORS": False,
+    # Set the crossover operators scheduled by ADAPTIVE_OPERATORS.
+    "ADAPTIVE_CROSSOVERS": ["variable_onepoint", "fixed_onepoint",
+                            "fixed_twopoint", "variable_twopoint", "subtree"],
+    # Set the mutation operators scheduled by ADAPTIVE_OPERATORS.
+    "ADAPTIVE_MUTATIONS": ["int_flip_per_ind", "int_flip_per_codon",
+                           "subtree"],
+    # Set the weight of the latest reward in the average reward of an
+    # operator. Higher rates adapt faster to the search.
+    "ADAPTIVE_LEARNING_RATE": 0.1,
+    # Set the minimum probability of choosing any scheduled operator.
+    "ADAPTIVE_MIN_PROBABILITY": 0.05,
+    # NOVELTY SEARCH
+    # Boolean flag for rewarding individuals whose behaviour (error code,
+    # oracle verdict, rows affected, value class and magnitude) is far from
+    # the behaviours seen so far. Novelty is computed for each batch of
+    # individuals evaluated together, e.g. a generation, or for each
+    # offspring on its own against the archive in the asynchronous search
+    # loop.
+    "NOVELTY": False,
+    # Set the number of nearest neighbours over which novelty is averaged.
+    "NOVELTY_NEIGHBOURS": 15,
+    # Set the number of most novel behaviours archived from each batch.
+    "NOVELTY_ARCHIVE_ADD": 2,
+    # Set the maximum number of behaviours in the novelty archive.
+    "NOVELTY_ARCHIVE_SIZE": 1000,
+    # Set the weight of novelty when added to fitness as a second objective.
+    # With a weight of 0, novelty only breaks ties between equal fitnesses.
+    "NOVELTY_WEIGHT": 0,
     # CROSSOVER
     # Set crossover operator.
     "CROSSOVER": "operators.crossover.variable_onepoint",
@@ -102,6 +151,56 @@ params = {
     "VERBOSE": False,
     # Use this to prevent anything being printed to the command line.
     "SILENT": False,
+    # STATS SINKS
+    # Set the sinks which receive the statistics of each generation: "print"
+    # prints them to the command line, "file" saves them to the files of
+    # the run and "plot" saves plots (if SAVE_PLOTS). Statistics are still
+    # returned by stats.stats.get_stats without any sinks.
+    "STATS_SINKS": ["print", "file", "plot"],
+    # Set the number of buffered rows of stats which triggers a write to
+    # disk, see utilities.stats.stats_buffer.
+    "STATS_FLUSH_ROWS": 1000,
+    # Set the maximum number of seconds between writes of buffered stats.
+    "STATS_FLUSH_INTERVAL": 10,
+    # LOGGING
+    # Set the maximum number of events of each type (e.g. findings) written
+    # to the event log per second, see db.db_connector.log_event. 0 for no
+    # limit.
+    "LOG_RATE_LIMIT": 20,
+    # Time each phase of the fuzzing loop and report the times per
+    # generation and per cycle in the stats, see utilities.stats.timers.
+    "TIMERS": False,
+    # Set the local port on which live metrics are served in the Prometheus
+    # text format, see utilities.stats.metrics. Islands use consecutive
+    # ports. None for no metrics.
+    "METRICS_PORT": None,
+    # Record every statement executed by the fuzzer in a memory-mapped ring
+    # buffer which survives a crash, see db.trace and scripts/trace_dump.py.
+    "TRACE": False,
+    # Set the file of the statement trace. None for logs/trace.bin. Islands
+    # keep one trace each, and the trace of the previous run is kept as
+    # [TRACE_FILE].1.
+    "TRACE_FILE": None,
+    # Set the number of statements kept in the trace, of 512 bytes each.
+    "TRACE_ENTRIES": 65536,
+    # Set the number of cycles, from the first one, profiled by a sampling
+    # profiler writing collapsed stacks to the results folder of each cycle,
+    # see utilities.stats.profiler. 0 for no profiling.
+    "PROFILE": 0,
+    # Set the number of seconds between samples of the profiler.
+    "PROFILE_INTERVAL": 0.005,
+    # BUG STORE
+    # Set the SQLite file in which distinct bugs are stored, see
+    # db.bug_store. None for logs/bugs.sqlite.
+    "BUG_STORE": None,
+    # Reduce the query of each new bug at the end of the cycle in which it
+    # was found, see db.reducer.
+    "REDUCE_BUGS": False,
+    # Set the number of connections on which reductions are replayed.
+    "REDUCER_WORKERS": 4,
+    # Confirm each new bug in the background, by replaying it in a fresh
+    # table in strict and non-strict sql_mode, see db.confirmer.
+    "CONFIRM_BUGS": False,
     # SAVING
     # Save the phenotype of the best individual from each generation. Can
     # generate a lot of files. DEBUG must be False.
@@ -114,6 +213,32 @@ params = {
     "MULTICORE": False,
     # Set the number of cpus to be used for multiprocessing
     "CORES": cpu_count(),
+    # Set the number of concurrent database sessions used to evaluate
+    # individuals in the asynchronous search loop.
+    "ASYNC_WORKERS": 4,
+    # ISLAND MODEL
+    # Set the number of islands, each run in its own process against its own
+    # database schema. A single island runs a standard fuzzing loop.
+    "ISLANDS": 1,
+    # Set the number of generations between migrations. Islands migrate
+    # individuals when running the standard search loop.
+    "MIGRATION_INTERVAL": 5,
+    # Set the number of best individuals each island sends to its neighbours.
+    "MIGRATION_SIZE": 2,
+    # Set the migration topology: ring, bidirectional_ring, complete or
+    # random.
+    "MIGRATION_TOPOLOGY": "ring",
+    # SMT IMMIGRANTS
+    # Solve the table's check constraints with z3 in a background process
+    # and add statements on both sides of each boundary to the population
+    # as immigrants. Immigrants arrive when running the standard search loop.
+    "SMT_IMMIGRANTS": False,
+    # Set the number of generations between arrivals of SMT immigrants.
+    "SMT_INTERVAL": 1,
+    # Set the number of statements in each batch of SMT immigrants.
+    "SMT_BATCH_SIZE": 4,
+    # Set the time limit of each call to z3, in milliseconds.
+    "SMT_TIMEOUT": 1000,
     # STATE SAVING/LOADING
     # Save the state of the evolutionary run every generation. You can
     # specify how often you want to save the state with SAVE_STATE_STEP.
@@ -135,6 +260,9 @@ params = {
     # Set a target phenotype string for reverse mapping into a GE
     # individual
     "REVERSE_MAPPING_TARGET": None,
+    # Set the fraction of the initial population seeded with statements on
+    # and around the boundaries of the table's check constraints.
+    "BOUNDARY_SEEDS": 0,
     # Set Random Seed for all Random Number Generators to be used by
     # PonyGE2, including the standard Python RNG and the NumPy RNG.
     "RANDOM_SEED": None,
@@ -162,6 +290,9 @@ params = {
     # Interaction Probability: how frequently the agents can interaction with
     # each other
     "INTERACTION_PROBABILITY": 0.5,
+    # Number of processes the agents are split across, each with its own
+    # database session
+    "AGENT_WORKERS": 4,
     # OTHER
     # Set machine name (useful for doing multiple runs)
     "MACHINE": machine_name,
@@ -229,6 +360,7 @@ def set_params(command_line_args, create_files=True):
         initialise_run_params,
         set_param_imports,
     )
+    from utilities.algorithm.operator_scheduler import check_operators
     from utilities.fitness.math_functions import return_one_percent
     from utilities.stats import clean_stats, trackers
 
@@ -274,6 +406,11 @@ def set_params(command_line_args, create_files=True):
             params["STEP"] = "steady_state_step"
             params["GENERATION_SIZE"] = 2
 
+        elif params["SEARCH_LOOP"].split(".")[-1] == "asynchronous_search_loop":
+            # The asynchronous search loop breeds a single pair of offspring
+            # at a time.
+            params["GENERATION_SIZE"] = 2
+
         else:
             # Elite size is set to either 1 or 1% of the population size,
             # whichever is bigger if no elite size is previously set.
@@ -302,6 +439,10 @@ def set_params(command_line_args, create_files=True):
         # error metrics and fitness functions.
         set_param_imports()
 
+        if params["ADAPTIVE_OPERATORS"]:
+            # Check the names of the scheduled variation operators.
+            check_operators()
+
         # Clean the stats dict to remove unused stats.
         clean_stats.clean_stats()
 
@@ -309,6 +450,8 @@ def set_params(command_line_args, create_files=True):
         if (
             params["CROSSOVER"].representation == "subtree"
             or params["MUTATION"].representation == "subtree"
+            or (params["ADAPTIVE_OPERATORS"] and "subtree" in
+                params["ADAPTIVE_CROSSOVERS"] + params["ADAPTIVE_MUTATIONS"])
         ):
             params["GENOME_OPERATIONS"] = False
         else:
@@ -338,6 +481,21 @@ def set_params(command_line_args, create_files=True):
                     )
                     raise Exception(s)
 
+            # Migration, SMT immigrants and the asynchronous search loop rank
+            # individuals by a single fitness score.
+            if (
+                params["ISLANDS"] > 1
+                or params["SMT_IMMIGRANTS"]
+                or params["SEARCH_LOOP"].__name__ == "asynchronous_search_loop"
+            ):
+                s = (
+                    "algorithm.parameters.set_params\n"
+                    "Error: islands, SMT immigrants and the asynchronous "
+                    "search loop cannot be used with multiple fitness "
+                    "functions."
+                )
+                raise Exception(s)
+
         # Parse grammar file and set grammar class.
         params["BNF_GRAMMAR"] = grammar.Grammar(
             path.join("..", "grammars", params["GRAMMAR_FILE"])
@@ -364,3 +522,21 @@ def set_params(command_line_args, create_files=True):
 
             # Parse seed individual and store in params.
             params["SEED_INDIVIDUALS"] = [GE_LR_parser.main()]
+
+        if params["BOUNDARY_SEEDS"]:
+            # Seed the initial population with statements on the boundaries
+            # of the check constraints found by the constraint oracle.
+            from operators.boundary_seeding import get_boundary_seeds
+
+            if not hasattr(params["FITNESS_FUNCTION"], "oracle"):
+                s = (
+                    "algorithm.parameters.set_params\n"
+                    "Error: BOUNDARY_SEEDS requires a fitness function "
+                    "with a constraint oracle."
+                )
+                raise Exception(s)
+
+            params["SEED_INDIVIDUALS"] = params["SEED_INDIVIDUALS"] + \
+                get_boundary_seeds(
+                    params["FITNESS_FUNCTION"].oracle.constraints,
+                    int(params["BOUNDARY_SEEDS"] * params["POPULATION_SIZE"]))
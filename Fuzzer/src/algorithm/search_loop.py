@@ -1,11 +1,18 @@
 from multiprocessing import Pool
 
 from algorithm.parameters import params
+from fitness.async_evaluation import AsyncEvaluator
 from fitness.evaluation import evaluate_fitness
 from operators.initialisation import initialisation
+from operators.replacement import steady_state_offspring
 from stats.stats import get_stats, stats
+from utilities.algorithm import islands
 from utilities.algorithm.initialise_run import pool_init
+from utilities.algorithm.ranking import get_fitness_scores, get_tie_breaks, \
+    worst_index
+from utilities.algorithm.smt_immigrants import SMTImmigrants
 from utilities.stats import trackers
+from utilities.stats.timers import timer
 
 
 def search_loop(cnx, cursor, logger, cycle_number):
@@ -23,25 +30,116 @@ def search_loop(cnx, cursor, logger, cycle_number):
             processes=params["CORES"], initializer=pool_init, initargs=(params,)
         )  # , maxtasksperchild=1)
 
-    # Initialise population
-    individuals = initialisation(params["POPULATION_SIZE"])
+    if params["SMT_IMMIGRANTS"]:
+        # Start solving the check constraints in the background.
+        smt_immigrants = SMTImmigrants(params["FITNESS_FUNCTION"].oracle.constraints)
+
+    try:
+        # Initialise population
+        with timer("initialisation"):
+            individuals = initialisation(params["POPULATION_SIZE"])
+
+        # Evaluate initial population
+        with timer("evaluation"):
+            individuals = evaluate_fitness(
+                individuals, cnx, cursor, logger, cycle_number
+            )
+
+        # Generate statistics for run so far
+        with timer("stats"):
+            get_stats(individuals)
+
+        # Traditional GE
+        for generation in range(1, (params["GENERATIONS"] + 1)):
+            stats["gen"] = generation
+
+            # New generation
+            individuals = params["STEP"](individuals, cnx, cursor, logger, cycle_number)
+
+            if islands.island and generation % params["MIGRATION_INTERVAL"] == 0:
+                # Exchange individuals with the neighbouring islands.
+                individuals = islands.migrate(
+                    individuals, cnx, cursor, logger, cycle_number
+                )
+
+            if params["SMT_IMMIGRANTS"] and generation % params["SMT_INTERVAL"] == 0:
+                # Add the statements solved so far to the population.
+                individuals = smt_immigrants.immigrate(
+                    individuals, cnx, cursor, logger, cycle_number
+                )
+
+    finally:
+        if params["SMT_IMMIGRANTS"]:
+            # Stop the solver (otherwise it'll live on forever).
+            smt_immigrants.stop()
 
-    # Evaluate initial population
-    individuals = evaluate_fitness(individuals, cnx, cursor, logger, cycle_number)
+    if params["MULTICORE"]:
+        # Close the workers pool (otherwise they'll live on forever).
+        params["POOL"].close()
 
-    # Generate statistics for run so far
-    get_stats(individuals)
+    return individuals
 
-    # Traditional GE
-    for generation in range(1, (params["GENERATIONS"] + 1)):
-        stats["gen"] = generation
 
-        # New generation
-        individuals = params["STEP"](individuals, cnx, cursor, logger, cycle_number)
+def asynchronous_search_loop(cnx, cursor, logger, cycle_number):
+    """
+    An asynchronous steady state search process with no generational
+    barrier. Offspring are bred a pair at a time and evaluated concurrently
+    on params['ASYNC_WORKERS'] database sessions. As soon as an offspring
+    has been evaluated it replaces the worst individual in the population,
+    as in operators.replacement.steady_state, so the search never waits for
+    the slowest statement of a generation. A generation is counted each
+    time POPULATION_SIZE offspring have been inserted into the population.
 
-    if params["MULTICORE"]:
-        # Close the workers pool (otherwise they'll live on forever).
-        params["POOL"].close()
+    :return: The final population after the evolutionary process has run for
+    the specified number of generations.
+    """
+
+    evaluator = AsyncEvaluator(cnx, cursor, logger, cycle_number)
+
+    try:
+        # Initialise population
+        individuals = initialisation(params["POPULATION_SIZE"])
+
+        # Evaluate initial population
+        individuals = evaluator.evaluate_all(individuals)
+
+        # Generate statistics for run so far
+        get_stats(individuals)
+
+        scores = get_fitness_scores(individuals)
+        ties = get_tie_breaks(individuals)
+
+        # Keep enough offspring queued that no worker waits for breeding.
+        backlog = 2 * len(evaluator.workers)
+
+        budget = params["GENERATIONS"] * params["POPULATION_SIZE"]
+        bred, inserted = 0, 0
+
+        while inserted < budget:
+            while bred < budget and evaluator.pending < backlog:
+                # Breed new offspring and submit them for evaluation.
+                for ind in steady_state_offspring(individuals)[:budget - bred]:
+                    evaluator.submit(ind)
+                    bred += 1
+
+            # Replace the worst individual with the next evaluated offspring.
+            ind = evaluator.get()
+            worst = worst_index(scores, ties)
+            individuals[worst] = ind
+            scores[worst] = get_fitness_scores([ind])[0]
+            if ties is not None:
+                ties[worst] = get_tie_breaks([ind])[0]
+            inserted += 1
+
+            if inserted % params["POPULATION_SIZE"] == 0:
+                stats["gen"] = inserted // params["POPULATION_SIZE"]
+
+                # Generate statistics for run so far
+                get_stats(individuals)
+
+    finally:
+        # Stop the workers and close their database sessions.
+        evaluator.close()
 
     return individuals
 
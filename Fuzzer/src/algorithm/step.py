@@ -4,6 +4,7 @@ from operators.mutation import mutation
 from operators.replacement import replacement, steady_state
 from operators.selection import selection
 from stats.stats import get_stats
+from utilities.stats.timers import timer
 
 
 def step(individuals, cnx, cursor, logger, cycle_number):
@@ -20,22 +21,28 @@ def step(individuals, cnx, cursor, logger, cycle_number):
     """
 
     # Select parents from the original population.
-    parents = selection(individuals)
+    with timer("selection"):
+        parents = selection(individuals)
 
     # Crossover parents and add to the new population.
-    cross_pop = crossover(parents)
+    with timer("crossover"):
+        cross_pop = crossover(parents)
 
     # Mutate the new population.
-    new_pop = mutation(cross_pop)
+    with timer("mutation"):
+        new_pop = mutation(cross_pop)
 
     # Evaluate the fitness of the new population.
-    new_pop = evaluate_fitness(new_pop, cnx, cursor, logger, cycle_number)
+    with timer("evaluation"):
+        new_pop = evaluate_fitness(new_pop, cnx, cursor, logger, cycle_number)
 
     # Replace the old population with the new population.
-    individuals = replacement(new_pop, individuals)
+    with timer("replacement"):
+        individuals = replacement(new_pop, individuals)
 
     # Generate statistics for run so far
-    get_stats(individuals)
+    with timer("stats"):
+        get_stats(individuals)
 
     return individuals
 
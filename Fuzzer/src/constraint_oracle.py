@@ -4,6 +4,7 @@ import operator
 import re
 
 from db.db_connector import connect_to_mysql, load_db_config
+from utilities.stats.timers import timer
 
 
 def like(a, b):
@@ -36,6 +37,15 @@ def not_like(a, b):
     return not bool(re.match(regex_pattern, a))
 
 
+def is_disagreement(verdict, errno, rowcount):
+    # Whether the oracle and the database disagree on a statement: the value
+    # satisfies the check constraint but is rejected for violating it, or it
+    # doesn't but is written anyway
+    if verdict:
+        return errno == 3819
+    return errno != 3819 and rowcount > 0
+
+
 # Mapping from operator symbols to corresponding functions
 operator_mapping = {
     ">": operator.gt,
@@ -85,7 +95,8 @@ class ConstraintOracle:
         if self.db_connection is None:
             raise ConnectionError("Failed to establish a database connection.")
 
-        self.constraints = self.fetch_all_table_constraints()
+        with timer("oracle_setup"):
+            self.constraints = self.fetch_all_table_constraints()
         self.isutf8mb4 = False
         self.constraints[0]["value"] = self.clean_string(self.constraints[0]["value"])
         if self.constraints[0]["value"] == "true":
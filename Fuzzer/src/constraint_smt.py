@@ -0,0 +1,396 @@
+"""Translation of the constraint oracle's check constraints into SMT.
+
+Each constraint parsed by constraint_oracle.ConstraintOracle is translated
+into a z3 formula over the value written by a statement, for the two kinds
+of literals the grammar produces: numbers (with at most DIGITS fractional
+digits) and quoted strings. The formula models how MySQL coerces the literal
+into the column before the check is evaluated, as far as that can be
+modelled:
+
+- numbers stored in an INT column are rounded half away from zero,
+- numbers stored in a FLOAT column are rounded to single precision, with
+  the spacing of single precision numbers at the boundary,
+- strings stored in a numeric column, or compared with a number, are
+  truncated to their leading digits ('5a5' is 5, 'abc' is 0),
+- numbers compared with a string are compared as their decimal text,
+- LIKE patterns become regular expressions over the string.
+
+z3 is then asked for distinct models on each side of each boundary, closest
+to the boundary first. Where the column rounds the literal, the boundary is
+the rounding edge, the literal from which the stored value crosses the value
+it is compared with (e.g. -4.5 for an INT column and c1 >= -4)."""
+
+import operator
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+
+import numpy as np
+import z3
+
+from constraint_oracle import is_number, starts_with_number
+
+DIGITS = 10
+# Number of fractional digits in a number literal, see <digits> in
+# queries_SQL.bnf.
+
+MAX_STRING_LENGTH = 6
+# Maximum length of a string literal produced by the grammar.
+
+WINDOWS = ["0.0000000001", "1", "100", "1000000", "10000000000"]
+# Maximum distances of a literal from a numeric boundary, tried in turn.
+
+MODELS_PER_WINDOW = 4
+# Number of models found within each distance before looking further away.
+# Literals compared without a distance get the same number of models in all.
+
+COMPARISONS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<>": operator.ne,
+}
+
+
+class ConstraintTranslator:
+    """
+    Translates check constraints into z3 formulae over a single number
+    literal and a single string literal. Facts needed by a translation are
+    added to self.facts, so a translator is used for a single translation.
+    """
+
+    def __init__(self):
+        # A number literal is an integer scaled down by 10 ** DIGITS.
+        self.scaled = z3.Int("scaled")
+        self.number = z3.ToReal(self.scaled) / 10**DIGITS
+
+        # A string literal of letters and digits, split into its leading
+        # digits and the rest.
+        self.string = z3.String("string")
+        self.prefix, self.rest = z3.String("prefix"), z3.String("rest")
+
+        digit = z3.Range("0", "9")
+        letter = z3.Union(z3.Range("a", "z"), z3.Range("A", "Z"))
+
+        # Facts which hold for any model, whatever the constraint.
+        self.facts = [
+            z3.Abs(self.scaled) < 10 ** (2 * DIGITS),
+            z3.InRe(self.string, z3.Star(z3.Union(letter, digit))),
+            z3.Length(self.string) >= 1,
+            z3.Length(self.string) <= MAX_STRING_LENGTH,
+            self.string == z3.Concat(self.prefix, self.rest),
+            z3.InRe(self.prefix, z3.Star(digit)),
+            z3.Or(self.rest == "", z3.InRe(z3.SubString(self.rest, 0, 1),
+                                          letter)),
+        ]
+
+        # The number MySQL truncates the string literal to.
+        self.string_number = z3.ToReal(
+            z3.If(self.prefix == "", 0, z3.StrToInt(self.prefix)))
+
+    def translate(self, constraint, kind):
+        """
+        Translate a check constraint for one kind of literal.
+
+        :param constraint: A constraint, as parsed by
+        constraint_oracle.ConstraintOracle.
+        :param kind: Either "number" or "string".
+        :return: A z3 formula which holds if the literal satisfies the
+        constraint once stored in the column, and the distance of the
+        literal from the boundary or its rounding edges (or None if there
+        is no sensible distance). None if the constraint can't be
+        translated.
+        """
+
+        op = str(constraint["operator"]).lower()
+        value = str(constraint["value"]).strip("'\"")
+        data_type = constraint["data_type"]
+
+        if constraint["value"] is None or \
+                (op not in COMPARISONS and op != "like"):
+            return None
+
+        # The number the value is compared with, if it is compared as a
+        # number. Strings are truncated to their leading digits.
+        if is_number(value):
+            number = Decimal(value)
+        else:
+            found, prefix = starts_with_number(value)
+            number = Decimal(prefix) if found else Decimal(0)
+
+        stored = self.stored_value(kind, data_type, number)
+
+        if stored is None:
+            return None
+
+        if op == "like":
+            # LIKE compares the text of the stored value with the pattern.
+            text = self.text(kind, data_type)
+            if text is None:
+                return None
+            return z3.InRe(text, like_to_regex(value)), None
+
+        if data_type == "varchar" and not is_number(value):
+            # Strings are compared with strings in binary collation order.
+            text = self.text(kind, data_type)
+            if text is None:
+                return None
+            return COMPARISONS[op](text, z3.StringVal(value)), None
+
+        # Anything else is compared as a number.
+        literal = self.number if kind == "number" else self.string_number
+
+        if kind == "string" and data_type == "varchar":
+            # The string itself is stored, then truncated for the comparison.
+            stored = literal
+
+        # Literals are ordered by their own distance from the boundary,
+        # rather than that of the value stored for them, which is the same
+        # for every literal rounded to it.
+        distances = [z3.Abs(literal - z3.RealVal(format(edge, "f")))
+                     for edge in rounding_edges(data_type, number)]
+        distance = distances[0] if len(distances) == 1 else \
+            z3.If(distances[0] < distances[1], distances[0], distances[1])
+
+        return COMPARISONS[op](stored, z3.RealVal(str(number))), distance
+
+    def stored_value(self, kind, data_type, boundary):
+        """
+        Return the value stored in a column for a literal, as a real.
+
+        :param kind: Either "number" or "string".
+        :param data_type: The data type of the column.
+        :param boundary: The number the value is compared with, a Decimal.
+        :return: A z3 real expression, or None for unsupported data types.
+        """
+
+        literal = self.number if kind == "number" else self.string_number
+
+        if data_type == "int":
+            return round_half_away(literal)
+
+        elif data_type == "float":
+            # Rounding to the nearest single precision number is modelled as
+            # rounding to the nearest multiple of their spacing at the
+            # boundary, which is exact near the boundary and cheap to solve,
+            # unlike z3's floating point theory.
+            spacing = z3.RealVal(format(float_spacing(boundary), "f"))
+            return round_half_away(literal / spacing) * spacing
+
+        elif data_type in ["double", "decimal", "varchar"]:
+            return literal
+
+        return None
+
+    def text(self, kind, data_type):
+        """
+        Return the text of the value stored in a column for a literal. Only
+        integers are written out as text.
+
+        :param kind: Either "number" or "string".
+        :param data_type: The data type of the column.
+        :return: A z3 string expression, or None if the text can't be
+        modelled.
+        """
+
+        if kind == "string" and data_type == "varchar":
+            return self.string
+
+        elif data_type in ["int", "varchar"]:
+            integer = z3.ToInt(self.stored_value(kind, data_type, None))
+
+            if kind == "number" and data_type == "varchar":
+                # Only integer number literals are written out as text.
+                self.facts.append(self.scaled % 10**DIGITS == 0)
+
+            return z3.If(integer >= 0, z3.IntToStr(integer),
+                         z3.Concat(z3.StringVal("-"), z3.IntToStr(-integer)))
+
+        return None
+
+    def literal(self, model, kind):
+        """
+        Read the literal of a kind from a model.
+
+        :param model: A z3 model.
+        :param kind: Either "number" or "string".
+        :return: The literal, a Decimal for numbers and a str for strings.
+        """
+
+        if kind == "number":
+            scaled = model.eval(self.scaled, model_completion=True)
+            return Decimal(scaled.as_long()) / 10**DIGITS
+
+        return model.eval(self.string, model_completion=True).as_string()
+
+    def block(self, model, kind):
+        """
+        Return a formula excluding the literal of a model from later models.
+
+        :param model: A z3 model.
+        :param kind: Either "number" or "string".
+        :return: A z3 formula.
+        """
+
+        variable = self.scaled if kind == "number" else self.string
+
+        return variable != model.eval(variable, model_completion=True)
+
+
+def float_spacing(number):
+    """
+    Return the spacing of single precision numbers at a number.
+
+    :param number: A Decimal.
+    :return: A Decimal.
+    """
+
+    return Decimal(float(np.spacing(np.abs(np.float32(number)))))
+
+
+def rounding_edges(data_type, number):
+    """
+    Return the literals from which the value stored in a column for them
+    crosses a number, i.e. the midpoints between the values the column
+    stores around the number. Columns which store literals as they are have
+    no rounding, and the number itself is returned.
+
+    :param data_type: The data type of the column.
+    :param number: The number the stored value is compared with, a Decimal.
+    :return: A list of one or two Decimals.
+    """
+
+    if data_type == "int":
+        step = Decimal(1)
+
+    elif data_type == "float":
+        step = float_spacing(number)
+
+    else:
+        return [number]
+
+    below = (number / step).to_integral_value(ROUND_FLOOR) * step
+    above = (number / step).to_integral_value(ROUND_CEILING) * step
+
+    if below == above:
+        # The number is stored as it is, values on either side of it round
+        # away from it.
+        return [number - step / 2, number + step / 2]
+
+    return [(below + above) / 2]
+
+
+def round_half_away(real):
+    """
+    Round a z3 real to an integer, half away from zero, as MySQL does when
+    storing a decimal number in an integer column.
+
+    :param real: A z3 real expression.
+    :return: A z3 real expression with an integer value.
+    """
+
+    return z3.ToReal(z3.If(real >= 0, z3.ToInt(real + 0.5),
+                           -z3.ToInt(-real + 0.5)))
+
+
+def like_to_regex(pattern):
+    """
+    Translate a LIKE pattern into a z3 regular expression. % matches any
+    string and _ any single character.
+
+    :param pattern: A LIKE pattern.
+    :return: A z3 regular expression.
+    """
+
+    any_char = z3.Range(" ", "~")
+    parts = []
+
+    for char in pattern:
+        if char == "%":
+            parts.append(z3.Star(any_char))
+        elif char == "_":
+            parts.append(any_char)
+        else:
+            parts.append(z3.Re(char))
+
+    if not parts:
+        return z3.Re("")
+
+    elif len(parts) == 1:
+        return parts[0]
+
+    return z3.Concat(*parts)
+
+
+def generate_literals(constraints, timeout):
+    """
+    Generate distinct literals on both sides of the boundary of each check
+    constraint. Constraints, sides and kinds of literal take turns. Up to
+    MODELS_PER_WINDOW literals are generated within each distance of
+    WINDOWS from a numeric boundary, closest first, see
+    ConstraintTranslator.translate.
+
+    :param constraints: A list of constraints, as parsed by
+    constraint_oracle.ConstraintOracle.
+    :param timeout: The time limit of each call to z3, in milliseconds.
+    :return: A generator of (kind, literal) pairs.
+    """
+
+    tracks = []
+
+    for constraint in constraints:
+        for kind in ["number", "string"]:
+            translator = ConstraintTranslator()
+            translation = translator.translate(constraint, kind)
+
+            if translation is None:
+                continue
+
+            check, distance = translation
+
+            for side in [True, False]:
+                solver = z3.Solver()
+                solver.set("timeout", timeout)
+                solver.add(*translator.facts)
+                solver.add(check if side else z3.Not(check))
+
+                # The distance allowed for each model, in order.
+                windows = []
+                for window in WINDOWS:
+                    windows.extend([None if distance is None else
+                                    distance <= z3.RealVal(window)] *
+                                   MODELS_PER_WINDOW)
+
+                tracks.append([translator, solver, kind, windows])
+
+    seen = set()
+
+    while tracks:
+        for track in list(tracks):
+            translator, solver, kind, windows = track
+
+            window = windows.pop(0)
+            result = solver.check() if window is None else \
+                solver.check(window)
+
+            if result != z3.sat:
+                # Every literal within this distance has been found, or z3
+                # ran out of time. Look further away.
+                while windows and windows[0] is window:
+                    windows.pop(0)
+
+            if not windows:
+                tracks.remove(track)
+
+            if result != z3.sat:
+                continue
+
+            model = solver.model()
+            solver.add(translator.block(model, kind))
+
+            literal = translator.literal(model, kind)
+
+            if (kind, literal) not in seen:
+                seen.add((kind, literal))
+                yield kind, literal
@@ -0,0 +1,193 @@
+# bug_store.py
+import atexit
+import os
+import sqlite3
+from threading import Lock
+
+from algorithm.parameters import params
+
+# Default location of the bug store, next to the logs
+bug_store_path = os.path.join(os.path.dirname(__file__), "..", "logs", "bugs.sqlite")
+
+# Fields making up the signature of a bug, in order
+SIGNATURE_FIELDS = [
+    "kind",
+    "column_type",
+    "operator",
+    "math_function",
+    "value_class",
+    "errno",
+    "probe_errno",
+    "verdict",
+]
+
+# Columns of the bugs table besides the signature fields. Columns missing
+# from a store created by an earlier version are added when it is opened.
+COLUMNS = {
+    "signature": "TEXT PRIMARY KEY",
+    **{field: "TEXT" for field in SIGNATURE_FIELDS},
+    "query": "TEXT",
+    "ddl": "TEXT",
+    "reduced_query": "TEXT",
+    "status": "TEXT",
+    "confirmed_modes": "TEXT",
+    "count": "INTEGER NOT NULL DEFAULT 0",
+    "first_cycle": "INTEGER",
+    "last_cycle": "INTEGER",
+}
+
+# Counts and cycles of the bugs seen since the last flush are merged into
+# the store, which may be shared by several processes (e.g. islands).
+UPSERT = """
+    INSERT INTO bugs ({columns}) VALUES ({values})
+    ON CONFLICT(signature) DO UPDATE SET
+        count = count + excluded.count,
+        first_cycle = MIN(first_cycle, excluded.first_cycle),
+        last_cycle = MAX(last_cycle, excluded.last_cycle)
+"""
+
+
+class BugStore:
+    """
+    A persistent store of distinct bugs, kept in an SQLite file and keyed by
+    a normalised signature. Known signatures are held in memory, so finding
+    out whether a bug is new never touches the file, and the counters of
+    known bugs are only written when the store is flushed.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = Lock()
+        self.db = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+
+        columns = ", ".join(f"{name} {kind}" for name, kind in COLUMNS.items())
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS bugs ({columns})")
+
+        existing = [row[1] for row in self.db.execute("PRAGMA table_info(bugs)")]
+        for name, kind in COLUMNS.items():
+            if name not in existing:
+                self.db.execute(f"ALTER TABLE bugs ADD COLUMN {name} {kind}")
+        self.db.commit()
+
+        self.known = {row[0] for row in self.db.execute("SELECT signature FROM bugs")}
+
+        # signature -> [count, first cycle, last cycle] since the last flush
+        self.seen = {}
+
+    def record(self, fields, cycle, query, ddl=None):
+        """
+        Records a bug found in a cycle. Returns its signature and whether it
+        is a new bug, which is written to the store straight away.
+        """
+        signature = get_signature(fields)
+
+        with self.lock:
+            seen = self.seen.setdefault(signature, [0, cycle, cycle])
+            seen[0] += 1
+            seen[1], seen[2] = min(seen[1], cycle), max(seen[2], cycle)
+
+            if signature in self.known:
+                return signature, False
+
+            self.known.add(signature)
+
+            # The bug may have been stored by another process in the meantime.
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO bugs (signature, %s, query, ddl, "
+                "count, first_cycle, last_cycle) VALUES (?, %s, ?, ?, 0, ?, ?)"
+                % (", ".join(SIGNATURE_FIELDS), ", ".join("?" * len(SIGNATURE_FIELDS))),
+                [signature]
+                + [stringify(fields.get(field)) for field in SIGNATURE_FIELDS]
+                + [query, ddl, cycle, cycle],
+            )
+            self.db.commit()
+
+            return signature, cursor.rowcount > 0
+
+    def flush(self):
+        """
+        Writes the counters of all bugs seen since the last flush.
+        """
+        with self.lock:
+            if not self.seen:
+                return
+
+            self.db.executemany(
+                UPSERT.format(
+                    columns="signature, count, first_cycle, last_cycle",
+                    values="?, ?, ?, ?",
+                ),
+                [[signature] + seen for signature, seen in self.seen.items()],
+            )
+            self.db.commit()
+            self.seen = {}
+
+    def set_reduced(self, signature, query):
+        """
+        Stores the reduced reproducer of a bug, unless a shorter one is stored.
+        """
+        with self.lock:
+            self.db.execute(
+                "UPDATE bugs SET reduced_query = ? WHERE signature = ? AND "
+                "(reduced_query IS NULL OR LENGTH(reduced_query) > LENGTH(?))",
+                [query, signature, query],
+            )
+            self.db.commit()
+
+    def set_status(self, signature, status, modes):
+        """
+        Stores whether a bug is confirmed or rejected, and the sql_modes in
+        which it reproduces.
+        """
+        with self.lock:
+            self.db.execute(
+                "UPDATE bugs SET status = ?, confirmed_modes = ? WHERE signature = ?",
+                [status, modes, signature],
+            )
+            self.db.commit()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+
+store, store_pid = None, None
+
+
+def get_bug_store():
+    """
+    Returns the bug store of this process, opening it if this process has
+    none or params["BUG_STORE"] has changed.
+    """
+    global store, store_pid
+
+    filename = params["BUG_STORE"] or bug_store_path
+
+    if store is not None and store_pid == os.getpid() and store.filename == filename:
+        return store
+
+    if store is not None and store_pid == os.getpid():
+        store.close()
+
+    # A forked process opens its own connection.
+    store, store_pid = BugStore(filename), os.getpid()
+    return store
+
+
+def close_bug_store():
+    if store is not None and store_pid == os.getpid():
+        store.close()
+
+
+atexit.register(close_bug_store)
+
+
+def get_signature(fields):
+    """
+    Joins the signature fields of a bug into its signature.
+    """
+    return "|".join(stringify(fields.get(field)) for field in SIGNATURE_FIELDS)
+
+
+def stringify(value):
+    return "" if value is None else str(value)
@@ -0,0 +1,112 @@
+# confirmer.py
+import os
+from queue import Queue
+from threading import Thread
+
+from constraint_oracle import is_disagreement
+
+from db.bug_store import get_bug_store
+from db.db_connector import log_event
+from db.reducer import Replayer, extract_literal
+
+# Modes in which candidate bugs are replayed
+SQL_MODES = {
+    "strict": "STRICT_TRANS_TABLES,STRICT_ALL_TABLES",
+    "non_strict": "",
+}
+
+
+class BugConfirmer:
+    """
+    Confirms candidate bugs out of band. A background thread replays each
+    candidate in a fresh table with the DDL it was found with, under each of
+    SQL_MODES, free of the rows left in the fuzzed table by earlier
+    individuals. A candidate is confirmed if it reproduces in any of the
+    modes, and rejected otherwise: an oracle disagreement must be found
+    again, while a UNIQUE bug must write the same value twice.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.candidates = Queue()
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, signature, kind, query, ddl, oracle):
+        """
+        Queues a candidate bug of a kind (e.g. "unique") for confirmation,
+        without waiting for it.
+        """
+        self.candidates.put((signature, kind, query, ddl, oracle))
+
+    def run(self):
+        while True:
+            candidate = self.candidates.get()
+            try:
+                self.confirm(*candidate)
+            except Exception as e:
+                # A failed confirmation must not stop the worker.
+                self.logger.error(f"Failed to confirm a bug: {e}")
+            finally:
+                self.candidates.task_done()
+
+    def confirm(self, signature, kind, query, ddl, oracle):
+        """
+        Replays a candidate bug in each mode, and stores whether it is
+        confirmed and in which modes it reproduces.
+        """
+        literal = extract_literal(query)
+        if literal is None or ddl is None:
+            return
+
+        modes = []
+
+        for mode, sql_mode in SQL_MODES.items():
+            replayer = Replayer(ddl, oracle, 1, "t1_confirm", sql_mode)
+            try:
+                if not replayer.connections:
+                    self.logger.error("Failed to open a scratch table to confirm a bug.")
+                    return
+                if kind == "unique":
+                    reproduced = replayer.replay_unique(query, literal) == [None, None]
+                else:
+                    reproduced = is_disagreement(*replayer.replay(query, literal))
+                if reproduced:
+                    modes.append(mode)
+            finally:
+                replayer.close()
+
+        status = "confirmed" if modes else "rejected"
+        get_bug_store().set_status(signature, status, ",".join(modes))
+
+        log_event(
+            self.logger,
+            "confirmation",
+            signature=signature,
+            kind=kind,
+            query=query,
+            status=status,
+            modes=modes,
+        )
+
+    def join(self):
+        """
+        Waits for all queued candidates to be confirmed.
+        """
+        self.candidates.join()
+
+
+confirmer, confirmer_pid = None, None
+
+
+def get_bug_confirmer(logger):
+    """
+    Returns the bug confirmer of this process, starting it if this process
+    has none.
+    """
+    global confirmer, confirmer_pid
+
+    if confirmer is None or confirmer_pid != os.getpid():
+        confirmer, confirmer_pid = BugConfirmer(logger), os.getpid()
+
+    return confirmer
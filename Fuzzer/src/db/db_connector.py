@@ -1,19 +1,109 @@
 # db_connector.py
+import atexit
+import json
 import logging
 import os
 import time
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing.util import Finalize
+from queue import SimpleQueue
+from threading import Lock
 
 import mysql.connector
+from algorithm.parameters import params
 
-# Setup logger
+
+class PlainFormatter(logging.Formatter):
+    """
+    Formats records logged with log_plain_message as the bare message.
+    """
+
+    def format(self, record):
+        if getattr(record, "plain", False):
+            return record.getMessage()
+        return super().format(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats events logged with log_event as single JSON lines.
+    """
+
+    def format(self, record):
+        event = {
+            "time": record.created,
+            "level": record.levelname,
+            "pid": record.process,
+            "event": record.event,
+        }
+        event.update(record.fields)
+        return json.dumps(event, default=str)
+
+
+class ProcessQueueHandler(QueueHandler):
+    """
+    Queues records for the listener of the current process, starting one if
+    this process was forked from another (e.g. an island) and has none.
+    """
+
+    def enqueue(self, record):
+        start_logging()
+        super().enqueue(record)
+
+
+class EventRateLimiter:
+    """
+    Lets through at most params["LOG_RATE_LIMIT"] events of each type per
+    second, and counts the events suppressed in between.
+    """
+
+    def __init__(self):
+        self.windows = {}
+        self.lock = Lock()
+
+    def allow(self, event):
+        """
+        Returns None if the event is suppressed, or else the number of events
+        of its type suppressed since the last one let through.
+        """
+        limit = params["LOG_RATE_LIMIT"]
+        second = int(time.monotonic())
+
+        with self.lock:
+            window = self.windows.setdefault(event, [second, 0, 0])
+            if window[0] != second:
+                window[0], window[1] = second, 0
+
+            if limit and window[1] >= limit:
+                window[2] += 1
+                return None
+
+            window[1] += 1
+            suppressed, window[2] = window[2], 0
+            return suppressed
+
+
+def is_message(record):
+    """
+    Filters out events logged without a message, which only go to the event
+    log.
+    """
+    return not getattr(record, "silent", False)
+
+
+# Setup logger. Records are only queued by the logging thread, which may be
+# a DB evaluation, and are written by a background listener.
 logger = logging.getLogger("DBLogger")
 logger.setLevel(logging.INFO)
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+formatter = PlainFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+queue_handler = ProcessQueueHandler(SimpleQueue())
+logger.addHandler(queue_handler)
 
 # Console handler
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+console_handler.addFilter(is_message)
 
 # File handler for persistent logging
 log_file_path = os.path.join(
@@ -21,25 +111,88 @@ log_file_path = os.path.join(
 )
 file_handler = logging.FileHandler(log_file_path)
 file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+file_handler.addFilter(is_message)
+
+# Machine-readable event log, one JSON object per line
+events_file_path = os.path.join(
+    os.path.dirname(__file__), "..", "logs", "events.jsonl"
+)
+events_handler = logging.FileHandler(events_file_path)
+events_handler.setFormatter(JSONFormatter())
+events_handler.addFilter(lambda record: hasattr(record, "event"))
+
+listener, listener_pid = None, None
+rate_limiter = EventRateLimiter()
+
+
+def start_logging():
+    """
+    Starts the listener writing queued records to the handlers, once per
+    process.
+    """
+    global listener, listener_pid
+
+    if listener_pid == os.getpid():
+        return
+
+    forked = listener_pid is not None
+    if forked:
+        # A forked process leaves the records of its parent to the parent.
+        queue_handler.queue = SimpleQueue()
+
+    listener_pid = os.getpid()
+    listener = QueueListener(
+        queue_handler.queue, console_handler, file_handler, events_handler
+    )
+    listener.start()
+
+    if forked:
+        # multiprocessing children leave through os._exit, skipping atexit,
+        # but run their finalizers first. The listener is stopped last, so
+        # the records of other finalizers are written too.
+        Finalize(None, stop_logging, exitpriority=-100)
+
+
+def stop_logging():
+    """
+    Writes all queued records and stops the listener of this process.
+    """
+    global listener_pid
+
+    if listener_pid == os.getpid():
+        listener.stop()
+        listener_pid = None
+
+
+start_logging()
+atexit.register(stop_logging)
 
 
 def log_plain_message(logger, message):
     """
     Logs a plain message without additional info like timestamps and logger names.
     """
-    # Save the original formatters
-    original_formatters = []
-    for handler in logger.handlers:
-        original_formatters.append(handler.formatter)
-        handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.info(message, extra={"plain": True})
+
 
-    # Log the plain message
-    logger.info(message)
+def log_event(logger, event, message=None, level=logging.INFO, **fields):
+    """
+    Logs an event of a type (e.g. "finding") with the given fields to the
+    JSON-lines event log, and its message (if any) like any other message.
+    Events beyond params["LOG_RATE_LIMIT"] per second of each type are
+    dropped, and the next event of the type records how many were.
+    """
+    suppressed = rate_limiter.allow(event)
+    if suppressed is None:
+        return
+    if suppressed:
+        fields["suppressed"] = suppressed
 
-    # Restore the original formatters
-    for handler, formatter in zip(logger.handlers, original_formatters):
-        handler.setFormatter(formatter)
+    logger.log(
+        level,
+        event if message is None else message,
+        extra={"event": event, "fields": fields, "silent": message is None},
+    )
 
 
 def load_db_config(config_filename="db_config.json"):
@@ -78,3 +231,23 @@ def connect_to_mysql(config, attempts=3, delay=2):
             time.sleep(delay**attempt)
             attempt += 1
     return None
+
+
+def create_database(config, name):
+    """
+    Create a database (schema) with the given name if it does not exist.
+    Returns True if the database exists afterwards.
+    """
+    cnx = connect_to_mysql(config)
+    if cnx is None:
+        return False
+    try:
+        cursor = cnx.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{name}`;")
+        cnx.commit()
+        return True
+    except mysql.connector.Error as e:
+        logger.error(f"Failed to create database {name}: {e}")
+        return False
+    finally:
+        cnx.close()
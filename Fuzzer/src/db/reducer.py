@@ -0,0 +1,320 @@
+# reducer.py
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from queue import Queue
+
+import mysql.connector
+from algorithm.parameters import params
+from constraint_oracle import is_disagreement, is_number
+
+from db.bug_store import get_bug_store
+from db.db_connector import connect_to_mysql, load_db_config, log_event
+from operators.boundary_seeding import NUMBER_WIDTHS, ULP
+
+# The value written by a phenotype, marked by double parentheses
+LITERAL = re.compile(r"\(\((.*?)\)\)")
+
+# Maximum number of rounds of numeric bisection
+MAX_BISECTIONS = 40
+
+
+class Replayer:
+    """
+    Replays statements in isolated scratch tables, one per pooled connection,
+    created with the DDL of a finding. Each statement is replayed against
+    the state the fuzzer starts from: an empty table with two NULL rows.
+    Sessions use the server's sql_mode unless another one is given. Scratch
+    tables are named after the process, as processes (e.g. multi-agent
+    shards) share a schema.
+    """
+
+    def __init__(self, ddl, oracle, workers, prefix="t1_reduce", sql_mode=None):
+        prefix = f"{prefix}{os.getpid()}_"
+        self.oracle = oracle
+        self.sessions = Queue()
+        self.connections = []
+        self.results = {}
+
+        for i in range(workers):
+            cnx = connect_to_mysql(load_db_config())
+            if cnx is None:
+                break
+
+            table = f"{prefix}{i}"
+            cursor = cnx.cursor()
+            try:
+                if sql_mode is not None:
+                    cursor.execute(f"SET SESSION sql_mode = '{sql_mode}';")
+                cursor.execute(f"DROP TABLE IF EXISTS {table};")
+                cursor.execute(scratch_ddl(ddl, table))
+                cnx.commit()
+            except mysql.connector.Error:
+                cnx.close()
+                break
+
+            self.connections.append((cnx, cursor, table))
+            self.sessions.put((cnx, cursor, table))
+
+        self.pool = ThreadPoolExecutor(max_workers=max(len(self.connections), 1))
+
+    def replay(self, statement, literal):
+        """
+        Replays a statement with a literal in place of its value, and returns
+        the oracle verdict, errno and rowcount. Results are memoised.
+        """
+        if literal in self.results:
+            return self.results[literal]
+
+        cnx, cursor, table = self.sessions.get()
+        errno, rowcount = None, 0
+        try:
+            cursor.execute(f"TRUNCATE TABLE {table};")
+            cursor.execute(f"INSERT INTO {table} (c1) VALUES (NULL);")
+            cursor.execute(f"INSERT INTO {table} (c1) VALUES (NULL);")
+            cnx.commit()
+
+            try:
+                cursor.execute(scratch_statement(statement, table, literal))
+                cnx.commit()
+                rowcount = cursor.rowcount
+            except mysql.connector.Error as e:
+                errno = e.errno
+        finally:
+            self.sessions.put((cnx, cursor, table))
+
+        oracle_result = self.oracle.evaluate_value_against_constraints("c1", literal)
+        verdict = oracle_result[0][0] if oracle_result else None
+
+        self.results[literal] = verdict, errno, rowcount
+        return self.results[literal]
+
+    def replay_unique(self, statement, literal):
+        """
+        Replays a statement with a literal in place of its value, then writes
+        the value again like the UNIQUE probe of the fitness function, and
+        returns the errno of both writes.
+        """
+        cnx, cursor, table = self.sessions.get()
+        errnos = []
+        try:
+            cursor.execute(f"TRUNCATE TABLE {table};")
+            cursor.execute(f"INSERT INTO {table} (c1) VALUES (NULL);")
+            cursor.execute(f"INSERT INTO {table} (c1) VALUES (NULL);")
+            cnx.commit()
+
+            statement = scratch_statement(statement, table, literal)
+            for write in [statement, unique_probe(statement)]:
+                try:
+                    cursor.execute(write)
+                    cnx.commit()
+                    errnos.append(None)
+                except mysql.connector.Error as e:
+                    errnos.append(e.errno)
+        finally:
+            self.sessions.put((cnx, cursor, table))
+
+        return errnos
+
+    def replay_all(self, statement, literals):
+        """
+        Replays a statement with each of a list of literals concurrently.
+        """
+        return list(
+            self.pool.map(lambda literal: self.replay(statement, literal), literals)
+        )
+
+    def close(self):
+        self.pool.shutdown()
+        for cnx, cursor, table in self.connections:
+            try:
+                cursor.execute(f"DROP TABLE IF EXISTS {table};")
+                cnx.commit()
+            except mysql.connector.Error:
+                pass
+            cnx.close()
+
+
+def scratch_ddl(ddl, table):
+    """
+    Rewrites the DDL of the fuzzed table to create a scratch table. Check
+    constraint names are unique within a schema, so names are left to MySQL.
+    """
+    ddl = re.sub(r"CREATE TABLE\s+`?t1`?", f"CREATE TABLE {table}", ddl, count=1)
+    return re.sub(r"CONSTRAINT\s+`?\w+`?\s+CHECK", "CHECK", ddl, flags=re.IGNORECASE)
+
+
+def scratch_statement(statement, table, literal):
+    """
+    Rewrites a statement on the fuzzed table to write a literal to a scratch
+    table.
+    """
+    statement = re.sub(r"^(INSERT INTO|UPDATE)\s+t1\b", rf"\1 {table}", statement)
+    return replace_literal(statement, literal)
+
+
+def extract_literal(statement):
+    """
+    Returns the value written by a statement, or None if it has none.
+    """
+    match = LITERAL.search(statement)
+    return match.group(1) if match else None
+
+
+def replace_literal(statement, literal):
+    """
+    Rewrites a statement to write a literal in place of its value.
+    """
+    return LITERAL.sub(lambda _: f"(({literal}))", statement, count=1)
+
+
+def unique_probe(statement):
+    """
+    Rewrites a statement to write its value again: updates move on to the
+    second row, while inserts are repeated as they are.
+    """
+    if "UPDATE" in statement:
+        return statement.replace("id = 1", "id = 2")
+    return statement
+
+
+def reduce_bug(replayer, statement, literal, target):
+    """
+    Reduces the literal of a statement while replaying it gives the same
+    oracle disagreement. Returns the reduced literal, or None if the
+    statement does not reproduce the disagreement in a scratch table.
+    """
+    expected = replayer.replay(statement, literal)
+    if not is_disagreement(*expected):
+        return None
+
+    def holds(result):
+        return result[:2] == expected[:2] and is_disagreement(*result)
+
+    def test_all(literals):
+        return [holds(result) for result in replayer.replay_all(statement, literals)]
+
+    if is_number(literal):
+        return bisect_number(Decimal(literal), target, test_all)
+
+    if len(literal) > 2 and literal[0] == literal[-1] == "'":
+        chars = ddmin(
+            list(literal[1:-1]),
+            lambda subsets: test_all(["'%s'" % "".join(s) for s in subsets]),
+        )
+        return "'%s'" % "".join(chars)
+
+    return literal
+
+
+def ddmin(chars, test_all):
+    """
+    Delta debugging: removes as many characters as possible while the test
+    holds. The subsets and complements of each round are tested together.
+    """
+    n = 2
+
+    while len(chars) >= 2:
+        size = len(chars) / n
+        chunks = [chars[round(i * size) : round((i + 1) * size)] for i in range(n)]
+        complements = [
+            chars[: round(i * size)] + chars[round((i + 1) * size) :] for i in range(n)
+        ]
+
+        results = test_all(chunks + complements)
+
+        if any(results[:n]):
+            chars, n = chunks[results.index(True)], 2
+        elif any(results[n:]):
+            chars, n = complements[results[n:].index(True)], max(n - 1, 2)
+        elif n >= len(chars):
+            break
+        else:
+            n = min(len(chars), 2 * n)
+
+    return chars
+
+
+def bisect_number(number, target, test_all):
+    """
+    Moves a number towards a target while the test holds, testing as many
+    points of the remaining interval at a time as there are workers, then
+    drops as many fractional digits as possible.
+    """
+    points = params["REDUCER_WORKERS"]
+    near, far = target, number
+
+    if test_all([format(target, "f")])[0]:
+        far = target
+
+    for _ in range(MAX_BISECTIONS):
+        if abs(far - near) <= ULP:
+            break
+
+        step = (far - near) / (points + 1)
+        candidates = [(near + step * i).quantize(ULP) for i in range(1, points + 1)]
+        results = test_all([format(candidate, "f") for candidate in candidates])
+
+        if any(results):
+            i = results.index(True)
+            near, far = (candidates[i - 1] if i else near), candidates[i]
+        else:
+            near = candidates[-1]
+
+    # The shortest rounding of the number which still holds
+    roundings = [
+        far.quantize(Decimal(10) ** -digits) for digits in range(NUMBER_WIDTHS[-1] + 1)
+    ]
+    results = test_all([format(rounding, "f") for rounding in roundings])
+    if any(results):
+        far = roundings[results.index(True)]
+
+    return format(far, "f")
+
+
+def reduce_bugs(bugs, oracle, logger):
+    """
+    Reduces the new bugs found in a cycle and stores their reproducers in
+    the bug store, next to the original queries.
+    """
+    constraint_value = oracle.constraints[0]["value"] if oracle.constraints else None
+    try:
+        target = Decimal(str(constraint_value))
+    except InvalidOperation:
+        # Strings without a numeric prefix are compared as 0.
+        target = Decimal(0)
+
+    store = get_bug_store()
+
+    for signature, query, ddl in bugs:
+        literal = extract_literal(query)
+        if literal is None or ddl is None:
+            continue
+
+        replayer = Replayer(ddl, oracle, params["REDUCER_WORKERS"])
+        try:
+            if not replayer.connections:
+                logger.error("Failed to open a scratch table to reduce a bug.")
+                return
+
+            reduced = reduce_bug(replayer, query, literal, target)
+        except mysql.connector.Error as e:
+            logger.error(f"Failed to reduce a bug: {e}")
+            continue
+        finally:
+            replayer.close()
+
+        if reduced is None:
+            continue
+
+        reduced_query = replace_literal(query, reduced)
+        store.set_reduced(signature, reduced_query)
+        log_event(
+            logger,
+            "reduction",
+            signature=signature,
+            query=query,
+            reduced_query=reduced_query,
+            replays=len(replayer.results),
+        )
@@ -0,0 +1,164 @@
+# trace.py
+import atexit
+import itertools
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+import mysql.connector
+from algorithm.parameters import params
+from utilities.algorithm import islands
+
+# Default location of the statement trace, next to the logs
+trace_path = os.path.join(os.path.dirname(__file__), "..", "logs", "trace.bin")
+
+MAGIC = b"SQLTRACE"
+
+# Magic, entry size and capacity, padded to HEADER_SIZE bytes
+HEADER = struct.Struct("<8sII")
+HEADER_SIZE = 64
+
+# Sequence number, timestamp, pid, session (connection id), errno (0 for
+# none), rowcount, latency in seconds and length of the statement, followed
+# by the statement, truncated to fit the entry. Entries are written with a
+# single pack_into, which is most of the cost of recording a statement.
+FIELDS = "<qdIIiqdH"
+ENTRY_SIZE = 512
+STATEMENT_SIZE = ENTRY_SIZE - struct.calcsize(FIELDS)
+ENTRY = struct.Struct(f"{FIELDS}{STATEMENT_SIZE}s")
+
+TraceEntry = namedtuple(
+    "TraceEntry",
+    "seq time pid session errno rowcount latency statement truncated",
+)
+
+
+class StatementTrace:
+    """
+    A fixed-size ring buffer of the statements executed by the fuzzer, kept
+    in a memory-mapped file. Entries are written straight to the shared
+    mapping, so the trace survives a crash of the process and can be read
+    while the fuzzer is running, see scripts/trace_dump.py. Slots are
+    claimed with a sequence number, so concurrent sessions never share one.
+    """
+
+    def __init__(self, filename, entries):
+        self.filename = filename
+        self.capacity = entries
+
+        # Keep the trace of the previous run, e.g. of a crashed fuzzer.
+        if os.path.exists(filename):
+            os.replace(filename, filename + ".1")
+
+        with open(filename, "wb") as file:
+            file.truncate(HEADER_SIZE + entries * ENTRY_SIZE)
+        with open(filename, "r+b") as file:
+            self.map = mmap.mmap(file.fileno(), 0)
+
+        HEADER.pack_into(self.map, 0, MAGIC, ENTRY_SIZE, entries)
+        self.sequence = itertools.count(1)
+        self.pid = os.getpid()
+
+    def record(self, statement, session, errno, rowcount, latency):
+        """
+        Records an executed statement in the next slot of the ring.
+        """
+        seq = next(self.sequence)
+        data = statement.encode()
+        ENTRY.pack_into(
+            self.map,
+            HEADER_SIZE + (seq % self.capacity) * ENTRY_SIZE,
+            seq,
+            time.time(),
+            self.pid,
+            session,
+            errno,
+            rowcount,
+            latency,
+            min(len(data), 0xFFFF),
+            data,
+        )
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+
+
+trace, trace_pid = None, None
+
+
+def open_trace():
+    """
+    Opens the statement trace of this process, in which the statements
+    executed with execute_statement are recorded from then on. Islands keep
+    one trace each.
+    """
+    global trace, trace_pid
+
+    filename = params["TRACE_FILE"] or trace_path
+    if islands.island is not None:
+        root, ext = os.path.splitext(filename)
+        filename = f"{root}_island{islands.island.index}{ext}"
+
+    # A forked process opens its own trace.
+    trace, trace_pid = StatementTrace(filename, params["TRACE_ENTRIES"]), os.getpid()
+
+
+def close_trace():
+    if trace is not None and trace_pid == os.getpid():
+        trace.close()
+
+
+atexit.register(close_trace)
+
+
+def execute_statement(cnx, cursor, statement):
+    """
+    Executes a statement on a cursor, recording it in the statement trace
+    of this process if it has one. Database errors are recorded and raised.
+    """
+    if trace is None or trace_pid != os.getpid():
+        cursor.execute(statement)
+        return
+
+    session = getattr(cnx, "connection_id", None) or 0
+    start = time.perf_counter()
+    try:
+        cursor.execute(statement)
+    except mysql.connector.Error as e:
+        trace.record(statement, session, e.errno or 0, 0, time.perf_counter() - start)
+        raise
+    trace.record(statement, session, 0, cursor.rowcount, time.perf_counter() - start)
+
+
+def read_trace(filename):
+    """
+    Reads the entries of a statement trace, oldest first.
+    """
+    with open(filename, "rb") as file:
+        data = file.read()
+
+    magic, entry_size, capacity = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or entry_size != ENTRY_SIZE:
+        raise ValueError(f"{filename} is not a statement trace.")
+
+    entries = []
+    for slot in range(capacity):
+        seq, *fields, length, statement = ENTRY.unpack_from(
+            data, HEADER_SIZE + slot * ENTRY_SIZE
+        )
+        if seq == 0:
+            continue
+
+        entries.append(
+            TraceEntry(
+                seq,
+                *fields,
+                statement[:length].decode(errors="replace"),
+                length > STATEMENT_SIZE,
+            )
+        )
+
+    return sorted(entries)
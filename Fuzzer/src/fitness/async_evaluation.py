@@ -0,0 +1,182 @@
+from queue import Empty, Queue
+from threading import Thread
+
+from algorithm.parameters import params
+from db.db_connector import connect_to_mysql, load_db_config
+from fitness.evaluation import lookup_fitness, record_evaluation
+from utilities.algorithm.novelty import assess_novelty
+from utilities.algorithm.operator_scheduler import reward_operators
+
+
+class AsyncEvaluator:
+    """
+    Evaluates individuals asynchronously on a number of worker threads, each
+    of which holds its own database session. Individuals are submitted as
+    soon as they are bred and collected as soon as their evaluation
+    completes, in order of completion, so that the database is kept busy
+    while the search process breeds new individuals.
+    """
+
+    def __init__(self, cnx, cursor, logger, cycle_number):
+        """
+        Open params['ASYNC_WORKERS'] database sessions and start a worker
+        thread on each of them. The first worker re-uses the session of the
+        current fuzzing cycle.
+
+        :param cnx: The database connection of the current cycle.
+        :param cursor: A cursor on the connection of the current cycle.
+        :param logger: The logger of the current cycle.
+        :param cycle_number: The number of the current cycle.
+        """
+
+        self.logger = logger
+        self.cycle_number = cycle_number
+
+        # Individuals waiting to be evaluated and evaluated individuals.
+        self.todo, self.done = Queue(), Queue()
+
+        # The number of submitted individuals not yet collected.
+        self.pending = 0
+
+        sessions, self.connections = [(cnx, cursor)], []
+
+        for _ in range(params['ASYNC_WORKERS'] - 1):
+            # Open a new session for each additional worker.
+            new_cnx = connect_to_mysql(load_db_config())
+
+            if new_cnx is None:
+                logger.error("Failed to open a database session for an "
+                             "asynchronous worker, continuing with %d "
+                             "workers." % len(sessions))
+                break
+
+            self.connections.append(new_cnx)
+            sessions.append((new_cnx, new_cnx.cursor()))
+
+        self.workers = [Thread(target=self.work, args=session,
+                               name="evaluator-%d" % i, daemon=True)
+                        for i, session in enumerate(sessions)]
+
+        for worker in self.workers:
+            worker.start()
+
+    def work(self, cnx, cursor):
+        """
+        Evaluate individuals from the queue of submitted individuals on the
+        given session until a None sentinel is received.
+
+        :param cnx: The database connection of the worker.
+        :param cursor: A cursor on the connection of the worker.
+        :return: Nothing.
+        """
+
+        while True:
+            ind = self.todo.get()
+
+            if ind is None:
+                # The evaluator has been closed.
+                break
+
+            try:
+                ind.evaluate(cnx, cursor, self.logger, self.cycle_number)
+
+            except Exception as e:
+                # A failed evaluation must not stop the worker, otherwise
+                # the search would wait forever for its result.
+                self.logger.error(f"Failed to evaluate individual: {e}")
+                ind.fitness = params['FITNESS_FUNCTION'].default_fitness
+
+            self.done.put((ind, True))
+
+    def submit(self, ind):
+        """
+        Submit an individual for evaluation. Individuals which do not need
+        to be evaluated (e.g. invalids and cached phenotypes) are completed
+        immediately.
+
+        :param ind: An individual to be evaluated.
+        :return: Nothing.
+        """
+
+        ind, eval_ind = lookup_fitness(ind)
+
+        self.pending += 1
+
+        if eval_ind:
+            self.todo.put(ind)
+
+        else:
+            self.done.put((ind, False))
+
+    def get(self, novelty=True):
+        """
+        Wait for the next submitted individual to complete its evaluation.
+        If params['NOVELTY'] is specified, the novelty of the individual is
+        assessed against the novelty archive alone, as it is collected on
+        its own rather than with a batch.
+
+        :param novelty: Whether to assess the novelty of the individual,
+        False if it is assessed with a batch by the caller.
+        :return: An evaluated individual.
+        """
+
+        ind, evaluated = self.done.get()
+
+        self.pending -= 1
+
+        if evaluated:
+            # Record runtime errors and cache the fitness.
+            record_evaluation(ind)
+
+        if params['ADAPTIVE_OPERATORS']:
+            # Reward the operators which produced the individual.
+            reward_operators([ind])
+
+        if params['NOVELTY'] and novelty:
+            assess_novelty([ind])
+
+        return ind
+
+    def evaluate_all(self, individuals):
+        """
+        Evaluate an entire population of individuals concurrently.
+
+        :param individuals: A population of individuals to be evaluated.
+        :return: A population of fully evaluated individuals.
+        """
+
+        for ind in individuals:
+            self.submit(ind)
+
+        individuals = [self.get(novelty=False) for _ in individuals]
+
+        if params['NOVELTY']:
+            # Compute the novelty of the whole batch at once.
+            assess_novelty(individuals)
+
+        return individuals
+
+    def close(self):
+        """
+        Stop all workers and close the sessions opened by the evaluator.
+        Individuals which are still queued are discarded.
+
+        :return: Nothing.
+        """
+
+        try:
+            while True:
+                # Discard individuals which have not been started.
+                self.todo.get_nowait()
+
+        except Empty:
+            pass
+
+        for _ in self.workers:
+            self.todo.put(None)
+
+        for worker in self.workers:
+            worker.join()
+
+        for cnx in self.connections:
+            cnx.close()
@@ -2,6 +2,10 @@ import numpy as np
 
 from algorithm.parameters import params
 from stats.stats import stats
+from utilities.algorithm.novelty import assess_novelty
+from utilities.algorithm.operator_scheduler import reward_operators
+from utilities.stats import metrics, trackers
+from utilities.stats.timers import timer
 from utilities.stats.trackers import cache, runtime_error_cache
 
 
@@ -36,44 +40,17 @@ def evaluate_fitness(individuals, cnx, cursor, logger, cycle_number):
         ind.name = name
 
         # Iterate over all individuals in the population.
-        if ind.invalid:
-            # Invalid individuals cannot be evaluated and are given a bad
-            # default fitness.
-            ind.fitness = params['FITNESS_FUNCTION'].default_fitness
-            stats['invalids'] += 1
-
-        else:
-            eval_ind = True
-
-            # Valid individuals can be evaluated.
-            if params['CACHE'] and ind.phenotype in cache:
-                # The individual has been encountered before in
-                # the utilities.trackers.cache.
-
-                if params['LOOKUP_FITNESS']:
-                    # Set the fitness as the previous fitness from the
-                    # cache.
-                    ind.fitness = cache[ind.phenotype]
-                    eval_ind = False
-
-                elif params['LOOKUP_BAD_FITNESS']:
-                    # Give the individual a bad default fitness.
-                    ind.fitness = params['FITNESS_FUNCTION'].default_fitness
-                    eval_ind = False
+        with timer("cache_lookup"):
+            new_ind, eval_ind = lookup_fitness(ind)
 
-                elif params['MUTATE_DUPLICATES']:
-                    # Mutate the individual to produce a new phenotype
-                    # which has not been encountered yet.
-                    while (not ind.phenotype) or ind.phenotype in cache:
-                        ind = params['MUTATION'](ind)
-                        stats['regens'] += 1
+        if new_ind is not ind:
+            # Need to overwrite the current individual in the pop.
+            individuals[name] = new_ind
+            new_ind.name = name
 
-                    # Need to overwrite the current individual in the pop.
-                    individuals[name] = ind
-                    ind.name = name
-
-            if eval_ind:
-                results = eval_or_append(ind, results, pool, cnx, cursor, logger, cycle_number)
+        if eval_ind:
+            results = eval_or_append(new_ind, results, pool, cnx, cursor,
+                                     logger, cycle_number)
 
     if params['MULTICORE']:
         for result in results:
@@ -91,9 +68,109 @@ def evaluate_fitness(individuals, cnx, cursor, logger, cycle_number):
             if ind.runtime_error:
                 runtime_error_cache.append(ind.phenotype)
 
+    if params['ADAPTIVE_OPERATORS']:
+        # Reward the operators which produced the individuals.
+        with timer("operator_rewards"):
+            reward_operators(individuals)
+
+    if params['NOVELTY']:
+        # Compute the novelty of the whole batch at once.
+        with timer("novelty"):
+            assess_novelty(individuals)
+
     return individuals
 
 
+def lookup_fitness(ind):
+    """
+    Set the fitness of an individual which does not need to be evaluated.
+    Invalid individuals are given a default bad fitness. If params['CACHE']
+    is specified, individuals which have already been evaluated are handled
+    using the cache options described in evaluate_fitness.
+
+    :param ind: An individual.
+    :return: The individual, which is a new mutated individual if
+    params['MUTATE_DUPLICATES'] is specified, and whether or not it still
+    needs to be evaluated.
+    """
+
+    if ind.invalid:
+        # Invalid individuals cannot be evaluated and are given a bad
+        # default fitness.
+        ind.fitness = params['FITNESS_FUNCTION'].default_fitness
+        stats['invalids'] += 1
+        return ind, False
+
+    # Valid individuals can be evaluated.
+    hit = params['CACHE'] and ind.phenotype in cache
+
+    if metrics.enabled and params['CACHE']:
+        metrics.record("cache", "hit" if hit else "miss")
+
+    if hit:
+        # The individual has been encountered before in
+        # the utilities.trackers.cache.
+
+        if params['LOOKUP_FITNESS']:
+            # Set the fitness as the previous fitness from the
+            # cache.
+            ind.fitness = cache[ind.phenotype]
+            return ind, False
+
+        elif params['LOOKUP_BAD_FITNESS']:
+            # Give the individual a bad default fitness.
+            ind.fitness = params['FITNESS_FUNCTION'].default_fitness
+            return ind, False
+
+        elif params['MUTATE_DUPLICATES']:
+            # Mutate the individual to produce a new phenotype
+            # which has not been encountered yet.
+            while (not ind.phenotype) or ind.phenotype in cache:
+                ind = params['MUTATION'](ind)
+                stats['regens'] += 1
+
+    return ind, True
+
+
+def record_evaluation(ind):
+    """
+    Record the result of evaluating an individual: note runtime errors and
+    database errors and, if params['CACHE'] is specified, add its fitness to
+    the cache.
+
+    :param ind: An evaluated individual.
+    :return: Nothing.
+    """
+
+    trackers.evaluations += 1
+
+    if metrics.enabled:
+        metrics.record_evaluation(getattr(ind, "outcome", None),
+                                  getattr(ind, "evaluation_time", 0))
+
+    # Count the database errors of the run, for its error summary.
+    outcome = getattr(ind, "outcome", None)
+    if outcome is not None and outcome['errno'] is not None:
+        trackers.error_counts[outcome['errno']] = \
+            trackers.error_counts.get(outcome['errno'], 0) + 1
+
+    # Check if individual had a runtime error.
+    if ind.runtime_error:
+        runtime_error_cache.append(ind.phenotype)
+
+    if params['CACHE']:
+        # The phenotype string of the individual does not appear
+        # in the cache, it must be evaluated and added to the
+        # cache.
+
+        if (isinstance(ind.fitness, list) and not
+        any([np.isnan(i) for i in ind.fitness])) or \
+                (not isinstance(ind.fitness, list) and not
+                np.isnan(ind.fitness)):
+            # All fitnesses are valid.
+            cache[ind.phenotype] = ind.fitness
+
+
 def eval_or_append(ind, results, pool, cnx, cursor, logger, cycle_number):
     """
     Evaluates an individual if sequential evaluation is being used. If
@@ -117,18 +194,5 @@ def eval_or_append(ind, results, pool, cnx, cursor, logger, cycle_number):
         # Evaluate the individual.
         ind.evaluate(cnx, cursor, logger, cycle_number)
 
-        # Check if individual had a Trueruntime error.
-        if ind.runtime_error:
-            runtime_error_cache.append(ind.phenotype)
-
-        if params['CACHE']:
-            # The phenotype string of the individual does not appear
-            # in the cache, it must be evaluated and added to the
-            # cache.
-
-            if (isinstance(ind.fitness, list) and not
-            any([np.isnan(i) for i in ind.fitness])) or \
-                    (not isinstance(ind.fitness, list) and not
-                    np.isnan(ind.fitness)):
-                # All fitnesses are valid.
-                cache[ind.phenotype] = ind.fitness
+        # Record runtime errors and cache the fitness.
+        record_evaluation(ind)
@@ -1,14 +1,19 @@
 import logging
-import re
 import time
 
-from constraint_oracle import ConstraintOracle, is_number
+from algorithm.parameters import params
+from constraint_oracle import ConstraintOracle, is_disagreement, is_number
+from db.bug_store import get_bug_store
+from db.confirmer import get_bug_confirmer
+from db.db_connector import log_event
+from db.reducer import extract_literal, unique_probe
+from db.trace import execute_statement
 from fitness.base_ff_classes.base_ff import base_ff
 from Levenshtein import distance as levenshtein_distance
 from mysql.connector import Error as MySQLError
-
-bug_count = 0
-current_cycle = 0
+from utilities.algorithm.novelty import get_value_class
+from utilities.stats import trackers
+from utilities.stats.timers import timer
 
 
 class fitness_fun(base_ff):
@@ -26,22 +31,17 @@ class fitness_fun(base_ff):
     def evaluate(self, ind, **kwargs):
         # Evaluate the individual's fitness based
 
-        global current_cycle
-        global bug_count
-
         cnx = kwargs.get("cnx")
         cursor = kwargs.get("cursor")
         logger = kwargs.get("logger", logging.getLogger())
         cycle_number = kwargs.get("cycle_number")
-        if current_cycle != cycle_number:
-            current_cycle = cycle_number
-            bug_count = 0
 
         # Initialization
         phenotype = str(ind.phenotype)
         mutated_value = self.extract_value(phenotype)
 
         error_code = None
+        probe_error_code = None
         rows_affected = 0
         passed = False
         execution_time = 0
@@ -49,42 +49,64 @@ class fitness_fun(base_ff):
         constraint_trigger = 0
         proximity = 0
 
-        start_time = time.time()
+        # Outcome of executing the individual, used to reward the operators
+        # which produced it
+        outcome = ind.outcome = {
+            "errno": None,
+            "rowcount": 0,
+            "statements": 1,
+            "verdict": None,
+            "bug": False,
+            "value": mutated_value,
+        }
 
-        try:
-            cursor.execute(phenotype)
-            cnx.commit()
-            passed = True
-            rows_affected = cursor.rowcount
-        except MySQLError as e:
-            error_code = e.errno
-            #print(f"Error executing query: {phenotype}. Error: {error_code}")
-            # Check for syntax errors (error code 1064)
-            if error_code == 1064:
-                return self.default_fitness
+        start_time = time.time()
 
-            # Check for constraint violations (error code 3819)
-            if error_code == 3819:
-                constraint_trigger = 1
-            elif error_code not in [1264, 1366, 1406]:
-                error_diversity = 1
+        with timer("sql"):
+            try:
+                execute_statement(cnx, cursor, phenotype)
+                cnx.commit()
+                passed = True
+                rows_affected = cursor.rowcount
+                outcome["rowcount"] = rows_affected
+            except MySQLError as e:
+                error_code = e.errno
+                outcome["errno"] = error_code
+                #print(f"Error executing query: {phenotype}. Error: {error_code}")
+                # Check for syntax errors (error code 1064)
+                if error_code == 1064:
+                    return self.default_fitness
+
+                # Check for constraint violations (error code 3819)
+                if error_code == 3819:
+                    constraint_trigger = 1
+                elif error_code not in [1264, 1366, 1406]:
+                    error_diversity = 1
 
         execution_time = time.time() - start_time
+        outcome["latency"] = execution_time
 
         if passed:
-            try:
-                if "UPDATE" in phenotype:
-                    cursor.execute(phenotype.replace("id = 1", "id = 2"))
-                else:
-                    cursor.execute(phenotype)
-                cnx.commit()
-                logger.warning(f"\nUNIQUE bug found with query: {phenotype}")
-            except MySQLError:
-                pass
-
-        oracle_result = self.oracle.evaluate_value_against_constraints(
-            "c1", mutated_value
-        )
+            outcome["statements"] += 1
+            with timer("sql"):
+                try:
+                    execute_statement(cnx, cursor, unique_probe(phenotype))
+                    cnx.commit()
+                    self.record_finding(
+                        logger,
+                        cycle_number,
+                        outcome,
+                        phenotype,
+                        "unique",
+                        f"\nUNIQUE bug found with query: {phenotype}",
+                    )
+                except MySQLError as e:
+                    probe_error_code = e.errno
+
+        with timer("oracle"):
+            oracle_result = self.oracle.evaluate_value_against_constraints(
+                "c1", mutated_value
+            )
         if oracle_result is None:
             return self.default_fitness
 
@@ -96,24 +118,25 @@ class fitness_fun(base_ff):
             if mutated_value is None:
                 return self.default_fitness
 
-            db_constraint_error = error_code == 3819
+            outcome["verdict"] = oracle_result[0][0]
 
-            if oracle_result[0][0] and db_constraint_error and bug_count < 15:
-                logger.warning(f"Potential bug found with query: {phenotype}")
-                bug_count += 1
-            elif (
-                not oracle_result[0][0]
-                and not db_constraint_error
-                and rows_affected > 0
-                and bug_count < 15
-            ):
-                logger.warning(f"Potential bug found with query: {phenotype}")
-                bug_count += 1
+            if is_disagreement(oracle_result[0][0], error_code, rows_affected):
+                outcome["bug"] = True
+                self.record_finding(
+                    logger,
+                    cycle_number,
+                    outcome,
+                    phenotype,
+                    "oracle",
+                    f"Potential bug found with query: {phenotype}",
+                    probe_error_code,
+                )
 
         except ValueError:
             return self.default_fitness
 
-        proximity = self.calculate_distance(mutated_value, constraint_value)
+        with timer("proximity"):
+            proximity = self.calculate_distance(mutated_value, constraint_value)
 
         # Final fitness calculation using the weighted formula
         fitness = self.calculate_final_fitness(
@@ -122,13 +145,63 @@ class fitness_fun(base_ff):
 
         return fitness
 
+    def record_finding(
+        self, logger, cycle_number, outcome, phenotype, kind, message, probe_errno=None
+    ):
+        # Store a potential bug under its signature, and log it only the first
+        # time the signature is seen
+        constraint = self.oracle.constraints[0] if self.oracle.constraints else {}
+        ddl = trackers.table_ddl
+        with timer("bug_store"):
+            signature, new = get_bug_store().record(
+                {
+                    "kind": kind,
+                    "column_type": constraint.get("data_type"),
+                    "operator": constraint.get("operator"),
+                    "math_function": constraint.get("math_ops"),
+                    "value_class": get_value_class(outcome["value"])[0],
+                    "errno": outcome["errno"],
+                    "probe_errno": probe_errno,
+                    "verdict": outcome["verdict"],
+                },
+                cycle_number,
+                phenotype,
+                ddl,
+            )
+        self.record_bug()
+
+        if new:
+            trackers.new_bugs.append((signature, phenotype, ddl))
+
+            if params["CONFIRM_BUGS"]:
+                get_bug_confirmer(logger).submit(
+                    signature, kind, phenotype, ddl, self.oracle
+                )
+            log_event(
+                logger,
+                "finding",
+                message,
+                logging.WARNING,
+                kind=kind,
+                signature=signature,
+                cycle=cycle_number,
+                query=phenotype,
+                value=outcome["value"],
+                errno=outcome["errno"],
+                probe_errno=probe_errno,
+                rowcount=outcome["rowcount"],
+                verdict=outcome["verdict"],
+            )
+
+    def record_bug(self):
+        # Count potential bugs and record when the first one of the run was found
+        trackers.bugs_found += 1
+        if trackers.first_bug_time is None:
+            trackers.first_bug_time = time.time()
+
     def extract_value(self, phenotype):
         # Extract the mutated value from the phenotype
-        pattern = r"\(\((.*?)\)\)"
-        match = re.search(pattern, phenotype)
-        if match:
-            return match.group(1)
-        return None
+        return extract_literal(phenotype)
 
     def calculate_distance(self, value, constraint_value):
         # Calculate the distance between the mutated value and the constraint value
@@ -0,0 +1,51 @@
+from fitness.base_ff_classes.base_ff import base_ff
+from fitness.base_ff_classes.moo_ff import moo_ff
+from fitness.fitness_fun import fitness_fun
+
+
+class fitness_fun_moo(fitness_fun):
+    """
+    Multi-objective variant of fitness_fun. Rather than collapsing the
+    fitness components into a hand-weighted sum, each statement is given
+    the vector [proximity, error diversity, constraint trigger, execution
+    time], to be used with NSGA-II, e.g.:
+
+        --fitness_function fitness_fun_moo --selection nsga2_selection
+        --replacement nsga2_replacement
+
+    Each objective is optimised in the same direction as its term in the
+    weighted sum of fitness_fun, so the optimum of the weighted sum for any
+    choice of weights lies on the first front.
+    """
+
+    multi_objective = True
+
+    def __init__(self):
+        super().__init__()
+
+        # One objective per fitness component, in the order returned by
+        # calculate_final_fitness.
+        self.fitness_functions = []
+        for maximise in [False, False, False, True]:
+            objective = base_ff()
+            objective.maximise = maximise
+            self.fitness_functions.append(objective)
+        self.num_obj = len(self.fitness_functions)
+
+        # Statements which cannot be scored are worst on every objective.
+        self.default_fitness = [self.default_fitness, 1, 1, 0]
+
+    def calculate_distance(self, value, constraint_value):
+        # A distance which cannot be computed is the worst proximity
+        distance = super().calculate_distance(value, constraint_value)
+        if distance is self.default_fitness:
+            return self.default_fitness[0]
+        return distance
+
+    def calculate_final_fitness(
+        self, proximity, error_diversity, constraint_trigger, execution_time
+    ):
+        # Keep the fitness components apart as separate objectives
+        return [proximity, error_diversity, constraint_trigger, execution_time]
+
+    value = staticmethod(moo_ff.value)
@@ -0,0 +1,333 @@
+"""Boundary-value seeding of the initial population.
+
+Rather than waiting for evolution to find the edges of the table's check
+constraints, candidate values are derived analytically from each constraint
+parsed by the constraint oracle: the constraint value itself, its neighbours
+one unit and one ulp away, rounding edges, the limits of the column type,
+zero-padded numbers, strings which MySQL truncates to a number (e.g. '5a5')
+and LIKE wildcards. Each candidate is written as an INSERT or UPDATE
+statement and reverse-mapped into a genome through the BNF grammar, so that
+part of the first generation already sits on the boundary."""
+
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from math import floor, nextafter
+
+import numpy as np
+from algorithm.parameters import params
+from constraint_oracle import is_number
+from representation.individual import Individual
+from utilities.representation.check_methods import generate_codon
+
+STATEMENTS = ["INSERT INTO t1 (c1) VALUES ((%s));",
+              "UPDATE t1 SET c1 = ((%s)) WHERE id = 1;"]
+# Statement templates matching the phenotypes of queries_SQL.bnf.
+
+NUMBER_WIDTHS = [1, 2, 3, 6, 10]
+# Numbers of digits the grammar can produce in each part of a number, see
+# <digits>. Numbers are padded with zeros to the next width.
+
+ULP = Decimal(10) ** -NUMBER_WIDTHS[-1]
+# The smallest step between the numbers the grammar can produce.
+
+TYPE_LIMITS = {
+    "int": ["-2147483648", "2147483647"],
+    "float": ["-9999999999.9999999999", "9999999999.9999999999"],
+    "double": ["-9999999999.9999999999", "9999999999.9999999999"],
+    "decimal": ["-9999999999.9999999999", "9999999999.9999999999"]}
+# Limits of each column type. The limits of floating point types lie far
+# beyond the numbers the grammar can produce, so the largest of those is used.
+
+
+def get_boundary_seeds(constraints, size):
+    """
+    Derive boundary and type-edge candidates from a list of check
+    constraints and reverse-map them into individuals. Candidates which the
+    grammar cannot produce are skipped. Candidates closest to each boundary
+    come first, constraints take turns and the two statement types
+    alternate, so that no value is inserted twice.
+
+    :param constraints: A list of constraints, as parsed by
+    constraint_oracle.ConstraintOracle.
+    :param size: The maximum number of individuals to return.
+    :return: A list of seed individuals.
+    """
+
+    # Interleave the candidates of each constraint, best first.
+    queues = [get_candidate_values(constraint) for constraint in constraints]
+    candidates = []
+    for i in range(max([len(queue) for queue in queues], default=0)):
+        candidates.extend([queue[i] for queue in queues if i < len(queue)])
+
+    seeds, seen = [], set()
+
+    for value in candidates:
+        if len(seeds) >= size:
+            break
+
+        elif value in seen:
+            continue
+
+        seen.add(value)
+
+        phenotype = STATEMENTS[len(seeds) % len(STATEMENTS)] % value
+        genome = reverse_map(phenotype)
+
+        if genome is not None:
+            seeds.append(Individual(genome, None))
+
+    return seeds
+
+
+def get_candidate_values(constraint):
+    """
+    Return the candidate values for a single check constraint, written as
+    they appear in a statement and ordered from the closest to the boundary
+    to the furthest.
+
+    :param constraint: A constraint, as parsed by
+    constraint_oracle.ConstraintOracle.
+    :return: A list of candidate values.
+    """
+
+    value, data_type = constraint["value"], constraint["data_type"]
+
+    if value is None:
+        # The constraint could not be evaluated, there is no boundary.
+        return []
+
+    value = str(value).strip("'\"")
+
+    if is_number(value):
+        candidates = [format_number(number) for number in
+                      get_numeric_candidates(Decimal(value), data_type)]
+
+        # Strings which MySQL truncates to a number near the boundary.
+        candidates.extend(get_numeric_prefix_strings(Decimal(value)))
+
+        # The boundary padded with leading zeros.
+        candidates.append(format_number(Decimal(value), widest=True))
+
+        # Booleans are stored as 1 and 0.
+        candidates.extend(["True", "False"])
+
+    else:
+        candidates = get_string_candidates(value, constraint["operator"])
+
+        # Strings without a numeric prefix are converted to 0 when compared
+        # with a number.
+        candidates.extend([format_number(number) for number in
+                           get_numeric_candidates(Decimal(0), data_type)])
+
+    return [candidate for candidate in candidates if candidate is not None]
+
+
+def get_numeric_candidates(value, data_type):
+    """
+    Return the numbers on and around a numeric boundary: the boundary
+    itself, its neighbours one ulp of the column type away, its neighbours
+    one unit away, the halves on which MySQL rounds to an integer, the
+    limits of the column type and the numbers just beyond them.
+
+    :param value: The constraint value, a Decimal.
+    :param data_type: The data type of the constrained column.
+    :return: A list of Decimals.
+    """
+
+    candidates = [value]
+
+    # One ulp either side of the boundary in the precision of the column,
+    # rounded away from the boundary to the digits the grammar can produce.
+    if data_type == "float":
+        boundary = np.float32(value)
+        below = float(np.nextafter(boundary, np.float32(-np.inf)))
+        above = float(np.nextafter(boundary, np.float32(np.inf)))
+
+    elif data_type != "int":
+        below = nextafter(float(value), -float("inf"))
+        above = nextafter(float(value), float("inf"))
+
+    if data_type != "int":
+        candidates.extend([
+            Decimal(repr(below)).quantize(ULP, rounding=ROUND_FLOOR),
+            Decimal(repr(above)).quantize(ULP, rounding=ROUND_CEILING)])
+
+    candidates.extend([value - 1, value + 1])
+
+    # The halves either side of the boundary round onto it or away from it.
+    candidates.extend([floor(value) - Decimal("0.5"),
+                       floor(value) + Decimal("0.5")])
+
+    for limit in TYPE_LIMITS.get(data_type, TYPE_LIMITS["int"]):
+        limit = Decimal(limit)
+        candidates.extend([limit, limit + Decimal(1).copy_sign(limit)])
+
+    candidates.append(Decimal(0))
+
+    return candidates
+
+
+def get_numeric_prefix_strings(value):
+    """
+    Return quoted strings with the same leading digits as the integers on
+    and either side of a numeric boundary, e.g. '5a5' for a boundary of 5.
+    MySQL truncates such strings to their numeric prefix.
+
+    :param value: The constraint value, a Decimal.
+    :return: A list of quoted strings.
+    """
+
+    strings = []
+
+    for number in [floor(value), floor(value) - 1, floor(value) + 1]:
+        prefix = str(number)
+        strings.extend(["'%sa'" % prefix, "'%sa%s'" % (prefix, prefix[-1])])
+
+    return strings
+
+
+def get_string_candidates(value, operator):
+    """
+    Return quoted strings on and around a string boundary: the boundary
+    itself, its neighbours in binary collation order, shorter and padded
+    versions of it, case variants and, for LIKE patterns, strings matching
+    the pattern and strings holding the wildcards as literal characters.
+
+    :param value: The constraint value.
+    :param operator: The operator of the constraint.
+    :return: A list of quoted strings.
+    """
+
+    strings = [value]
+
+    if value:
+        # The closest strings before and after the boundary.
+        strings.extend([value[:-1] + chr(ord(value[-1]) - 1),
+                        value[:-1] + chr(ord(value[-1]) + 1),
+                        value[:-1]])
+
+    # Padded strings, with the lowest and highest printable characters.
+    strings.extend([value + "!", value + "~", value + "a"])
+    strings.extend([value.swapcase(), value.upper(), value.lower()])
+
+    if operator.lower() == "like":
+        # Strings matching the pattern with the least and the most filled in.
+        strings.extend([value.replace("%", "").replace("_", "a"),
+                        value.replace("%", "ab").replace("_", "a")])
+
+    # Wildcards, which are only special to LIKE.
+    strings.extend(["%", "_", value + "%", value + "_"])
+
+    return ["'%s'" % string for string in strings if string]
+
+
+def format_number(number, widest=False):
+    """
+    Write a number the way the grammar produces numbers: with an explicit
+    sign and with the integer and fractional parts padded with zeros to a
+    width the grammar can produce.
+
+    :param number: A Decimal.
+    :param widest: Pad the integer part to the widest width rather than the
+    next one, e.g. +0000000005 rather than +5.
+    :return: The number as a string, or None if the grammar cannot produce
+    it.
+    """
+
+    integer, _, fraction = format(abs(number), "f").partition(".")
+
+    fraction = fraction.rstrip("0")[:NUMBER_WIDTHS[-1]]
+
+    integer = pad_digits(integer.lstrip("0") or "0", "rjust",
+                         NUMBER_WIDTHS[-1:] if widest else NUMBER_WIDTHS)
+    if integer is None:
+        return None
+
+    string = ("-" if number < 0 else "+") + integer
+
+    if fraction:
+        string += "." + pad_digits(fraction, "ljust", NUMBER_WIDTHS)
+
+    return string
+
+
+def pad_digits(digits, justify, widths):
+    """
+    Pad a string of digits with zeros to the next of a list of widths.
+
+    :param digits: A string of digits.
+    :param justify: "rjust" to pad on the left or "ljust" to pad on the right.
+    :param widths: A list of widths, in increasing order.
+    :return: The padded digits, or None if there are too many of them.
+    """
+
+    for width in widths:
+        if len(digits) <= width:
+            return getattr(digits, justify)(width, "0")
+
+    return None
+
+
+def reverse_map(phenotype):
+    """
+    Reverse-map a phenotype into a genome which the grammar maps back onto
+    exactly that phenotype. Derivations are searched top-down from the
+    start rule, with the derivations of each non-terminal from each
+    position of the phenotype memoised. A codon is produced for each
+    non-terminal expanded, in the order in which the genome mapper expands
+    them.
+
+    :param phenotype: A target phenotype string.
+    :return: A genome, or None if the grammar cannot produce the phenotype.
+    """
+
+    bnf_grammar = params['BNF_GRAMMAR']
+    derivations = {}
+
+    def derive(NT, start):
+        # Return a dictionary mapping each position of the phenotype up to
+        # which NT can be derived from start to the codons of a derivation.
+
+        if (NT, start) in derivations:
+            return derivations[(NT, start)]
+
+        # Guard against left recursion.
+        derivations[(NT, start)] = {}
+
+        ends = {}
+
+        for production in bnf_grammar.rules[NT]['choices']:
+            partial = {start: [generate_codon(NT, production['choice'])]}
+
+            for symbol in production['choice']:
+                extended = {}
+
+                for position, codons in partial.items():
+                    if symbol['type'] == "T":
+                        if phenotype.startswith(symbol['symbol'], position):
+                            extended.setdefault(
+                                position + len(symbol['symbol']), codons)
+
+                    else:
+                        for end, sub_codons in derive(symbol['symbol'],
+                                                      position).items():
+                            extended.setdefault(end, codons + sub_codons)
+
+                partial = extended
+
+                if not partial:
+                    break
+
+            for end, codons in partial.items():
+                ends.setdefault(end, codons)
+
+        derivations[(NT, start)] = ends
+
+        return ends
+
+    genome = derive(bnf_grammar.start_rule['symbol'], 0).get(len(phenotype))
+
+    if genome is None or Individual(genome, None).phenotype != phenotype:
+        # The phenotype can't be derived within the limits of the mapper.
+        return None
+
+    return genome
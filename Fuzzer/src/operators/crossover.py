@@ -1,10 +1,16 @@
 from random import choice, randint, random, sample
 
+import numpy as np
 from algorithm.parameters import params
 from representation import individual
 from representation.latent_tree import latent_tree_crossover, \
     latent_tree_repair
+from utilities.algorithm.general import get_rng
+from utilities.algorithm.operator_scheduler import choose_operator, \
+    tag_crossover
 from utilities.representation.check_methods import check_ind
+from utilities.representation.genome_matrix import get_used_lengths, \
+    pack_genomes, splice_genomes, unpack_genomes
 
 
 def crossover(parents):
@@ -19,6 +25,11 @@ def crossover(parents):
     :return: A population of fully crossed over individuals.
     """
 
+    if params['BATCH_VARIATION'] and not params['ADAPTIVE_OPERATORS'] and \
+            hasattr(params['CROSSOVER'], "batch"):
+        # Cross over all pairs of parents at once over a genome matrix.
+        return batch_crossover(parents)
+
     # Initialise an empty population.
     cross_pop = []
 
@@ -42,6 +53,87 @@ def crossover(parents):
     return cross_pop
 
 
+def batch_crossover(parents):
+    """
+    Perform linear crossover on a population of individuals at once. All
+    pairs of parents are drawn up front, the genomes of the parent
+    population are packed into a padded genome matrix, and the crossover
+    operator specified in the params dictionary describes each child as a
+    set of slices of its parents' genomes. Children are then built from the
+    matrix with array operations. Only pairs whose children violate
+    specified limits are re-done one by one.
+
+    :param parents: A population of parent individuals on which crossover is
+    to be performed.
+    :return: A population of fully crossed over individuals.
+    """
+
+    rng = get_rng()
+
+    # Each pair of parents generates two children.
+    n_pairs = -(-params['GENERATION_SIZE'] // 2)
+
+    # Randomly choose two distinct parents for each pair.
+    idx_0 = rng.integers(0, len(parents), n_pairs)
+    idx_1 = rng.integers(0, len(parents) - 1, n_pairs)
+    idx_1 += idx_1 >= idx_0
+
+    # Crossover cannot be performed on invalid individuals.
+    if not params['INVALID_SELECTION'] and \
+            any(parents[i].invalid for i in np.concatenate([idx_0, idx_1])):
+        s = "operators.crossover.crossover\nError: invalid individuals " \
+            "selected for crossover."
+        raise Exception(s)
+
+    # Pack all parent genomes into a single matrix.
+    matrix, lengths = pack_genomes(parents)
+    max_p = np.maximum(get_used_lengths(parents, lengths), 1)
+
+    # Get the slices which make up each child.
+    children = params['CROSSOVER'].batch(idx_0, idx_1, max_p, lengths, rng)
+    n_segments = max(len(child) for child in children)
+    rows, starts, stops = (np.zeros((n_pairs, 2, n_segments), dtype=np.int64)
+                           for _ in range(3))
+
+    for c, child in enumerate(children):
+        for j, (seg_rows, seg_starts, seg_stops) in enumerate(child):
+            rows[:, c, j] = seg_rows
+            starts[:, c, j] = seg_starts
+            stops[:, c, j] = seg_stops
+
+    # Pairs which are not crossed over produce copies of their parents.
+    copies = rng.random(n_pairs) >= params['CROSSOVER_PROBABILITY']
+    rows[copies, :, 0] = np.stack([idx_0, idx_1], axis=1)[copies]
+    starts[copies] = 0
+    stops[copies] = 0
+    stops[copies, :, 0] = lengths[rows[copies, :, 0]]
+
+    # Build all children from slices of the parent matrix.
+    new_matrix, new_lengths = splice_genomes(
+        matrix, lengths, *(a.reshape(2 * n_pairs, n_segments) for a in
+                           (rows, starts, stops)))
+    genomes = unpack_genomes(new_matrix, new_lengths)
+
+    # Initialise an empty population.
+    cross_pop = []
+
+    for p in range(n_pairs):
+        # Put the new chromosomes into new individuals.
+        inds_out = [individual.Individual(genomes[2 * p], None),
+                    individual.Individual(genomes[2 * p + 1], None)]
+
+        while inds_out is None or \
+                any(check_ind(ind, "crossover") for ind in inds_out):
+            # An individual violates a limit. Redo crossover on a new pair.
+            inds_in = sample(parents, 2)
+            inds_out = crossover_inds(inds_in[0], inds_in[1])
+
+        # Extend the new population.
+        cross_pop.extend(inds_out)
+
+    return cross_pop
+
+
 def crossover_inds(parent_0, parent_1):
     """
     Perform crossover on two selected individuals.
@@ -63,8 +155,16 @@ def crossover_inds(parent_0, parent_1):
             "selected for crossover."
         raise Exception(s)
 
-    # Perform crossover on ind_0 and ind_1.
-    inds = params['CROSSOVER'](ind_0, ind_1)
+    if params['ADAPTIVE_OPERATORS']:
+        # Perform crossover on ind_0 and ind_1 with an operator chosen by
+        # the operator scheduler.
+        name = choose_operator("crossover")
+        inds = globals()[name](ind_0, ind_1)
+        tag_crossover(inds, name, [parent_0, parent_1])
+
+    else:
+        # Perform crossover on ind_0 and ind_1.
+        inds = params['CROSSOVER'](ind_0, ind_1)
 
     # Check each individual is ok (i.e. does not violate specified limits).
     checks = [check_ind(ind, "crossover") for ind in inds]
@@ -115,6 +215,29 @@ def variable_onepoint(p_0, p_1):
     return [ind_0, ind_1]
 
 
+def variable_onepoint_batch(idx_0, idx_1, max_p, lengths, rng):
+    """
+    Array equivalent of variable_onepoint. Describes the two children of
+    each pair of parents as slices of the parent genomes.
+
+    :param idx_0: A vector of indices of parent 0 of each pair.
+    :param idx_1: A vector of indices of parent 1 of each pair.
+    :param max_p: A vector of the maximum genome index of every parent.
+    :param lengths: A vector of the genome length of every parent.
+    :param rng: A numpy.random.Generator instance.
+    :return: A list of the (rows, starts, stops) slices of each child.
+    """
+
+    # Select unique points on each genome for crossover to occur.
+    pt_0 = rng.integers(1, max_p[idx_0] + 1)
+    pt_1 = rng.integers(1, max_p[idx_1] + 1)
+
+    c_0 = [(idx_0, 0, pt_0), (idx_1, pt_1, lengths[idx_1])]
+    c_1 = [(idx_1, 0, pt_1), (idx_0, pt_0, lengths[idx_0])]
+
+    return [c_0, c_1]
+
+
 def fixed_onepoint(p_0, p_1):
     """
     Given two individuals, create two children using one-point crossover and
@@ -151,6 +274,28 @@ def fixed_onepoint(p_0, p_1):
     return [ind_0, ind_1]
 
 
+def fixed_onepoint_batch(idx_0, idx_1, max_p, lengths, rng):
+    """
+    Array equivalent of fixed_onepoint. Describes the two children of each
+    pair of parents as slices of the parent genomes.
+
+    :param idx_0: A vector of indices of parent 0 of each pair.
+    :param idx_1: A vector of indices of parent 1 of each pair.
+    :param max_p: A vector of the maximum genome index of every parent.
+    :param lengths: A vector of the genome length of every parent.
+    :param rng: A numpy.random.Generator instance.
+    :return: A list of the (rows, starts, stops) slices of each child.
+    """
+
+    # Select the same point on both genomes for crossover to occur.
+    pt = rng.integers(1, np.minimum(max_p[idx_0], max_p[idx_1]) + 1)
+
+    c_0 = [(idx_0, 0, pt), (idx_1, pt, lengths[idx_1])]
+    c_1 = [(idx_1, 0, pt), (idx_0, pt, lengths[idx_0])]
+
+    return [c_0, c_1]
+
+
 def fixed_twopoint(p_0, p_1):
     """
     Given two individuals, create two children using two-point crossover and
@@ -187,6 +332,32 @@ def fixed_twopoint(p_0, p_1):
     return [ind_0, ind_1]
 
 
+def fixed_twopoint_batch(idx_0, idx_1, max_p, lengths, rng):
+    """
+    Array equivalent of fixed_twopoint. Describes the two children of each
+    pair of parents as slices of the parent genomes.
+
+    :param idx_0: A vector of indices of parent 0 of each pair.
+    :param idx_1: A vector of indices of parent 1 of each pair.
+    :param max_p: A vector of the maximum genome index of every parent.
+    :param lengths: A vector of the genome length of every parent.
+    :param rng: A numpy.random.Generator instance.
+    :return: A list of the (rows, starts, stops) slices of each child.
+    """
+
+    # Select the same points on both genomes for crossover to occur.
+    a = rng.integers(1, max_p[idx_0] + 1)
+    b = rng.integers(1, max_p[idx_1] + 1)
+    pt_0, pt_1 = np.minimum(a, b), np.maximum(a, b)
+
+    c_0 = [(idx_0, 0, pt_0), (idx_1, pt_0, pt_1),
+           (idx_0, pt_1, lengths[idx_0])]
+    c_1 = [(idx_1, 0, pt_0), (idx_0, pt_0, pt_1),
+           (idx_1, pt_1, lengths[idx_1])]
+
+    return [c_0, c_1]
+
+
 def variable_twopoint(p_0, p_1):
     """
     Given two individuals, create two children using two-point crossover and
@@ -225,6 +396,35 @@ def variable_twopoint(p_0, p_1):
     return [ind_0, ind_1]
 
 
+def variable_twopoint_batch(idx_0, idx_1, max_p, lengths, rng):
+    """
+    Array equivalent of variable_twopoint. Describes the two children of
+    each pair of parents as slices of the parent genomes.
+
+    :param idx_0: A vector of indices of parent 0 of each pair.
+    :param idx_1: A vector of indices of parent 1 of each pair.
+    :param max_p: A vector of the maximum genome index of every parent.
+    :param lengths: A vector of the genome length of every parent.
+    :param rng: A numpy.random.Generator instance.
+    :return: A list of the (rows, starts, stops) slices of each child.
+    """
+
+    max_p_0, max_p_1 = max_p[idx_0], max_p[idx_1]
+
+    # Select the points on both genomes for crossover to occur.
+    a_0, b_0 = rng.integers(1, max_p_0 + 1), rng.integers(1, max_p_1 + 1)
+    a_1, b_1 = rng.integers(1, max_p_0 + 1), rng.integers(1, max_p_1 + 1)
+    pt_0, pt_1 = np.minimum(a_0, b_0), np.maximum(a_0, b_0)
+    pt_2, pt_3 = np.minimum(a_1, b_1), np.maximum(a_1, b_1)
+
+    c_0 = [(idx_0, 0, pt_0), (idx_1, pt_2, pt_3),
+           (idx_0, pt_1, lengths[idx_0])]
+    c_1 = [(idx_1, 0, pt_2), (idx_0, pt_0, pt_1),
+           (idx_1, pt_3, lengths[idx_1])]
+
+    return [c_0, c_1]
+
+
 def subtree(p_0, p_1):
     """
     Given two individuals, create two children using subtree crossover and
@@ -471,3 +671,9 @@ variable_twopoint.representation = "linear"
 fixed_twopoint.representation = "linear"
 subtree.representation = "subtree"
 LTGE_crossover.representation = "latent tree"
+
+# Set array equivalents of linear operators for batch crossover.
+variable_onepoint.batch = variable_onepoint_batch
+fixed_onepoint.batch = fixed_onepoint_batch
+variable_twopoint.batch = variable_twopoint_batch
+fixed_twopoint.batch = fixed_twopoint_batch
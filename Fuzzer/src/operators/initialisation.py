@@ -1,10 +1,12 @@
+from functools import partial
 from math import floor
 from os import getcwd, listdir, path
 from random import randint, shuffle
 
 from algorithm.parameters import params
 from representation import individual
-from representation.derivation import generate_tree, pi_grow
+from representation.derivation import generate_tree, pi_grow, \
+    uniform_derivation
 from representation.individual import Individual
 from representation.latent_tree import latent_tree_random_ind
 from representation.tree import Tree
@@ -208,18 +210,25 @@ def rhh(size):
         times = int(floor((size / 2) / len(depths)))
         remainder = int(size / 2 - (times * len(depths)))
 
+        if params["UNIFORM_INIT"]:
+            # Sample "Grow" trees uniformly up to each depth and "Full"
+            # trees uniformly from those of exactly each depth.
+            grow, full = "uniform", "uniform_full"
+        else:
+            grow, full = "random", "full"
+
         # Iterate over depths.
         for depth in depths:
             # Iterate over number of required individuals per depth.
             for i in range(times):
                 # Generate individual using "Grow"
-                ind = generate_ind_tree(depth, "random")
+                ind = generate_ind_tree(depth, grow)
 
                 # Append individual to population
                 population.append(ind)
 
                 # Generate individual using "Full"
-                ind = generate_ind_tree(depth, "full")
+                ind = generate_ind_tree(depth, full)
 
                 # Append individual to population
                 population.append(ind)
@@ -234,13 +243,13 @@ def rhh(size):
             depth = depths.pop()
 
             # Generate individual using "Grow"
-            ind = generate_ind_tree(depth, "random")
+            ind = generate_ind_tree(depth, grow)
 
             # Append individual to population
             population.append(ind)
 
             # Generate individual using "Full"
-            ind = generate_ind_tree(depth, "full")
+            ind = generate_ind_tree(depth, full)
 
             # Append individual to population
             population.append(ind)
@@ -290,12 +299,18 @@ def PI_grow(size):
         times = int(floor(size / len(depths)))
         remainder = int(size - (times * len(depths)))
 
+        if params["UNIFORM_INIT"]:
+            # Sample trees uniformly from those of exactly each depth.
+            generate = partial(generate_ind_tree, method="uniform_full")
+        else:
+            generate = generate_PI_ind_tree
+
         # Iterate over depths.
         for depth in depths:
             # Iterate over number of required individuals per depth.
             for i in range(times):
                 # Generate individual using "Grow"
-                ind = generate_PI_ind_tree(depth)
+                ind = generate(depth)
 
                 # Append individual to population
                 population.append(ind)
@@ -310,7 +325,7 @@ def PI_grow(size):
             depth = depths.pop()
 
             # Generate individual using "Grow"
-            ind = generate_PI_ind_tree(depth)
+            ind = generate(depth)
 
             # Append individual to population
             population.append(ind)
@@ -330,10 +345,24 @@ def generate_ind_tree(max_depth, method):
     # Initialise an instance of the tree class
     ind_tree = Tree(str(params["BNF_GRAMMAR"].start_rule["symbol"]), None)
 
-    # Generate a tree
-    genome, output, nodes, _, depth = generate_tree(
-        ind_tree, [], [], method, 0, 0, 0, max_depth
-    )
+    if method in ("uniform", "uniform_full"):
+        # Sample a tree uniformly from all trees up to (or, for
+        # "uniform_full", of exactly) the maximum depth. The root node
+        # itself takes up one level of the tree.
+        budget = max_depth - 1
+        exact = method == "uniform_full" and \
+            params["BNF_GRAMMAR"].count_depth_trees(
+                ind_tree.root, budget) > 0
+
+        genome, output, nodes, _, depth = uniform_derivation(
+            ind_tree, [], [], 0, 0, 0, budget, exact
+        )
+
+    else:
+        # Generate a tree
+        genome, output, nodes, _, depth = generate_tree(
+            ind_tree, [], [], method, 0, 0, 0, max_depth
+        )
 
     # Get remaining individual information
     phenotype, invalid, used_cod = "".join(output), False, len(genome)
@@ -1,10 +1,16 @@
 from random import choice, randint, random
 
+import numpy as np
 from algorithm.parameters import params
 from representation import individual
 from representation.derivation import generate_tree
 from representation.latent_tree import latent_tree_mutate, latent_tree_repair
+from utilities.algorithm.general import get_rng
+from utilities.algorithm.operator_scheduler import choose_operator, \
+    tag_mutation
 from utilities.representation.check_methods import check_ind
+from utilities.representation.genome_matrix import get_used_lengths, \
+    pack_genomes, unpack_genomes
 
 
 def mutation(pop):
@@ -16,6 +22,11 @@ def mutation(pop):
     :return: A fully mutated population.
     """
 
+    if params["BATCH_VARIATION"] and not params["ADAPTIVE_OPERATORS"] and \
+            hasattr(params["MUTATION"], "batch"):
+        # Mutate the whole population at once over a genome matrix.
+        return batch_mutation(pop)
+
     # Initialise empty pop for mutated individuals.
     new_pop = []
 
@@ -27,7 +38,7 @@ def mutation(pop):
 
         else:
             # Perform mutation.
-            new_ind = params["MUTATION"](ind)
+            new_ind = mutate_ind(ind)
 
         # Check ind does not violate specified limits.
         check = check_ind(new_ind, "mutation")
@@ -41,7 +52,7 @@ def mutation(pop):
 
             else:
                 # Perform mutation.
-                new_ind = params["MUTATION"](ind)
+                new_ind = mutate_ind(ind)
 
             # Check ind does not violate specified limits.
             check = check_ind(new_ind, "mutation")
@@ -52,6 +63,78 @@ def mutation(pop):
     return new_pop
 
 
+def mutate_ind(ind):
+    """
+    Perform mutation on a single individual. Calls mutation operator as
+    specified in params dictionary, or one chosen by the operator scheduler
+    if params['ADAPTIVE_OPERATORS'] is specified.
+
+    :param ind: An individual to be mutated.
+    :return: A mutated individual.
+    """
+
+    if params["ADAPTIVE_OPERATORS"]:
+        name = choose_operator("mutation")
+        new_ind = globals()[name](ind)
+        tag_mutation(new_ind, name, ind)
+        return new_ind
+
+    return params["MUTATION"](ind)
+
+
+def batch_mutation(pop):
+    """
+    Perform linear mutation on an entire population of individuals at once.
+    The genomes of the population are packed into a padded genome matrix
+    and the mutation operator specified in the params dictionary is applied
+    to the whole matrix with array operations. Only individuals which
+    violate specified limits after mutation are re-mutated one by one.
+
+    :param pop: A population of individuals to be mutated.
+    :return: A fully mutated population.
+    """
+
+    # Pack all genomes into a single matrix.
+    matrix, lengths = pack_genomes(pop)
+    eff_lengths = get_used_lengths(pop, lengths)
+
+    # Mutate the entire matrix in place.
+    params["MUTATION"].batch(matrix, eff_lengths, get_rng())
+
+    # Initialise empty pop for mutated individuals.
+    new_pop = []
+
+    for ind, genome, eff_length in zip(pop, unpack_genomes(matrix, lengths),
+                                       eff_lengths):
+        if not ind.genome and params["NO_MUTATION_INVALIDS"]:
+            # If individual has no genome, default to subtree mutation.
+            new_ind = subtree(ind)
+
+        elif not eff_length:
+            # Linear mutation cannot be performed on this individual.
+            new_ind = ind
+
+        else:
+            # Re-build a new individual with the mutated genome.
+            new_ind = individual.Individual(genome, None)
+
+        while check_ind(new_ind, "mutation"):
+            # Perform mutation until the individual passes all tests.
+
+            # If individual has no genome, default to subtree mutation.
+            if not ind.genome and params["NO_MUTATION_INVALIDS"]:
+                new_ind = subtree(ind)
+
+            else:
+                # Perform mutation.
+                new_ind = params["MUTATION"](ind)
+
+        # Append mutated individual to population.
+        new_pop.append(new_ind)
+
+    return new_pop
+
+
 def int_flip_per_codon(ind):
     """
     Mutate the genome of an individual by randomly choosing a new int with
@@ -89,6 +172,33 @@ def int_flip_per_codon(ind):
     return new_ind
 
 
+def int_flip_per_codon_batch(matrix, eff_lengths, rng):
+    """
+    Array equivalent of int_flip_per_codon. Mutates every codon within the
+    effective length of each genome in a genome matrix with probability
+    p_mut.
+
+    :param matrix: A zero-padded matrix of genomes, mutated in place.
+    :param eff_lengths: A vector of effective genome lengths.
+    :param rng: A numpy.random.Generator instance.
+    :return: Nothing.
+    """
+
+    # Set mutation probability for each genome.
+    if params["MUTATION_PROBABILITY"] is not None:
+        p_mut = np.full(len(eff_lengths), params["MUTATION_PROBABILITY"])
+    else:
+        # Default is 1 divided by genome length.
+        p_mut = 1.0 / np.maximum(eff_lengths, 1)
+
+    # Only mutate codons within the effective length of each genome.
+    in_range = np.arange(matrix.shape[1])[None, :] < eff_lengths[:, None]
+    mask = in_range & (rng.random(matrix.shape) < p_mut[:, None])
+
+    matrix[mask] = rng.integers(0, params["CODON_SIZE"] + 1,
+                                size=np.count_nonzero(mask))
+
+
 def int_flip_per_ind(ind):
     """
     Mutate the genome of an individual by randomly choosing a new int with
@@ -119,6 +229,29 @@ def int_flip_per_ind(ind):
     return new_ind
 
 
+def int_flip_per_ind_batch(matrix, eff_lengths, rng):
+    """
+    Array equivalent of int_flip_per_ind. Performs params['MUTATION_EVENTS']
+    codon flips within the effective length of each genome in a genome
+    matrix.
+
+    :param matrix: A zero-padded matrix of genomes, mutated in place.
+    :param eff_lengths: A vector of effective genome lengths.
+    :param rng: A numpy.random.Generator instance.
+    :return: Nothing.
+    """
+
+    # Linear mutation cannot be performed on empty genomes.
+    rows = np.flatnonzero(eff_lengths)
+
+    # Pick MUTATION_EVENTS codon indices within each effective length.
+    shape = (len(rows), params["MUTATION_EVENTS"])
+    idx = (rng.random(shape) * eff_lengths[rows, None]).astype(np.int64)
+
+    matrix[rows[:, None], idx] = rng.integers(0, params["CODON_SIZE"] + 1,
+                                              size=shape)
+
+
 def subtree(ind):
     """
     Mutate the individual by replacing a randomly selected subtree with a
@@ -238,3 +371,7 @@ int_flip_per_codon.representation = "linear"
 int_flip_per_ind.representation = "linear"
 subtree.representation = "subtree"
 LTGE_mutation.representation = "latent tree"
+
+# Set array equivalents of linear operators for batch mutation.
+int_flip_per_codon.batch = int_flip_per_codon_batch
+int_flip_per_ind.batch = int_flip_per_ind_batch
@@ -4,6 +4,8 @@ from operators.crossover import crossover_inds
 from operators.mutation import mutation
 from operators.selection import selection
 from utilities.algorithm.NSGA2 import compute_pareto_metrics
+from utilities.algorithm.ranking import get_fitness_scores, get_rank_key, \
+    get_tie_breaks, record_best, top_indices
 
 
 def replacement(new_pop, old_pop):
@@ -32,18 +34,37 @@ def generational(new_pop, old_pop):
     :return: The 'POPULATION_SIZE' new population with elites.
     """
 
-    # Sort both populations.
-    old_pop.sort(reverse=True)
-    new_pop.sort(reverse=True)
+    # Get the fitness scores of both populations.
+    old_scores = get_fitness_scores(old_pop)
+    new_scores = get_fitness_scores(new_pop)
+    old_ties = get_tie_breaks(old_pop)
+    new_ties = get_tie_breaks(new_pop)
 
-    # Append the best ELITE_SIZE individuals from the old population to the
-    # new population.
-    for ind in old_pop[:params['ELITE_SIZE']]:
-        new_pop.insert(0, ind)
+    # Find the best ELITE_SIZE individuals from the old population. Only
+    # the elites are sorted, not the entire population.
+    elites = top_indices(old_scores, params['ELITE_SIZE'], old_ties)
 
-    # Return the top POPULATION_SIZE individuals of the new pop, including
-    # elites.
-    return new_pop[:params['POPULATION_SIZE']]
+    # Find the best individuals from the new population to fill the
+    # remainder of the POPULATION_SIZE new pop.
+    survivors = top_indices(new_scores,
+                            max(params['POPULATION_SIZE'] - len(elites), 0),
+                            new_ties)
+
+    # Combine the elites with the new population.
+    individuals = [old_pop[i] for i in elites] + \
+                  [new_pop[i] for i in survivors]
+
+    # Both index lists are sorted best first, so the best individual of the
+    # new pop is at the head of one of them. Record it for the stats.
+    if len(elites) and (not len(survivors) or
+                        get_rank_key(old_scores, old_ties, elites[0]) >=
+                        get_rank_key(new_scores, new_ties, survivors[0])):
+        record_best(individuals, old_pop[elites[0]])
+
+    elif len(survivors):
+        record_best(individuals, new_pop[survivors[0]])
+
+    return individuals
 
 
 def steady_state(individuals):
@@ -103,6 +124,28 @@ def steady_state(individuals):
     return total_pop
 
 
+def steady_state_offspring(individuals):
+    """
+    Breed a single pair of offspring for steady state replacement: select
+    parents from the population, perform crossover on them and mutate the
+    children. Crossover is repeated on new parents until it succeeds.
+
+    :param individuals: The current population.
+    :return: A list of two new, unevaluated individuals.
+    """
+
+    while True:
+        # Select parents from the original population.
+        parents = selection(individuals)
+
+        # Perform crossover on selected parents.
+        cross_pop = crossover_inds(parents[0], parents[1])
+
+        if cross_pop is not None:
+            # Mutate the new population.
+            return mutation(cross_pop)
+
+
 def nsga2_replacement(new_pop, old_pop):
     """
     Replaces the old population with the new population using NSGA-II
@@ -1,10 +1,14 @@
 from random import sample
 
+import numpy as np
 from algorithm.parameters import params
+from utilities.algorithm.general import get_rng
 from utilities.algorithm.NSGA2 import (
     compute_pareto_metrics,
     crowded_comparison_operator,
 )
+from utilities.algorithm.ranking import get_fitness_scores, get_tie_breaks, \
+    top_indices
 
 
 def selection(population):
@@ -23,31 +27,91 @@ def tournament(population):
     """
     Given an entire population, draw <tournament_size> competitors randomly and
     return the best. Only valid individuals can be selected for tournaments.
+    All tournaments are drawn at once as a matrix of competitor indices and
+    decided over a vector of fitness scores.
 
     :param population: A population from which to select individuals.
     :return: A population of the winners from tournaments.
     """
 
-    # Initialise list of tournament winners.
-    winners = []
-
     # The flag "INVALID_SELECTION" allows for selection of invalid individuals.
     if params["INVALID_SELECTION"]:
         available = population
     else:
         available = [i for i in population if not i.invalid]
 
-    while len(winners) < params["GENERATION_SIZE"]:
-        # Randomly choose TOURNAMENT_SIZE competitors from the given
-        # population. Allows for re-sampling of individuals.
-        competitors = sample(available, params["TOURNAMENT_SIZE"])
+    # Get the fitness scores of all available individuals.
+    scores = get_fitness_scores(available)
 
-        # Return the single best competitor.
-        winners.append(max(competitors))
+    # Find the winners of all tournaments.
+    winners = tournament_indices(
+        scores,
+        params["GENERATION_SIZE"],
+        params["TOURNAMENT_SIZE"],
+        get_rng(),
+        get_tie_breaks(available),
+    )
 
     # Return the population of tournament winners.
-    #print("winner -_>", (winners[0]))
-    return winners
+    return [available[i] for i in winners]
+
+
+def tournament_indices(scores, n_winners, tournament_size, rng, ties=None):
+    """
+    Run <n_winners> tournaments of <tournament_size> competitors each over a
+    vector of fitness scores. Competitors are drawn without replacement
+    within a tournament (individuals can win multiple tournaments). The
+    first competitor with the best score wins each tournament, where equal
+    scores are ranked on their tie breaks if any are given.
+
+    :param scores: A vector of fitness scores, where larger is better.
+    :param n_winners: The number of tournaments to run.
+    :param tournament_size: The number of competitors in each tournament.
+    :param rng: A numpy.random.Generator instance.
+    :param ties: A vector of tie breaks, as returned by
+    utilities.algorithm.ranking.get_tie_breaks.
+    :return: A vector of the indices of the winners of each tournament.
+    """
+
+    n = len(scores)
+
+    if tournament_size > n:
+        s = (
+            "operators.selection.tournament_indices\n"
+            "Error: tournament size %d is larger than the number of "
+            "available individuals (%d)." % (tournament_size, n)
+        )
+        raise Exception(s)
+
+    if tournament_size ** 2 < n:
+        # Competitors rarely collide. Draw with replacement and redraw any
+        # tournament which contains the same competitor twice.
+        competitors = rng.integers(0, n, (n_winners, tournament_size))
+        while True:
+            ordered = np.sort(competitors, axis=1)
+            clashes = np.flatnonzero((ordered[:, 1:] == ordered[:, :-1]).any(1))
+            if not clashes.size:
+                break
+            competitors[clashes] = rng.integers(
+                0, n, (len(clashes), tournament_size)
+            )
+
+    else:
+        # Draw a random permutation of the population for each tournament.
+        competitors = rng.random((n_winners, n)).argpartition(
+            tournament_size - 1, axis=1
+        )[:, :tournament_size]
+
+    # Return the single best competitor of each tournament.
+    competing = scores[competitors]
+    if ties is None:
+        best = competing.argmax(axis=1)
+    else:
+        # Rank the competitors with the best score on their tie breaks.
+        best = np.where(competing == competing.max(axis=1, keepdims=True),
+                        ties[competitors], -np.inf).argmax(axis=1)
+
+    return competitors[np.arange(n_winners), best]
 
 
 def truncation(population):
@@ -58,14 +122,15 @@ def truncation(population):
     :return: The best <proportion> of the given population.
     """
 
-    # Sort the original population.
-    population.sort(reverse=True)
-
     # Find the cutoff point for truncation.
     cutoff = int(len(population) * float(params["SELECTION_PROPORTION"]))
 
+    # Find the best <proportion> of the given population.
+    best = top_indices(get_fitness_scores(population), cutoff,
+                       get_tie_breaks(population))
+
     # Return the best <proportion> of the given population.
-    return population[:cutoff]
+    return [population[i] for i in best]
 
 
 def nsga2_selection(population):
@@ -1,14 +1,30 @@
-import io
 import json
+import logging
 import os
 import sys
+from multiprocessing import Process, Queue
+from queue import Empty
 
 from algorithm.parameters import params, set_params
 from mysql.connector import Error
 from stats.stats import get_stats
+from utilities.algorithm import islands
+from utilities.algorithm.command_line_parser import parse_cmd_args
+from utilities.stats import metrics, profiler, timers, trackers
+from utilities.stats.timers import timer
 
-from db.db_connector import connect_to_mysql, load_db_config, log_plain_message, logger
+from db.bug_store import get_bug_store
+from db.reducer import reduce_bugs
+from db.db_connector import (
+    connect_to_mysql,
+    create_database,
+    load_db_config,
+    log_event,
+    log_plain_message,
+    logger,
+)
 from db.solver import TableGrammar
+from db.trace import execute_statement, open_trace
 
 
 class DBFuzzer:
@@ -30,27 +46,45 @@ class DBFuzzer:
             logger.critical(f"Failed to connect to the database: {e}")
 
     def create_table(self):
-        create_table_sql = str(self.table_grammar.solve())
+        with timer("ddl"):
+            create_table_sql = str(self.table_grammar.solve())
         log_plain_message(logger, "_____________________________________________\n")
-        logger.info(
-            f"Cycle {self.cycle_number}: Creating table with SQL: \n\n{create_table_sql}\n"
+        log_event(
+            logger,
+            "ddl",
+            f"Cycle {self.cycle_number}: Creating table with SQL: \n\n{create_table_sql}\n",
+            cycle=self.cycle_number,
+            sql=create_table_sql,
         )
         try:
-            self.cursor.execute(create_table_sql)
+            execute_statement(self.cnx, self.cursor, create_table_sql)
             self.cnx.commit()
+            trackers.table_ddl = create_table_sql
+            if metrics.enabled:
+                metrics.record("ddl", "accepted")
         except Error as e:
-            logger.error(f"Failed to create the table: {e}")
+            if metrics.enabled:
+                metrics.record("ddl", "rejected")
+            log_event(
+                logger,
+                "ddl_error",
+                f"Failed to create the table: {e}",
+                logging.ERROR,
+                cycle=self.cycle_number,
+                sql=create_table_sql,
+                errno=e.errno,
+            )
             self.create_table()
 
     def first_insertion(self):
         insert_query = "INSERT INTO t1 (c1) VALUES (NULL);"
         try:
-            self.cursor.execute(insert_query)
+            execute_statement(self.cnx, self.cursor, insert_query)
             self.cnx.commit()
         except Error as e:
             logger.error(f"Failed to insert a row into the table: {e}")
         try:
-            self.cursor.execute(insert_query)
+            execute_statement(self.cnx, self.cursor, insert_query)
             self.cnx.commit()
         except Error as e:
             logger.error(f"Failed to insert a row into the table: {e}")
@@ -58,7 +92,7 @@ class DBFuzzer:
     def reset_db(self):
         reset_query = "DROP TABLE IF EXISTS t1;"
         try:
-            self.cursor.execute(reset_query)
+            execute_statement(self.cnx, self.cursor, reset_query)
             self.cnx.commit()
         except Error as e:
             logger.error(f"Failed to reset the database: {e}")
@@ -66,6 +100,9 @@ class DBFuzzer:
 
     def run_fuzzing_cycle(self):
         if self.cnx is not None:
+            log_event(logger, "cycle_start", cycle=self.cycle_number)
+            timers.start_cycle()
+            metrics.cycle = self.cycle_number
             self.reset_db()
             self.create_table()
             self.first_insertion()
@@ -76,28 +113,37 @@ class DBFuzzer:
             logger.error("No database connection is available.")
 
     def perform_operations(self):
-        set_params(sys.argv[1:])
+        with timer("setup"):
+            set_params(sys.argv[1:])
 
-        # Generate individuals without capturing their output
         individuals = params["SEARCH_LOOP"](
             self.cnx, self.cursor, logger, self.cycle_number
         )
 
-        # Prepare to capture only the output from get_stats
-        captured_output = io.StringIO()
-        original_stdout = sys.stdout  # Save the original stdout
+        # The final stats are logged rather than printed
+        with timer("stats"):
+            snapshot = get_stats(
+                individuals,
+                end=True,
+                sinks=[sink for sink in params["STATS_SINKS"] if sink != "print"],
+            )
 
-        try:
-            sys.stdout = captured_output  # Redirect stdout to the StringIO object
-            get_stats(individuals, end=True)  # Capture only the output from get_stats
-        finally:
-            sys.stdout = original_stdout  # Restore original stdout
+        logger.info(f"\nStatistics:\n{snapshot.format()}")
 
-        # Get the captured output from get_stats
-        stats_output = captured_output.getvalue()
+        if params["REDUCE_BUGS"]:
+            reduce_bugs(trackers.new_bugs, params["FITNESS_FUNCTION"].oracle, logger)
 
-        # Log the captured stats output
-        logger.info(f"\nStatistics:\n{stats_output}")
+        # Write the counters of the bugs found in this cycle.
+        get_bug_store().flush()
+
+        log_event(
+            logger,
+            "error_summary",
+            cycle=self.cycle_number,
+            evaluations=trackers.evaluations,
+            bugs=trackers.bugs_found,
+            errors={str(errno): n for errno, n in trackers.error_counts.items()},
+        )
 
     @staticmethod
     def save_params_to_file(params, filename):
@@ -111,19 +157,31 @@ class DBFuzzer:
         params.update(loaded_params)
 
 
-def main():
-    params_filename = "params.json"
+def run_cycles(params_filename, reports=None):
+    """
+    Run fuzzing cycles forever. If a reports queue is given, the report of
+    the current island is put on it after every cycle.
+    """
+    if params["METRICS_PORT"]:
+        port = params["METRICS_PORT"] + (islands.island.index if islands.island else 0)
+        try:
+            metrics.start_metrics_server(port)
+        except OSError as e:
+            logger.error(f"Failed to serve metrics on port {port}: {e}")
+
+    if params["TRACE"]:
+        open_trace()
 
-    # Save params to file once if not already done
-    if not os.path.exists(params_filename):
-        DBFuzzer.save_params_to_file(params, params_filename)
     cycle_number = 1
     while cycle_number > 0:
         try:
             DBFuzzer.load_params_from_file(params_filename)
             fuzzer = DBFuzzer()
             fuzzer.cycle_number = cycle_number
-            fuzzer.run_fuzzing_cycle()
+            with profiler.profile_cycle(cycle_number):
+                fuzzer.run_fuzzing_cycle()
+            if reports is not None:
+                reports.put(islands.get_island_report(cycle_number))
             cycle_number += 1
         except Exception as e:
             logger.error(f"An error occurred: {e}")
@@ -131,5 +189,80 @@ def main():
         # Optional: Sleep for a while before starting the next cycle
 
 
+def run_island(index, inboxes, reports, params_filename):
+    """
+    Run a single island of the island model in its own process, against its
+    own database schema.
+    """
+    config = load_db_config()
+    database = f"{config['database']}_island{index}"
+    if not create_database(config, database):
+        logger.critical(f"Island {index}: no database available, stopping.")
+        return
+
+    # Every connection opened by this process uses the island schema.
+    os.environ["DATABASE"] = database
+
+    islands.init_island(index, inboxes)
+    run_cycles(params_filename, reports)
+
+
+def run_islands(params_filename):
+    """
+    Run params["ISLANDS"] islands in parallel processes, and log a merged
+    report of their throughput and bug yield as the islands complete cycles.
+    """
+    n_islands = params["ISLANDS"]
+
+    # Each island can hold at most one migration from every other island.
+    inboxes = [Queue(maxsize=n_islands) for _ in range(n_islands)]
+    reports = Queue()
+
+    processes = [
+        Process(
+            target=run_island,
+            args=(i, inboxes, reports, params_filename),
+            daemon=True,
+        )
+        for i in range(n_islands)
+    ]
+    for process in processes:
+        process.start()
+
+    totals = {}
+    while any(process.is_alive() for process in processes):
+        try:
+            report = reports.get(timeout=10)
+        except Empty:
+            continue
+        islands.merge_island_reports(totals, report)
+        logger.info(
+            f"\nIsland {report['island']} completed cycle {report['cycle']}."
+            f"\nIsland report:\n{islands.format_island_reports(totals)}"
+        )
+
+    logger.critical("All islands have stopped.")
+
+
+def main():
+    params_filename = "params.json"
+
+    # Save params to file once if not already done
+    if not os.path.exists(params_filename):
+        DBFuzzer.save_params_to_file(params, params_filename)
+
+    # Command line arguments overwrite the parameters file.
+    DBFuzzer.load_params_from_file(params_filename)
+    params.update(parse_cmd_args(sys.argv[1:])[0])
+    timers.enabled = params["TIMERS"]
+    profiler.cycles = params["PROFILE"]
+    profiler.interval = params["PROFILE_INTERVAL"]
+
+    if params["ISLANDS"] > 1:
+        run_islands(params_filename)
+    else:
+        run_cycles(params_filename)
+
+
 if __name__ == "__main__":
     main()
@@ -87,6 +87,128 @@ def generate_tree(tree, genome, output, method, nodes, depth, max_depth,
     return genome, output, nodes, depth, max_depth
 
 
+def uniform_derivation(tree, genome, output, nodes, depth, max_depth,
+                       budget, exact):
+    """
+    Recursive function to derive a tree sampled uniformly at random from all
+    derivation trees rooted at the given node whose depth (not counting the
+    current node) is at most, or exactly, a given budget. Uses the memoised
+    tree counts of the grammar to weight each production choice by the
+    number of trees it leads to, so no sampled tree is ever rejected.
+
+    :param tree: An instance of the Tree class.
+    :param genome: The list of all codons in a tree.
+    :param output: The list of all terminal nodes in a subtree. This is
+    joined to become the phenotype.
+    :param nodes: The total number of nodes in the tree.
+    :param depth: The depth of the parent of the current node.
+    :param max_depth: The maximum depth of any node in the tree.
+    :param budget: The number of levels the subtree below the current node
+    may extend to.
+    :param exact: Whether the subtree must extend to exactly the budget.
+    :return: genome, output, nodes, depth, max_depth.
+    """
+
+    bnf_grammar = params['BNF_GRAMMAR']
+
+    # Increment nodes and depth, set depth of current node.
+    nodes += 1
+    depth += 1
+    tree.depth = depth
+
+    # Find the productions possible from the current root.
+    productions = bnf_grammar.rules[tree.root]
+
+    # Weight each production choice by the number of trees it leads to.
+    weights = [bnf_grammar.count_choice_trees(prod, budget) for prod in
+               productions['choices']]
+
+    if exact:
+        # Only count the trees which reach exactly the budget.
+        weights = [w - bnf_grammar.count_choice_trees(prod, budget - 1) for
+                   w, prod in zip(weights, productions['choices'])]
+
+    # Randomly pick a production choice and make a codon with it.
+    chosen_prod = productions['choices'][weighted_choice(weights)]
+    codon = generate_codon(chosen_prod, productions)
+
+    # Set the codon for the current node and append codon to the genome.
+    tree.codon = codon
+    genome.append(codon)
+
+    # Initialise empty list of children for current node.
+    tree.children = []
+
+    NT_kids = [sym['symbol'] for sym in chosen_prod['choice'] if
+               sym['type'] == "NT"]
+
+    # Set the budget of each non-terminal child.
+    budgets, exacts = [budget - 1] * len(NT_kids), [False] * len(NT_kids)
+
+    if exact and NT_kids:
+        # At least one child must reach exactly the remaining budget. Pick
+        # the first child that does, weighted by the number of trees where
+        # that child is the first to reach the remaining budget.
+        weights = []
+
+        for i, kid in enumerate(NT_kids):
+            weight = bnf_grammar.count_depth_trees(kid, budget - 1)
+            for other in NT_kids[:i]:
+                weight *= bnf_grammar.count_trees(other, budget - 2)
+            for other in NT_kids[i + 1:]:
+                weight *= bnf_grammar.count_trees(other, budget - 1)
+            weights.append(weight)
+
+        first = weighted_choice(weights)
+
+        # Children before the first one reaching the budget fall short of it.
+        budgets[:first] = [budget - 2] * first
+        exacts[first] = True
+
+    for symbol in chosen_prod['choice']:
+        # Iterate over all symbols in the chosen production.
+        tree.children.append(Tree(symbol["symbol"], tree))
+
+        if symbol["type"] == "T":
+            # Append the terminal to the output list.
+            output.append(symbol["symbol"])
+
+        elif symbol["type"] == "NT":
+            # recurse on the new node.
+            genome, output, nodes, d, max_depth = \
+                uniform_derivation(tree.children[-1], genome, output, nodes,
+                                   depth, max_depth, budgets.pop(0),
+                                   exacts.pop(0))
+
+    if not NT_kids:
+        # Then the branch terminates here
+        depth += 1
+        nodes += 1
+
+    if depth > max_depth:
+        # Set new maximum depth
+        max_depth = depth
+
+    return genome, output, nodes, depth, max_depth
+
+
+def weighted_choice(weights):
+    """
+    Pick an index at random with probability proportional to its weight.
+    Weights are exact (and possibly very large) integers.
+
+    :param weights: A list of non-negative integer weights.
+    :return: The chosen index.
+    """
+
+    pick = randrange(sum(weights))
+
+    for i, weight in enumerate(weights):
+        if pick < weight:
+            return i
+        pick -= weight
+
+
 def generate_codon(chosen_prod, productions):
     """
     Generate a single codon
@@ -1,9 +1,17 @@
+import pickle
+from hashlib import sha256
 from math import floor
+from os import getpid, makedirs, path, replace
 from re import DOTALL, MULTILINE, finditer, match
 from sys import maxsize
 
 from algorithm.parameters import params
 
+# Version of the on-disk grammar cache format. Increment this whenever the
+# attributes set by the Grammar class change, so that stale cache files are
+# rebuilt rather than loaded.
+GRAMMAR_CACHE_VERSION = 2
+
 
 class Grammar(object):
     """
@@ -18,6 +26,13 @@ class Grammar(object):
         :param file_name: A specified BNF grammar file.
         """
 
+        if params["GRAMMAR_CACHE"]:
+            # Load the fully analysed grammar from the cache if possible.
+            cache_key, cache_file = self.get_cache_key(file_name)
+
+            if self.load_cache(cache_key, cache_file):
+                return
+
         if file_name.endswith("pybnf"):
             # Use python filter for parsing grammar output as grammar output
             # contains indented python code.
@@ -48,6 +63,9 @@ class Grammar(object):
         # to speed up the recursion step
         self.recursion_cache = {}
 
+        # Memoised number of derivation trees for each (non-terminal, depth).
+        self.tree_counts = {}
+
         # Read in BNF grammar, set production rules, terminals and
         # non-terminals.
         self.read_bnf_file(file_name)
@@ -87,6 +105,117 @@ class Grammar(object):
             # subtrees.
             self.find_concatenation_NTs()
 
+        if params["GRAMMAR_CACHE"]:
+            # Save the fully analysed grammar for later runs.
+            self.save_cache(cache_key, cache_file)
+
+    def get_cache_key(self, file_name):
+        """
+        Generate the key and file name under which the fully analysed
+        grammar is cached. The key covers the contents of the grammar file
+        and all parameters which affect the analysis of the grammar.
+
+        :param file_name: A specified BNF grammar file.
+        :return: The cache key and the cache file name.
+        """
+
+        with open(file_name, "rb") as bnf:
+            content = bnf.read()
+
+        key = [
+            GRAMMAR_CACHE_VERSION,
+            sha256(content).hexdigest(),
+            params["CODON_SIZE"],
+            params["PERMUTATION_RAMPS"],
+            params["MIN_INIT_TREE_DEPTH"],
+            params["MAX_INIT_TREE_DEPTH"],
+            params["POPULATION_SIZE"],
+            hasattr(params["INITIALISATION"], "ramping"),
+            bool(params["REVERSE_MAPPING_TARGET"] or params["TARGET_SEED_FOLDER"]),
+        ]
+
+        if b"GE_RANGE:dataset" in content:
+            # The grammar depends on the dataset of the fitness function.
+            key.extend(
+                getattr(params["FITNESS_FUNCTION"], attr, None)
+                for attr in ["n_vars", "n_is", "n_os"]
+            )
+
+        key = sha256(repr(key).encode()).hexdigest()
+
+        # Cache files are stored alongside the grammar files.
+        cache_dir = params["GRAMMAR_CACHE_DIR"] or path.join(
+            path.dirname(file_name), ".grammar_cache"
+        )
+        cache_file = path.join(
+            cache_dir, "%s.%s.pkl" % (path.basename(file_name), key[:16])
+        )
+
+        return key, cache_file
+
+    def load_cache(self, cache_key, cache_file):
+        """
+        Load the attributes of a fully analysed grammar from a cache file.
+
+        :param cache_key: The expected cache key of the grammar.
+        :param cache_file: The cache file name.
+        :return: True if the grammar was loaded from the cache, else False.
+        """
+
+        try:
+            with open(cache_file, "rb") as f:
+                cached = pickle.load(f)
+
+        except FileNotFoundError:
+            # The grammar has not been cached yet.
+            return False
+
+        except Exception:
+            # The cache file is unreadable. It will be re-built.
+            return False
+
+        if (
+            cached.get("version") != GRAMMAR_CACHE_VERSION
+            or cached.get("key") != cache_key
+        ):
+            # Stale cache file.
+            return False
+
+        self.__dict__.update(cached["grammar"])
+
+        return True
+
+    def save_cache(self, cache_key, cache_file):
+        """
+        Save the attributes of a fully analysed grammar to a cache file. The
+        file is written under a temporary name and then moved into place so
+        that concurrent runs never read a partially written cache file.
+
+        :param cache_key: The cache key of the grammar.
+        :param cache_file: The cache file name.
+        :return: Nothing.
+        """
+
+        cached = {
+            "version": GRAMMAR_CACHE_VERSION,
+            "key": cache_key,
+            "grammar": self.__dict__,
+        }
+
+        tmp_file = "%s.%d.tmp" % (cache_file, getpid())
+
+        try:
+            makedirs(path.dirname(cache_file), exist_ok=True)
+
+            with open(tmp_file, "wb") as f:
+                pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            replace(tmp_file, cache_file)
+
+        except OSError as e:
+            # Caching is an optimisation only, the run can continue.
+            print("Warning: Could not save grammar cache file %s: %s" % (cache_file, e))
+
     def read_bnf_file(self, file_name):
         """
         Read a grammar file in BNF format. Parses the grammar and saves a
@@ -493,100 +622,77 @@ class Grammar(object):
             )
             raise Exception(s)
 
-        if depth in self.permutations.keys():
-            # We have already calculated the permutations at the requested
-            # depth.
-            return self.permutations[depth]
+        if depth not in self.permutations:
+            # Calculate permutations at the requested depth. Every tree
+            # derived from the start symbol is counted exactly once.
+            self.permutations[depth] = self.count_trees(
+                self.start_rule["symbol"], depth
+            )
 
-        else:
-            # Calculate permutations at the requested depth.
-            # Initialise empty data arrays.
-            pos, depth_per_symbol_trees, productions = 0, {}, []
-
-            for NT in self.non_terminals:
-                # Iterate over all non-terminals to fill out list of
-                # productions which contain non-terminal choices.
-                a = self.non_terminals[NT]
-
-                for rule in self.rules[a["id"]]["choices"]:
-                    if rule["NT_kids"]:
-                        productions.append(rule)
-
-            # Get list of all production choices from the start symbol.
-            start_symbols = self.rules[self.start_rule["symbol"]]["choices"]
-
-            for choice in productions:
-                # Generate a list of the symbols of each production choice
-                key = str([sym["symbol"] for sym in choice["choice"]])
-
-                # Initialise permutations dictionary with the list
-                depth_per_symbol_trees[key] = {}
-
-            for i in range(2, depth + 1):
-                # Find all the possible permutations from depth of min_path up
-                # to a specified depth
-
-                for choice in productions:
-                    # Iterate over all production choices
-                    sym_pos = 1
-
-                    for j in choice["choice"]:
-                        # Iterate over all symbols in a production choice.
-                        symbol_arity_pos = 0
-
-                        if j["type"] == "NT":
-                            # We are only interested in non-terminal symbols
-                            for child in self.rules[j["symbol"]]["choices"]:
-                                # Iterate over all production choices for
-                                # each NT symbol in the original choice.
-
-                                if (
-                                    len(child["choice"]) == 1
-                                    and child["choice"][0]["type"] == "T"
-                                ):
-                                    # If the child choice leads directly to
-                                    # a single terminal, increment the
-                                    # permutation count.
-                                    symbol_arity_pos += 1
-
-                                else:
-                                    # The child choice does not lead
-                                    # directly to a single terminal.
-                                    # Generate a key for the permutations
-                                    # dictionary and increment the
-                                    # permutations count there.
-                                    key = [sym["symbol"] for sym in child["choice"]]
-                                    if (i - 1) in depth_per_symbol_trees[
-                                        str(key)
-                                    ].keys():
-                                        symbol_arity_pos += depth_per_symbol_trees[
-                                            str(key)
-                                        ][i - 1]
-
-                            # Multiply original count by new count.
-                            sym_pos *= symbol_arity_pos
-
-                    # Generate new key for the current production choice and
-                    # set the new value in the permutations dictionary.
-                    key = [sym["symbol"] for sym in choice["choice"]]
-                    depth_per_symbol_trees[str(key)][i] = sym_pos
-
-            # Calculate permutations for the start symbol.
-            for sy in start_symbols:
-                key = [sym["symbol"] for sym in sy["choice"]]
-                if str(key) in depth_per_symbol_trees:
-                    pos += (
-                        depth_per_symbol_trees[str(key)][depth]
-                        if depth in depth_per_symbol_trees[str(key)]
-                        else 0
-                    )
-                else:
-                    pos += 1
+        return self.permutations[depth]
+
+    def count_trees(self, symbol, depth):
+        """
+        Count the number of distinct derivation trees rooted at a given
+        non-terminal which do not exceed a given depth. A non-terminal
+        which expands directly to terminals has a depth of 1. Counts are
+        memoised over (non-terminal, depth), so counting over all ramping
+        depths costs O(depths * size of grammar) in total rather than
+        enumerating derivations.
+
+        :param symbol: A non-terminal symbol.
+        :param depth: The maximum depth of the trees.
+        :return: The number of derivation trees.
+        """
 
-            # Set the overall permutations dictionary for the current depth.
-            self.permutations[depth] = pos
+        if depth < 1:
+            # No tree can be derived.
+            return 0
+
+        key = (symbol, depth)
+
+        if key not in self.tree_counts:
+            self.tree_counts[key] = sum(
+                self.count_choice_trees(choice, depth)
+                for choice in self.rules[symbol]["choices"]
+            )
+
+        return self.tree_counts[key]
+
+    def count_choice_trees(self, choice, depth):
+        """
+        Count the number of distinct derivation trees which expand a given
+        production choice and do not exceed a given depth.
+
+        :param choice: A production choice of a non-terminal.
+        :param depth: The maximum depth of the trees.
+        :return: The number of derivation trees.
+        """
+
+        if depth < 1:
+            # No tree can be derived.
+            return 0
+
+        count = 1
+
+        for sym in choice["choice"]:
+            if sym["type"] == "NT":
+                # Each non-terminal child can be expanded independently.
+                count *= self.count_trees(sym["symbol"], depth - 1)
+
+        return count
+
+    def count_depth_trees(self, symbol, depth):
+        """
+        Count the number of distinct derivation trees rooted at a given
+        non-terminal which are exactly a given depth.
+
+        :param symbol: A non-terminal symbol.
+        :param depth: The exact depth of the trees.
+        :return: The number of derivation trees.
+        """
 
-            return pos
+        return self.count_trees(symbol, depth) - self.count_trees(symbol, depth - 1)
 
     def get_min_ramp_depth(self):
         """
@@ -1,6 +1,9 @@
+from time import perf_counter
+
 import numpy as np
 from algorithm.mapper import mapper
 from algorithm.parameters import params
+from utilities.stats.timers import timer
 
 
 class Individual(object):
@@ -23,15 +26,16 @@ class Individual(object):
         if map_ind:
             # The individual needs to be mapped from the given input
             # parameters.
-            (
-                self.phenotype,
-                self.genome,
-                self.tree,
-                self.nodes,
-                self.invalid,
-                self.depth,
-                self.used_codons,
-            ) = mapper(genome, ind_tree)
+            with timer("mapping"):
+                (
+                    self.phenotype,
+                    self.genome,
+                    self.tree,
+                    self.nodes,
+                    self.invalid,
+                    self.depth,
+                    self.used_codons,
+                ) = mapper(genome, ind_tree)
 
         else:
             # The individual does not need to be mapped.
@@ -138,9 +142,11 @@ class Individual(object):
         """
 
         # Evaluate fitness using specified fitness function.
+        start = perf_counter()
         self.fitness = params["FITNESS_FUNCTION"](
             self, cnx=cnx, cursor=cursor, logger=logger, cycle_number=cycle_number
         )
+        self.evaluation_time = perf_counter() - start
 
         if params["MULTICORE"]:
             return self
@@ -13,6 +13,7 @@ from utilities.fitness.math_functions import sci_notation
 
 import sys
 import os
+from time import perf_counter
 
 
 def main(command_line_args):
@@ -32,11 +33,30 @@ def main(command_line_args):
     # NOTE that command line arguments overwrite all previously set parameters.
     params.update(cmd_args)
 
-    # Parse grammar file and set grammar class.
-    grammar = Grammar(os.path.join("..", "grammars", params['GRAMMAR_FILE']))
+    grammar_file = os.path.join("..", "grammars", params['GRAMMAR_FILE'])
+    use_cache = params['GRAMMAR_CACHE']
+
+    # Parse and analyse the grammar file from scratch.
+    params['GRAMMAR_CACHE'] = False
+    start = perf_counter()
+    grammar = Grammar(grammar_file)
+    cold_time = perf_counter() - start
+
+    if use_cache:
+        # Populate the grammar cache, then load the grammar from it.
+        params['GRAMMAR_CACHE'] = True
+        Grammar(grammar_file)
+        start = perf_counter()
+        grammar = Grammar(grammar_file)
+        warm_time = perf_counter() - start
 
     print("\nSpecified grammar:", params['GRAMMAR_FILE'])
 
+    print("\nGrammar load times:")
+    print(" Cold (parse and analyse): \t %.3f ms" % (cold_time * 1000))
+    if use_cache:
+        print(" Warm (grammar cache):     \t %.3f ms" % (warm_time * 1000))
+
     # Initialise zero maximum branching factor for grammar
     max_b_factor = 0
 
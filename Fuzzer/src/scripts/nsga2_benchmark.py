@@ -0,0 +1,122 @@
+from sys import path
+
+path.append("../src")
+
+from utilities.algorithm.general import check_python_version
+
+check_python_version()
+
+from algorithm.parameters import params
+from fitness.base_ff_classes.base_ff import base_ff
+from fitness.base_ff_classes.moo_ff import moo_ff
+from utilities.algorithm.NSGA2 import calculate_crowding_distance, \
+    sort_non_dominated, sort_non_dominated_pairwise
+
+import numpy as np
+import sys
+from time import perf_counter
+
+
+class benchmark_ff:
+    """
+    Stand-in multi-objective fitness function holding one minimising or
+    maximising objective per column of a random objective matrix.
+    """
+
+    multi_objective = True
+
+    def __init__(self, n_objectives):
+        self.num_obj = n_objectives
+        self.fitness_functions = []
+        for m in range(n_objectives):
+            objective = base_ff()
+            objective.maximise = m % 2 == 1
+            self.fitness_functions.append(objective)
+
+    value = staticmethod(moo_ff.value)
+
+
+class benchmark_ind:
+    """
+    Stand-in individual with only a fitness vector.
+    """
+
+    def __init__(self, fitness):
+        self.fitness = fitness
+
+
+def random_population(size, n_objectives, rng):
+    """
+    Generate a population of random fitness vectors. Values are drawn from
+    a small range so that the population includes duplicate points, and a
+    few individuals are invalid.
+
+    :param size: The size of the population.
+    :param n_objectives: The number of objectives.
+    :param rng: A numpy random generator.
+    :return: A list of individuals.
+    """
+
+    values = rng.integers(0, 50, size=(size, n_objectives)).astype(float)
+    values[rng.random(size) < 0.01] = np.nan
+
+    return [benchmark_ind(list(row)) for row in values]
+
+
+def main(sizes, check_limit=1000):
+    """
+    Time non-dominated sorting and crowding distance for a range of
+    population sizes with two and three objectives. For populations of up to
+    check_limit individuals the fronts are checked against the pairwise
+    reference implementation and its run time is reported.
+
+    :param sizes: A list of population sizes.
+    :param check_limit: The largest population checked against the
+    reference implementation.
+    :return: Nothing.
+    """
+
+    rng = np.random.default_rng(0)
+
+    print("objectives\tsize\tfronts\tsort (ms)\tcrowding (ms)\t"
+          "pairwise (ms)")
+
+    for n_objectives in [2, 3]:
+        params['FITNESS_FUNCTION'] = benchmark_ff(n_objectives)
+
+        for size in sizes:
+            population = random_population(size, n_objectives, rng)
+
+            start = perf_counter()
+            pareto = sort_non_dominated(population)
+            sort_time = perf_counter() - start
+
+            start = perf_counter()
+            calculate_crowding_distance(pareto)
+            crowding_time = perf_counter() - start
+
+            pairwise_time = "-"
+
+            if size <= check_limit:
+                start = perf_counter()
+                reference = sort_non_dominated_pairwise(population)
+                pairwise_time = "%.1f" % ((perf_counter() - start) * 1000)
+
+                # Fronts must hold the same individuals.
+                if [set(map(id, front)) for front in pareto.fronts] != \
+                        [set(map(id, front)) for front in reference.fronts]:
+                    s = "scripts.nsga2_benchmark.main\n" \
+                        "Error: fronts differ from the reference " \
+                        "implementation for %d objectives and a population " \
+                        "of %d." % (n_objectives, size)
+                    raise Exception(s)
+
+            print("%d\t\t%d\t%d\t%.1f\t\t%.1f\t\t%s" %
+                  (n_objectives, size, len(pareto.fronts) - 1,
+                   sort_time * 1000, crowding_time * 1000, pairwise_time))
+
+
+if __name__ == "__main__":
+    # Population sizes may be given on the command line.
+    main([int(size) for size in sys.argv[1:]] or
+         [100, 500, 1000, 2000, 5000, 10000])
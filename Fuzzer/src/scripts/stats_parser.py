@@ -3,6 +3,7 @@ from sys import path
 path.append("../src")
 
 from utilities.algorithm.general import check_python_version
+from utilities.stats.stats_buffer import KEY_COLUMNS, load_stats
 
 check_python_version()
 
@@ -132,9 +133,8 @@ def parse_stats_from_runs(experiment_name):
             "Error: experiment name not specified."
         raise Exception(s)
 
-    # Find list of all runs contained in the specified folder.
-    runs = [run for run in listdir(file_path) if
-            path.isdir(path.join(file_path, run))]
+    # Load the stats of all runs at once, in a table for each run.
+    runs = load_runs(file_path)
 
     # Place to store the header for full stats file.
     header = ""
@@ -142,15 +142,11 @@ def parse_stats_from_runs(experiment_name):
     # Array to store all stats
     full_stats = []
 
-    # Get list of all stats to parse. Check stats file of first run from
-    # runs folder.
-    ping_file = path.join(file_path, str(runs[0]), "stats.tsv")
-
-    # Load in data and get the names of all stats.
-    stats = list(pd.read_csv(ping_file, sep="\t"))
+    # Get list of all stats to parse from the first run.
+    stats = list(next(iter(runs.values())))
 
     # Make list of stats we do not wish to parse.
-    no_parse_list = ["gen", "total_inds", "time_adjust"]
+    no_parse_list = ["gen", "total_inds", "time_adjust"] + KEY_COLUMNS
 
     for stat in [stat for stat in stats if stat not in no_parse_list and
                                            not stat.startswith("Unnamed")]:
@@ -159,13 +155,7 @@ def parse_stats_from_runs(experiment_name):
         summary_stats = []
 
         # Iterate over all runs
-        for run in runs:
-            # Get file name
-            file_name = path.join(file_path, str(run), "stats.tsv")
-
-            # Load in data
-            data = pd.read_csv(file_name, sep="\t")
-
+        for run, data in runs.items():
             try:
                 # Try to extract specific stat from the data.
                 if list(data[stat]):
@@ -219,6 +209,37 @@ def parse_stats_from_runs(experiment_name):
                delimiter=",", header=header[:-1])
 
 
+def load_runs(file_path):
+    """
+    Loads the stats of all runs saved under an experiment folder. Stats are
+    read from the stats files written by utilities.stats.stats_buffer, or
+    from the stats.tsv file of each run for runs saved before those.
+
+    :param file_path: The path of the experiment folder.
+    :return: A dictionary mapping the name of each run to a pandas DataFrame
+    with a row per generation and a column per stat.
+    """
+
+    stats = load_stats(file_path)
+
+    if not stats.empty:
+        # Runs with the same name in different processes are kept apart.
+        return {"%s_%d" % (run, process): data.sort_values("gen")
+                for (run, process), data in stats.groupby(KEY_COLUMNS)}
+
+    # Find list of all runs contained in the specified folder.
+    runs = [run for run in listdir(file_path) if
+            path.isfile(path.join(file_path, run, "stats.tsv"))]
+
+    if not runs:
+        s = "scripts.parse_stats.load_runs\n" \
+            "Error: no stats found in %s." % file_path
+        raise Exception(s)
+
+    return {run: pd.read_csv(path.join(file_path, run, "stats.tsv"),
+                             sep="\t") for run in runs}
+
+
 def save_average_plot_across_runs(filename):
     """
     Saves an average plot of multiple runs. Input file data must be of the
@@ -0,0 +1,165 @@
+""" Dumps the statement trace written by the fuzzer with --trace, and
+    optionally replays its tail against a fresh server, e.g. to reproduce the
+    statements which led up to a server crash.
+
+    The trace of a crashed fuzzer is kept as [TRACE_FILE].1 once the fuzzer is
+    restarted. Replays connect with the same environment variables as the
+    fuzzer (HOST, USER, PASSWORD and DATABASE)."""
+
+from sys import path
+
+path.append("../src")
+
+from utilities.algorithm.general import check_python_version
+
+check_python_version()
+
+import argparse
+from datetime import datetime
+
+import mysql.connector
+
+from db.db_connector import connect_to_mysql, create_database, load_db_config
+from db.trace import read_trace, trace_path
+
+
+def format_entry(entry):
+    """
+    Formats a trace entry as a single line.
+
+    :param entry: A trace entry.
+    :return: A string.
+    """
+
+    statement = entry.statement + ('...' if entry.truncated else '')
+
+    return '%d\t%s\t%d\t%d\t%s\t%d\t%.3fms\t%s' % (
+        entry.seq,
+        datetime.fromtimestamp(entry.time).isoformat(timespec='microseconds'),
+        entry.pid, entry.session, entry.errno or '-', entry.rowcount,
+        entry.latency * 1000, statement)
+
+
+def get_tail(entries, tail):
+    """
+    Returns the last entries of a trace, starting from the last time the
+    fuzzed table was reset before them so that they can be replayed against
+    a fresh server.
+
+    :param entries: The entries of a trace, oldest first.
+    :param tail: The number of last entries to return.
+    :return: A list of entries.
+    """
+
+    start = max(len(entries) - tail, 0)
+
+    for i in range(start, -1, -1):
+        if i < len(entries) and entries[i].statement.startswith('DROP TABLE'):
+            return entries[i:]
+
+    return entries[start:]
+
+
+def replay(entries, database=None):
+    """
+    Replays trace entries in order, with one connection for each session of
+    the trace, and prints every statement whose errno or rowcount differs
+    from the trace.
+
+    :param entries: The entries to replay, oldest first.
+    :param database: The name of a database in which to replay the entries,
+    which is created if it does not exist.
+    :return: The number of statements which behaved differently.
+    """
+
+    config = load_db_config()
+
+    if database is not None:
+        if not create_database(config, database):
+            raise SystemExit('Failed to create database %s.' % database)
+        config['database'] = database
+
+    sessions, differences = {}, 0
+
+    try:
+        for entry in entries:
+            if entry.truncated:
+                print('Skipped truncated statement %d.' % entry.seq)
+                continue
+
+            key = (entry.pid, entry.session)
+            if key not in sessions:
+                cnx = connect_to_mysql(config)
+                if cnx is None:
+                    raise SystemExit('Failed to connect to the server.')
+                sessions[key] = cnx, cnx.cursor()
+
+            cnx, cursor = sessions[key]
+            errno, rowcount = 0, 0
+
+            try:
+                cursor.execute(entry.statement)
+                cnx.commit()
+                rowcount = cursor.rowcount
+            except mysql.connector.Error as e:
+                errno = e.errno
+
+            if (errno, rowcount) != (entry.errno, entry.rowcount):
+                differences += 1
+                print('Statement %d: traced errno %s, rowcount %d; replayed '
+                      'errno %s, rowcount %d.\n\t%s' % (
+                          entry.seq, entry.errno or '-', entry.rowcount,
+                          errno or '-', rowcount, entry.statement))
+
+    finally:
+        for cnx, cursor in sessions.values():
+            cnx.close()
+
+    return differences
+
+
+def parse_args():
+    """
+    Parses the command line arguments of the dump tool.
+
+    :return: The parsed arguments.
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Dumps the statement trace of the fuzzer, and optionally '
+                    'replays its tail against a fresh server.')
+    parser.add_argument('trace_file',
+                        nargs='?',
+                        default=trace_path,
+                        help='The trace file. Defaults to logs/trace.bin.')
+    parser.add_argument('--tail',
+                        type=int,
+                        default=100,
+                        help='Sets the number of last statements to dump or '
+                             'replay. Requires int.')
+    parser.add_argument('--replay',
+                        action='store_true',
+                        help='Replays the tail of the trace, from the last '
+                             'reset of the fuzzed table before it.')
+    parser.add_argument('--database',
+                        type=str,
+                        help='Sets the database in which to replay the '
+                             'trace, which is created if it does not exist. '
+                             'Requires string.')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    entries = read_trace(args.trace_file)
+
+    if args.replay:
+        tail = get_tail(entries, args.tail)
+        differences = replay(tail, args.database)
+        print('Replayed %d statements, %d of which behaved differently.' %
+              (len(tail), differences))
+
+    else:
+        for entry in entries[-args.tail:]:
+            print(format_entry(entry))
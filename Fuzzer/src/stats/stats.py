@@ -5,12 +5,15 @@ from time import time
 import numpy as np
 from algorithm.parameters import params
 from utilities.algorithm.NSGA2 import compute_pareto_metrics
+from utilities.algorithm.operator_scheduler import get_operator_stats
+from utilities.algorithm.ranking import get_best
 from utilities.algorithm.state import create_state
-from utilities.stats import trackers
+from utilities.stats import timers, trackers
 from utilities.stats.file_io import save_best_ind_to_file, \
-    save_first_front_to_file, save_stats_headers, save_stats_to_file
+    save_first_front_to_file
 from utilities.stats.save_plots import save_pareto_fitness_plot, \
     save_plot_from_data
+from utilities.stats.stats_buffer import buffer_stats, flush_stats
 
 """Algorithm statistics"""
 stats = {
@@ -37,20 +40,108 @@ stats = {
     "best_fitness": 0,
     "time_taken": 0,
     "total_time": 0,
+    "time_to_first_bug": None,
     "time_adjust": 0
 }
 
 
-def get_stats(individuals, end=False):
+class StatsSnapshot:
     """
-    Generate the statistics for an evolutionary run. Save statistics to
-    utilities.trackers.stats_list. Print statistics. Save fitness plot
-    information.
+    The statistics of an evolutionary run at the end of a generation, or at
+    the end of the run. Snapshots are returned by get_stats and handed to
+    each stats sink, and can be logged, serialised or aggregated by callers
+    without going through any printed output.
+    """
+
+    def __init__(self, values, best, end):
+        """
+        :param values: The stats dictionary, which is copied.
+        :param best: The best individual of the run so far, or the first
+        pareto front for multi-objective optimisation.
+        :param end: Boolean flag for indicating the end of an evolutionary
+        run.
+        """
+
+        self.values = copy(values)
+        self.gen = self.values['gen']
+        self.best = copy(best)
+        self.end = end
+        self.multi_objective = isinstance(best, list)
+
+    def __getitem__(self, stat):
+        return self.values[stat]
+
+    def as_dict(self):
+        """
+        Return the snapshot as a dictionary of plain values, e.g. for
+        serialisation.
+
+        :return: A dictionary of stats, including the best individual(s).
+        """
+
+        snapshot = copy(self.values)
+        snapshot['end'] = self.end
+
+        if self.multi_objective:
+            snapshot['first_front'] = [
+                {"phenotype": ind.phenotype, "fitness": ind.fitness}
+                for ind in self.best]
+
+        elif self.best is not None:
+            snapshot['best'] = {"phenotype": self.best.phenotype,
+                                "genome": self.best.genome,
+                                "fitness": self.best.fitness}
+
+        return snapshot
+
+    def format(self):
+        """
+        Format the snapshot as text. The end of a run is reviewed with its
+        best individual(s).
+
+        :return: A string.
+        """
+
+        lines = []
+
+        if self.end and self.multi_objective:
+            lines.append("\n\nFirst Front:")
+            lines.extend(["  %s" % ind for ind in self.best])
+
+        elif self.end:
+            if hasattr(params['FITNESS_FUNCTION'], "training_test"):
+                lines.append("\n\nBest:\n  Training fitness:\t %s" %
+                             self.best.training_fitness)
+                lines.append("  Test fitness:\t\t %s" %
+                             self.best.test_fitness)
+            else:
+                lines.append("\n\nBest:\n  Fitness:\t %s" % self.best.fitness)
+
+            lines.append("  Phenotype: %s" % self.best.phenotype)
+            lines.append("  Genome: %s" % self.best.genome)
+
+        lines.append("______\n")
+        lines.extend(["  %s : \t %s" % (stat, self.values[stat]) for stat in
+                      sorted(self.values.keys())])
+
+        if self.multi_objective and not self.end:
+            lines.append("  first front fitnesses :")
+            lines.extend(["\t   %s" % ind.fitness for ind in self.best])
+
+        return "\n".join(lines) + "\n"
+
+
+def get_stats(individuals, end=False, sinks=None):
+    """
+    Generate the statistics for an evolutionary run and hand a snapshot of
+    them to each stats sink, which may print, save or plot them.
 
     :param individuals: A population of individuals for which to generate
     statistics.
     :param end: Boolean flag for indicating the end of an evolutionary run.
-    :return: Nothing.
+    :param sinks: The names of the stats sinks to use, see STATS_SINKS.
+    Defaults to params['STATS_SINKS'].
+    :return: A snapshot of the statistics.
     """
 
     if hasattr(params['FITNESS_FUNCTION'], 'multi_objective'):
@@ -67,17 +158,23 @@ def get_stats(individuals, end=False):
         # Single objective optimisation is being used.
         get_soo_stats(individuals, end)
 
+    snapshot = StatsSnapshot(stats, trackers.best_ever, end)
+
+    for sink in params['STATS_SINKS'] if sinks is None else sinks:
+        with timers.timer("stats_" + sink):
+            STATS_SINKS[sink](snapshot)
+
     if params['SAVE_STATE'] and not params['DEBUG'] and \
             stats['gen'] % params['SAVE_STATE_STEP'] == 0:
         # Save the state of the current evolutionary run.
         create_state(individuals)
 
+    return snapshot
+
 
 def get_soo_stats(individuals, end):
     """
     Generate the statistics for an evolutionary run with a single objective.
-    Save statistics to utilities.trackers.stats_list. Print statistics. Save
-    fitness plot information.
 
     :param individuals: A population of individuals for which to generate
     statistics.
@@ -85,8 +182,9 @@ def get_soo_stats(individuals, end):
     :return: Nothing.
     """
 
-    # Get best individual.
-    best = max(individuals)
+    # Get best individual, re-using the ranking from replacement if there
+    # was one.
+    best = get_best(individuals)
 
     if not trackers.best_ever or best > trackers.best_ever:
         # Save best individual in trackers.best_ever.
@@ -96,24 +194,6 @@ def get_soo_stats(individuals, end):
         # Update all stats.
         update_stats(individuals, end)
 
-    # Save fitness plot information
-    if params['SAVE_PLOTS'] and not params['DEBUG']:
-        if not end:
-            trackers.best_fitness_list.append(trackers.best_ever.fitness)
-
-        if params['VERBOSE'] or end:
-            save_plot_from_data(trackers.best_fitness_list, "best_fitness")
-
-    # Print statistics
-    if params['VERBOSE'] and not end:
-        print_generation_stats()
-
-    elif not params['SILENT']:
-        # Print simple display output.
-        perc = stats['gen'] / (params['GENERATIONS'] + 1) * 100
-        stdout.write("Evolution: %d%% complete\r" % perc)
-        stdout.flush()
-
     # Generate test fitness on regression problems
     if hasattr(params['FITNESS_FUNCTION'], "training_test") and end:
         # Save training fitness.
@@ -126,33 +206,10 @@ def get_soo_stats(individuals, end):
         # Set main fitness as training fitness.
         trackers.best_ever.fitness = trackers.best_ever.training_fitness
 
-    # Save stats to list.
-    if params['VERBOSE'] or (not params['DEBUG'] and not end):
-        trackers.stats_list.append(copy(stats))
-
-    # Save stats to file.
-    if not params['DEBUG']:
-
-        if stats['gen'] == 0:
-            save_stats_headers(stats)
-
-        save_stats_to_file(stats, end)
-
-        if params['SAVE_ALL']:
-            save_best_ind_to_file(stats, trackers.best_ever, end, stats['gen'])
-
-        elif params['VERBOSE'] or end:
-            save_best_ind_to_file(stats, trackers.best_ever, end)
-
-    if end and not params['SILENT']:
-        print_final_stats()
-
 
 def get_moo_stats(individuals, end):
     """
     Generate the statistics for an evolutionary run with multiple objectives.
-    Save statistics to utilities.trackers.stats_list. Print statistics. Save
-    fitness plot information.
 
     :param individuals: A population of individuals for which to generate
     statistics.
@@ -174,71 +231,6 @@ def get_moo_stats(individuals, end):
         # Update all stats.
         update_stats(individuals, end)
 
-    # Save fitness plot information
-    if params['SAVE_PLOTS'] and not params['DEBUG']:
-
-        # Initialise empty array for fitnesses for all inds on first pareto
-        # front.
-        all_arr = [[] for _ in range(params['FITNESS_FUNCTION'].num_obj)]
-
-        # Generate array of fitness values.
-        fitness_array = [ind.fitness for ind in trackers.best_ever]
-
-        # Add paired fitnesses to array for graphing.
-        for fit in fitness_array:
-            for o in range(params['FITNESS_FUNCTION'].num_obj):
-                all_arr[o].append(fit[o])
-
-        if not end:
-            trackers.first_pareto_list.append(all_arr)
-
-            # Append empty array to best fitness list.
-            trackers.best_fitness_list.append([])
-
-            # Get best fitness for each objective.
-            for o, ff in \
-                    enumerate(params['FITNESS_FUNCTION'].fitness_functions):
-                # Get sorted list of all fitness values for objective "o"
-                fits = sorted(all_arr[o], reverse=ff.maximise)
-
-                # Append best fitness to trackers list.
-                trackers.best_fitness_list[-1].append(fits[0])
-
-        if params['VERBOSE'] or end:
-
-            # Plot best fitness for each objective.
-            for o, ff in \
-                    enumerate(params['FITNESS_FUNCTION'].fitness_functions):
-                to_plot = [i[o] for i in trackers.best_fitness_list]
-
-                # Plot fitness data for objective o.
-                plotname = ff.__class__.__name__ + str(o)
-
-                save_plot_from_data(to_plot, plotname)
-
-            # TODO: PonyGE2 can currently only plot moo problems with 2
-            #  objectives.
-            # Check that the number of fitness objectives is not greater than 2
-            if params['FITNESS_FUNCTION'].num_obj > 2:
-                s = "stats.stats.get_moo_stats\n" \
-                    "Warning: Plotting of more than 2 simultaneous " \
-                    "objectives is not yet enabled in PonyGE2."
-                print(s)
-
-            else:
-                save_pareto_fitness_plot()
-
-    # Print statistics
-    if params['VERBOSE'] and not end:
-        print_generation_stats()
-        print_first_front_stats()
-
-    elif not params['SILENT']:
-        # Print simple display output.
-        perc = stats['gen'] / (params['GENERATIONS'] + 1) * 100
-        stdout.write("Evolution: %d%% complete\r" % perc)
-        stdout.flush()
-
     # Generate test fitness on regression problems
     if hasattr(params['FITNESS_FUNCTION'], "training_test") and end:
 
@@ -254,27 +246,6 @@ def get_moo_stats(individuals, end):
             # Set main fitness as training fitness.
             ind.fitness = ind.training_fitness
 
-    # Save stats to list.
-    if params['VERBOSE'] or (not params['DEBUG'] and not end):
-        trackers.stats_list.append(copy(stats))
-
-    # Save stats to file.
-    if not params['DEBUG']:
-
-        if stats['gen'] == 0:
-            save_stats_headers(stats)
-
-        save_stats_to_file(stats, end)
-
-        if params['SAVE_ALL']:
-            save_first_front_to_file(stats, end, stats['gen'])
-
-        elif params['VERBOSE'] or end:
-            save_first_front_to_file(stats, end)
-
-    if end and not params['SILENT']:
-        print_final_moo_stats()
-
 
 def update_stats(individuals, end):
     """
@@ -293,6 +264,32 @@ def update_stats(individuals, end):
         stats['total_time'] = trackers.time_list[-1] - \
                               trackers.time_list[0]
 
+    if trackers.first_bug_time is not None:
+        # Time from the start of the run to the first potential bug.
+        stats['time_to_first_bug'] = trackers.first_bug_time - \
+                                     trackers.run_start_time
+
+    else:
+        stats['time_to_first_bug'] = None
+
+    if timers.enabled:
+        # Time spent in each phase of the generation, or of the whole cycle
+        # at the end of the run.
+        for stat in [stat for stat in stats if
+                     stat.startswith(timers.PREFIX)]:
+            stats.pop(stat)
+        stats.update(timers.get_phase_stats(end))
+
+    if params['ADAPTIVE_OPERATORS']:
+        # Current probability of choosing each scheduled operator.
+        stats.update(get_operator_stats())
+
+    if params['NOVELTY']:
+        # Novelty Stats
+        stats['ave_novelty'] = np.mean([getattr(i, "novelty", 0) for i in
+                                        individuals])
+        stats['novelty_archive'] = len(trackers.novelty_archive)
+
     # Population Stats
     stats['total_inds'] = params['POPULATION_SIZE'] * (stats['gen'] + 1)
     stats['runtime_error'] = len(trackers.runtime_error_cache)
@@ -332,59 +329,143 @@ def update_stats(individuals, end):
         stats['best_fitness'] = trackers.best_ever.fitness
 
 
-def print_generation_stats():
+def print_stats(snapshot):
     """
-    Print the statistics for the generation and individuals.
+    Stats sink printing the statistics to the command line. With VERBOSE,
+    the statistics of every generation are printed, otherwise only a
+    progress display is. The end of a run is reviewed unless SILENT.
 
+    :param snapshot: A StatsSnapshot.
     :return: Nothing.
     """
 
-    print("______\n")
-    for stat in sorted(stats.keys()):
-        print(" ", stat, ": \t", stats[stat])
-    print("\n")
+    if params['VERBOSE'] and not snapshot.end:
+        print(snapshot.format())
+
+    elif not params['SILENT']:
+        # Print simple display output.
+        perc = snapshot.gen / (params['GENERATIONS'] + 1) * 100
+        stdout.write("Evolution: %d%% complete\r" % perc)
+        stdout.flush()
+
+    if snapshot.end and not params['SILENT']:
+        print(snapshot.format())
 
 
-def print_first_front_stats():
+def save_stats(snapshot):
     """
-    Stats printing for the first pareto front for multi-objective optimisation.
+    Stats sink saving the statistics of each generation to the stats
+    buffer, which writes them to disk in the background, and the best
+    individual(s) to the files of the run. Nothing is saved in DEBUG mode.
 
+    :param snapshot: A StatsSnapshot.
     :return: Nothing.
     """
 
-    print("  first front fitnesses :")
-    for ind in trackers.best_ever:
-        print("\t  ", ind.fitness)
+    if params['DEBUG']:
+        return
 
+    if snapshot.end:
+        # The end of a run repeats the stats of its last generation.
+        flush_stats()
 
-def print_final_stats():
-    """
-    Prints a final review of the overall evolutionary process.
+    else:
+        buffer_stats(snapshot.values)
 
-    :return: Nothing.
-    """
+    if snapshot.multi_objective:
+        if params['SAVE_ALL']:
+            save_first_front_to_file(snapshot.values, snapshot.end,
+                                     snapshot.gen)
 
-    if hasattr(params['FITNESS_FUNCTION'], "training_test"):
-        print("\n\nBest:\n  Training fitness:\t",
-              trackers.best_ever.training_fitness)
-        print("  Test fitness:\t\t", trackers.best_ever.test_fitness)
-    else:
-        print("\n\nBest:\n  Fitness:\t", trackers.best_ever.fitness)
+        elif params['VERBOSE'] or snapshot.end:
+            save_first_front_to_file(snapshot.values, snapshot.end)
 
-    print("  Phenotype:", trackers.best_ever.phenotype)
-    print("  Genome:", trackers.best_ever.genome)
-    print_generation_stats()
+    elif params['SAVE_ALL']:
+        save_best_ind_to_file(snapshot.values, snapshot.best, snapshot.end,
+                              snapshot.gen)
 
+    elif params['VERBOSE'] or snapshot.end:
+        save_best_ind_to_file(snapshot.values, snapshot.best, snapshot.end)
 
-def print_final_moo_stats():
+
+def plot_stats(snapshot):
     """
-    Prints a final review of the overall evolutionary process for
-    multi-objective problems.
+    Stats sink saving plots of the best fitness (and of the first pareto
+    front for multi-objective optimisation). Only used with SAVE_PLOTS, and
+    never in DEBUG mode.
 
+    :param snapshot: A StatsSnapshot.
     :return: Nothing.
     """
 
-    print("\n\nFirst Front:")
-    for ind in trackers.best_ever:
-        print(" ", ind)
-    print_generation_stats()
+    if not params['SAVE_PLOTS'] or params['DEBUG']:
+        return
+
+    if not snapshot.multi_objective:
+        if not snapshot.end:
+            trackers.best_fitness_list.append(snapshot.best.fitness)
+
+        if params['VERBOSE'] or snapshot.end:
+            save_plot_from_data(trackers.best_fitness_list, "best_fitness")
+
+        return
+
+    # Initialise empty array for fitnesses for all inds on first pareto
+    # front.
+    all_arr = [[] for _ in range(params['FITNESS_FUNCTION'].num_obj)]
+
+    # Generate array of fitness values.
+    fitness_array = [ind.fitness for ind in snapshot.best]
+
+    # Add paired fitnesses to array for graphing.
+    for fit in fitness_array:
+        for o in range(params['FITNESS_FUNCTION'].num_obj):
+            all_arr[o].append(fit[o])
+
+    if not snapshot.end:
+        trackers.first_pareto_list.append(all_arr)
+
+        # Append empty array to best fitness list.
+        trackers.best_fitness_list.append([])
+
+        # Get best fitness for each objective.
+        for o, ff in \
+                enumerate(params['FITNESS_FUNCTION'].fitness_functions):
+            # Get sorted list of all fitness values for objective "o"
+            fits = sorted(all_arr[o], reverse=ff.maximise)
+
+            # Append best fitness to trackers list.
+            trackers.best_fitness_list[-1].append(fits[0])
+
+    if params['VERBOSE'] or snapshot.end:
+
+        # Plot best fitness for each objective.
+        for o, ff in \
+                enumerate(params['FITNESS_FUNCTION'].fitness_functions):
+            to_plot = [i[o] for i in trackers.best_fitness_list]
+
+            # Plot fitness data for objective o.
+            plotname = ff.__class__.__name__ + str(o)
+
+            save_plot_from_data(to_plot, plotname)
+
+        # TODO: PonyGE2 can currently only plot moo problems with 2
+        #  objectives.
+        # Check that the number of fitness objectives is not greater than 2
+        if params['FITNESS_FUNCTION'].num_obj > 2:
+            s = "stats.stats.plot_stats\n" \
+                "Warning: Plotting of more than 2 simultaneous " \
+                "objectives is not yet enabled in PonyGE2."
+            print(s)
+
+        else:
+            save_pareto_fitness_plot()
+
+
+STATS_SINKS = {
+    "print": print_stats,
+    "file": save_stats,
+    "plot": plot_stats,
+}
+# Stats sinks by name, as listed in params['STATS_SINKS']. Each sink is
+# called with the StatsSnapshot of every generation and of the end of a run.
@@ -1,9 +1,15 @@
+from bisect import bisect_right
 from collections import defaultdict
 
+import numpy as np
 from algorithm.parameters import params
 from numpy import isnan
 from utilities.fitness.math_functions import percentile
 
+DOMINANCE_BLOCK = 2 ** 22
+# The number of pairwise objective comparisons made at once when computing
+# a dominance matrix.
+
 
 def compute_pareto_metrics(population):
     """
@@ -23,9 +29,199 @@ def compute_pareto_metrics(population):
 
 
 def sort_non_dominated(population):
+    """Sort *population* into different non-domination levels. The
+    objectives of the population are gathered into an (N x M) matrix and
+    fronts are computed with array operations: a sweep over the
+    lexicographically sorted points with a binary search per point for two
+    objectives (O(N log N)), or a blocked dominance matrix for more
+    objectives. Identical points never dominate each other and share a
+    front. Individuals with a NaN fitness are dominated by every valid
+    individual. The fronts are the same as those of the "Fast Nondominated
+    Sorting Approach" of [Deb2002]_, see sort_non_dominated_pairwise, and
+    individuals within a front keep their order in the population.
+
+    :param population: A list of individuals to select from.
+
+    :returns: A list of Pareto fronts (lists), the first list includes
+              non-dominated individuals.
+
+    .. [Deb2002] Deb, Pratab, Agarwal, and Meyarivan, "A fast elitist
+       non-dominated sorting genetic algorithm for multi-objective
+       optimization: NSGA-II", 2002.
+
+    """
+
+    # Initialise empty pareto class instance.
+    pareto = ParetoInfo()
+
+    # Gather the objectives of the population, lower is better.
+    values = get_objective_values(population)
+    objectives = values * pareto.signs
+
+    # Compute the Inter-Quartile Range (+1) value used to normalize the
+    # crowding distance
+    pareto.compute_iqr(population, values)
+
+    ranks = get_front_ranks(objectives)
+
+    # As in [Deb2002]_, the list of fronts ends with an empty front.
+    pareto.fronts = [[] for _ in range(ranks.max() + 2 if len(ranks) else 1)]
+
+    for ind, rank in zip(population, ranks.tolist()):
+        pareto.fronts[rank].append(ind)
+        pareto.rank[ind] = rank
+
+    return pareto
+
+
+def get_objective_values(population):
+    """
+    Return the fitness of a population as an (N x M) matrix of objective
+    values.
+
+    :param population: A population of individuals.
+    :return: A matrix with one row per individual and one column per
+    objective.
+    """
+
+    ff = params['FITNESS_FUNCTION']
+
+    return np.array([[ff.value(ind.fitness, m) for m in range(ff.num_obj)]
+                     for ind in population],
+                    dtype=np.float64).reshape(len(population), ff.num_obj)
+
+
+def get_front_ranks(objectives):
+    """
+    Return the index of the Pareto front of each row of an objective
+    matrix, where lower objective values are better.
+
+    :param objectives: An (N x M) matrix of objective values.
+    :return: A vector of front indices.
+    """
+
+    ranks = np.zeros(len(objectives), dtype=int)
+    invalid = np.isnan(objectives).any(axis=1)
+
+    if invalid.all():
+        # Invalid individuals do not dominate each other.
+        return ranks
+
+    # Identical points do not dominate each other, so only unique points
+    # need to be sorted. Unique points are returned in lexicographic order.
+    points, inverse = np.unique(objectives[~invalid], axis=0,
+                                return_inverse=True)
+
+    if points.shape[1] == 2:
+        point_ranks = get_front_ranks_2d(points)
+
+    else:
+        point_ranks = get_front_ranks_nd(points)
+
+    ranks[~invalid] = point_ranks[inverse.reshape(-1)]
+
+    # Invalid individuals are dominated by every valid individual.
+    ranks[invalid] = point_ranks.max() + 1
+
+    return ranks
+
+
+def get_front_ranks_2d(points):
+    """
+    Return the front index of each of a set of unique, lexicographically
+    sorted points with two objectives. Every earlier point is at least as
+    good on the first objective, so a point is dominated by a front if and
+    only if the front holds an earlier point at least as good on the second
+    objective. The best second objective of each front increases with the
+    front index, so the front of each point is found by binary search.
+
+    :param points: A sorted (N x 2) matrix of unique objective values.
+    :return: A vector of front indices.
+    """
+
+    ranks = np.empty(len(points), dtype=int)
+
+    # The best second objective of each front so far.
+    best = []
+
+    for i, value in enumerate(points[:, 1].tolist()):
+        rank = bisect_right(best, value)
+
+        if rank == len(best):
+            # The point is dominated by all existing fronts.
+            best.append(value)
+
+        else:
+            best[rank] = value
+
+        ranks[i] = rank
+
+    return ranks
+
+
+def get_front_ranks_nd(points):
+    """
+    Return the front index of each of a set of unique, lexicographically
+    sorted points with any number of objectives. A point can only be
+    dominated by earlier points, so only the upper triangle of the dominance
+    matrix is computed. It is computed in blocks of columns, to bound the
+    size of intermediate arrays, and kept bit-packed. Fronts are then peeled
+    off by counting how many remaining points dominate each point.
+
+    :param points: A sorted (N x M) matrix of unique objective values.
+    :return: A vector of front indices.
+    """
+
+    n = len(points)
+
+    # Blocks are a whole number of bytes wide once packed.
+    block = max(8, DOMINANCE_BLOCK // n // 8 * 8)
+
+    # Row i of the matrix marks the points dominated by point i.
+    dominated = np.zeros((n, (n + 7) // 8), dtype=np.uint8)
+
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+
+        # Compare the points in the block with all earlier points, one
+        # objective at a time. Unique points which are no worse on any
+        # objective are better on at least one.
+        no_worse = np.ones((stop, stop - start), dtype=bool)
+        for column in points.T:
+            no_worse &= column[:stop, None] <= column[None, start:stop]
+
+        # Points do not dominate themselves.
+        diagonal = np.arange(start, stop)
+        no_worse[diagonal, diagonal - start] = False
+
+        dominated[:stop, start // 8:(stop + 7) // 8] = np.packbits(no_worse,
+                                                                   axis=1)
+
+    # The number of points dominating each point.
+    counts = np.unpackbits(dominated, axis=1, count=n).sum(axis=0,
+                                                           dtype=np.int64)
+
+    ranks = np.empty(n, dtype=int)
+    front, rank = np.flatnonzero(counts == 0), 0
+
+    while len(front):
+        ranks[front] = rank
+        counts[front] = -1
+
+        # Remove the current front and find the points it alone dominated.
+        counts -= np.unpackbits(dominated[front], axis=1, count=n).sum(
+            axis=0, dtype=np.int64)
+        front, rank = np.flatnonzero(counts == 0), rank + 1
+
+    return ranks
+
+
+def sort_non_dominated_pairwise(population):
     """Sort the first *k* *population* into different non-domination levels
     using the "Fast Nondominated Sorting Approach" proposed by Deb et al.,
-    see [Deb2002]_. This algorithm has a time complexity of :math:`O(MN^2)`,
+    see [Deb2002]_. This is the reference implementation of
+    sort_non_dominated, which compares every pair of individuals with
+    dominates(). This algorithm has a time complexity of :math:`O(MN^2)`,
     where :math:`M` is the number of objectives and :math:`N` the number of
     individuals.
 
@@ -171,7 +367,10 @@ def calculate_crowding_distance(pareto):
     """
     Compute the crowding distance of each individual in each Pareto front.
     The value is stored inside the dictionary *crowding_distance* kept by
-    the object *pareto*.
+    the object *pareto*. Each front is handled as a matrix of objective
+    values: for every objective the front is stably sorted, starting from
+    the order left by the previous objective, and the distances of all
+    individuals are updated at once.
 
     :param pareto: A ParetoInfo object with the information regarding
                    the Pareto fronts defined by the current population
@@ -180,44 +379,46 @@ def calculate_crowding_distance(pareto):
              non-dominated individuals.
     """
 
+    ffs = params['FITNESS_FUNCTION'].fitness_functions
+
     # The crowding distance is computed per front
     for front in pareto.fronts:
 
         if len(front) > 0:
 
-            # Number of solutions in the front
-            solutions_num = len(front)
-
-            for individual in front:
-                # Initialize the distances
-                pareto.crowding_distance[individual] = 0
-
-            for m in range(pareto.n_objectives):
-                # Sort the solutions using each objective value
-                front = sorted(front, key=lambda item: params[
-                    'FITNESS_FUNCTION'].value(item.fitness, m),
-                               reverse=params['FITNESS_FUNCTION'].
-                               fitness_functions[m].maximise)
-
-                # The boundary solutions are assigned an infinite distance
-                # value
-                pareto.crowding_distance[front[0]] = float("inf")
-                pareto.crowding_distance[front[solutions_num - 1]] = float(
-                    "inf")
-
-                # All other intermediate solutions have the distance computed
-                for index in range(1, solutions_num - 1):
-                    # The distance value equals to the absolute normalized
-                    # difference in the function values of two adjacent
-                    # solutions. The normalization uses (IQR + 1) instead of
-                    # (max-min)
-                    pareto.crowding_distance[front[index]] += \
-                        (params['FITNESS_FUNCTION'].value(
-                            front[index + 1].fitness, m) -
-                         params['FITNESS_FUNCTION'].value(
-                             front[index - 1].fitness, m)) / \
+            values = get_objective_values(front)
+
+            # Initialize the distances
+            distance = np.zeros(len(front))
+            order = np.arange(len(front))
+
+            # Infinite objective values give NaN distances, as they would
+            # with Python floats.
+            with np.errstate(invalid="ignore"):
+                for m in range(pareto.n_objectives):
+                    # Sort the solutions using each objective value, best
+                    # first.
+                    key = values[order, m]
+                    order = order[np.argsort(-key if ffs[m].maximise else
+                                             key, kind="stable")]
+                    column = values[order, m]
+
+                    # The boundary solutions are assigned an infinite
+                    # distance value
+                    distance[order[[0, -1]]] = np.inf
+
+                    # All other intermediate solutions have the distance
+                    # computed. The distance value equals to the absolute
+                    # normalized difference in the function values of two
+                    # adjacent solutions. The normalization uses (IQR + 1)
+                    # instead of (max-min)
+                    distance[order[1:-1]] += \
+                        np.abs(column[2:] - column[:-2]) / \
                         pareto.fitness_iqr[m]
 
+            for individual, value in zip(front, distance.tolist()):
+                pareto.crowding_distance[individual] = value
+
     return pareto
 
 
@@ -248,33 +449,36 @@ def crowded_comparison_operator(self, other, pareto):
         return False
 
 
-def get_population_iqr(population, n_objectives):
+def get_population_iqr(population, n_objectives, values=None):
     """
     Compute the inter-quartile range (IQR) of the population regarding
     each objective.
 
     :param population: The input population
     :param n_objectives: Total number of objectives
+    :param values: The objective values of the population, as returned by
+    get_objective_values, if already known.
     :return: List with the IQR regarding each objective
     """
 
+    if values is None:
+        values = get_objective_values(population)
+
     # Initialise base IQR as 0 for each objective
     iqr = [0 for _ in range(n_objectives)]
 
     for m in range(n_objectives):
         # Iterate over all objectives
 
-        # Sort the population with respect to the current objective.
-        sorted_pop = sorted(population, key=lambda ind:
-        params['FITNESS_FUNCTION'].value(ind.fitness, m),
-                            reverse=params['FITNESS_FUNCTION'].
-                            fitness_functions[m].maximise)
+        # Sort the objective values of the population.
+        column = np.sort(values[:, m])
+
+        if params['FITNESS_FUNCTION'].fitness_functions[m].maximise:
+            column = column[::-1]
 
         # Get the inter-quartile fitness ranges for the current objective.
-        iqr[m] = (params['FITNESS_FUNCTION'].value(percentile(sorted_pop,
-                                                              75).fitness, m) -
-                  params['FITNESS_FUNCTION'].value(percentile(sorted_pop,
-                                                              25).fitness, m))
+        iqr[m] = float(percentile(column, 75)) - float(percentile(column, 25))
+
     return iqr
 
 
@@ -301,17 +505,25 @@ class ParetoInfo:
 
         self.fitness_iqr = [0] * self.n_objectives
 
-    def compute_iqr(self, population):
+        # Multiplying objective values by these signs makes lower values
+        # better on every objective.
+        self.signs = np.array([-1 if ff.maximise else 1 for ff in
+                               params['FITNESS_FUNCTION'].fitness_functions])
+
+    def compute_iqr(self, population, values=None):
         """
         Compute the Inter-Quartile Range for a population for all fitness
         objectives.
 
         :param population: A population.
+        :param values: The objective values of the population, if already
+        known.
         :return: Nothing.
         """
 
         # Get the inter-quartile ranges for all objectives.
-        self.fitness_iqr = get_population_iqr(population, self.n_objectives)
+        self.fitness_iqr = get_population_iqr(population, self.n_objectives,
+                                              values)
 
         # If the IQR value is zero, we replace it for 1---which is equivalent
         # to disregard the normalization process for that objective dimension.
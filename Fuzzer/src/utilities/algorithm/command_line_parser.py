@@ -151,6 +151,12 @@ def parse_cmd_args(arguments):
                         help='Sets the counting method for step-counting '
                              'hill-climbing. Optional values are "count_all", '
                              '"acp", and "imp".')
+    parser.add_argument('--hill_climbing_neighbours',
+                        dest='HILL_CLIMBING_NEIGHBOURS',
+                        type=int,
+                        help='Sets the number of neighbours evaluated as a '
+                             'batch at each step of late-acceptance and '
+                             'step-counting hill-climbing. Requires int.')
 
     # INDIVIDUAL SIZE
     parser.add_argument('--max_tree_depth',
@@ -196,6 +202,17 @@ def parse_cmd_args(arguments):
                              'of the grammar). Mainly for use with '
                              'the grammar analyser script. Requires int '
                              'value.')
+    parser.add_argument('--no_grammar_cache',
+                        dest='GRAMMAR_CACHE',
+                        action='store_false',
+                        default=None,
+                        help='Always parse and analyse the grammar file '
+                             'rather than loading it from the grammar cache.')
+    parser.add_argument('--grammar_cache_dir',
+                        dest='GRAMMAR_CACHE_DIR',
+                        type=str,
+                        help='Sets the folder in which grammar cache files '
+                             'are saved. Requires a full folder path.')
 
     # INITIALISATION
     parser.add_argument('--max_init_tree_depth',
@@ -217,6 +234,12 @@ def parse_cmd_args(arguments):
                         help='Sets the initialisation strategy, requires a '
                              'string such as "rhh" or a direct path string '
                              'such as "operators.initialisation.rhh".')
+    parser.add_argument('--uniform_init',
+                        dest='UNIFORM_INIT',
+                        action='store_true',
+                        default=None,
+                        help='Sample rhh and PI_grow trees uniformly from all '
+                             'trees of each depth.')
 
     # SELECTION
     parser.add_argument('--selection',
@@ -250,6 +273,79 @@ def parse_cmd_args(arguments):
                         help='Boolean flag for selecting whether or not '
                              'mutation is confined to within the used portion '
                              'of the genome. Default set to True.')
+    parser.add_argument('--batch_variation',
+                        dest='BATCH_VARIATION',
+                        default=None,
+                        action='store_true',
+                        help='Boolean flag for performing linear crossover '
+                             'and mutation on the whole population at once '
+                             'using array operations. Default set to False.')
+    parser.add_argument('--adaptive_operators',
+                        dest='ADAPTIVE_OPERATORS',
+                        default=None,
+                        action='store_true',
+                        help='Boolean flag for choosing the crossover and '
+                             'mutation operator of each offspring with a '
+                             'multi-armed bandit. Overrides --crossover and '
+                             '--mutation. Default set to False.')
+    parser.add_argument('--adaptive_crossovers',
+                        dest='ADAPTIVE_CROSSOVERS',
+                        type=str,
+                        nargs='+',
+                        help='Sets the crossover operators scheduled by '
+                             '--adaptive_operators, requires operator names '
+                             'separated by spaces, e.g. "fixed_twopoint '
+                             'subtree".')
+    parser.add_argument('--adaptive_mutations',
+                        dest='ADAPTIVE_MUTATIONS',
+                        type=str,
+                        nargs='+',
+                        help='Sets the mutation operators scheduled by '
+                             '--adaptive_operators, requires operator names '
+                             'separated by spaces, e.g. "int_flip_per_codon '
+                             'subtree".')
+    parser.add_argument('--adaptive_learning_rate',
+                        dest='ADAPTIVE_LEARNING_RATE',
+                        action=FloatAction,
+                        help='Sets the weight of the latest reward in the '
+                             'average reward of a scheduled operator, '
+                             'requires float, e.g. 0.1.')
+    parser.add_argument('--adaptive_min_probability',
+                        dest='ADAPTIVE_MIN_PROBABILITY',
+                        action=FloatAction,
+                        help='Sets the minimum probability of choosing any '
+                             'scheduled operator, requires float, e.g. 0.05.')
+
+    # NOVELTY SEARCH
+    parser.add_argument('--novelty',
+                        dest='NOVELTY',
+                        default=None,
+                        action='store_true',
+                        help='Boolean flag for rewarding individuals whose '
+                             'behaviour is far from the behaviours seen so '
+                             'far. Default set to False.')
+    parser.add_argument('--novelty_neighbours',
+                        dest='NOVELTY_NEIGHBOURS',
+                        type=int,
+                        help='Sets the number of nearest neighbours over '
+                             'which novelty is averaged, requires int.')
+    parser.add_argument('--novelty_archive_add',
+                        dest='NOVELTY_ARCHIVE_ADD',
+                        type=int,
+                        help='Sets the number of most novel behaviours '
+                             'archived from each generation, requires int.')
+    parser.add_argument('--novelty_archive_size',
+                        dest='NOVELTY_ARCHIVE_SIZE',
+                        type=int,
+                        help='Sets the maximum number of behaviours in the '
+                             'novelty archive, requires int.')
+    parser.add_argument('--novelty_weight',
+                        dest='NOVELTY_WEIGHT',
+                        type=float,
+                        help='Sets the weight of novelty when added to '
+                             'fitness as a second objective, requires float. '
+                             'A weight of 0 only uses novelty to break ties '
+                             'between equal fitnesses.')
 
     # CROSSOVER
     parser.add_argument('--crossover',
@@ -354,6 +450,61 @@ def parse_cmd_args(arguments):
                         type=int,
                         help='Specify the number of cores to be used for '
                              'multi-core evaluation. Requires int.')
+    parser.add_argument('--async_workers',
+                        dest='ASYNC_WORKERS',
+                        type=int,
+                        help='Specify the number of concurrent database '
+                             'sessions used by the asynchronous search loop. '
+                             'Requires int.')
+
+    # ISLAND MODEL
+    parser.add_argument('--islands',
+                        dest='ISLANDS',
+                        type=int,
+                        help='Sets the number of islands, each run in its '
+                             'own process against its own database schema. '
+                             'Requires int.')
+    parser.add_argument('--migration_interval',
+                        dest='MIGRATION_INTERVAL',
+                        type=int,
+                        help='Sets the number of generations between '
+                             'migrations. Requires int.')
+    parser.add_argument('--migration_size',
+                        dest='MIGRATION_SIZE',
+                        type=int,
+                        help='Sets the number of best individuals each '
+                             'island sends to its neighbours. Requires int.')
+    parser.add_argument('--migration_topology',
+                        dest='MIGRATION_TOPOLOGY',
+                        type=str,
+                        help='Sets the migration topology, requires a string '
+                             'such as "ring", "bidirectional_ring", '
+                             '"complete" or "random".')
+
+    # SMT IMMIGRANTS
+    parser.add_argument('--smt_immigrants',
+                        dest='SMT_IMMIGRANTS',
+                        action='store_true',
+                        default=None,
+                        help='Solves the check constraints with z3 in a '
+                             'background process and adds statements on '
+                             'both sides of each boundary to the population '
+                             'as immigrants.')
+    parser.add_argument('--smt_interval',
+                        dest='SMT_INTERVAL',
+                        type=int,
+                        help='Sets the number of generations between '
+                             'arrivals of SMT immigrants. Requires int.')
+    parser.add_argument('--smt_batch_size',
+                        dest='SMT_BATCH_SIZE',
+                        type=int,
+                        help='Sets the number of statements in each batch of '
+                             'SMT immigrants. Requires int.')
+    parser.add_argument('--smt_timeout',
+                        dest='SMT_TIMEOUT',
+                        type=int,
+                        help='Sets the time limit of each call to z3 in '
+                             'milliseconds. Requires int.')
 
     # REPLACEMENT
     parser.add_argument('--replacement',
@@ -426,6 +577,94 @@ def parse_cmd_args(arguments):
                         action='store_true',
                         default=None,
                         help='Saves the best phenotypes at each generation.')
+    parser.add_argument('--stats_sinks',
+                        dest='STATS_SINKS',
+                        type=str,
+                        nargs='*',
+                        help='Sets the sinks which receive the statistics of '
+                             'each generation, requires sink names separated '
+                             'by spaces, e.g. "print file plot", or none.')
+    parser.add_argument('--stats_flush_rows',
+                        dest='STATS_FLUSH_ROWS',
+                        type=int,
+                        help='Sets the number of buffered rows of stats which '
+                             'triggers a write to disk. Requires int.')
+    parser.add_argument('--stats_flush_interval',
+                        dest='STATS_FLUSH_INTERVAL',
+                        type=float,
+                        help='Sets the maximum number of seconds between '
+                             'writes of buffered stats. Requires float.')
+    parser.add_argument('--log_rate_limit',
+                        dest='LOG_RATE_LIMIT',
+                        type=int,
+                        help='Sets the maximum number of events of each type '
+                             'written to the event log per second, or 0 for '
+                             'no limit. Requires int.')
+    parser.add_argument('--timers',
+                        dest='TIMERS',
+                        action='store_true',
+                        default=None,
+                        help='Times each phase of the fuzzing loop and '
+                             'reports the times per generation and per cycle '
+                             'in the stats.')
+    parser.add_argument('--metrics_port',
+                        dest='METRICS_PORT',
+                        type=int,
+                        help='Sets the local port on which live metrics are '
+                             'served in the Prometheus text format. Islands '
+                             'use consecutive ports. Requires int.')
+    parser.add_argument('--trace',
+                        dest='TRACE',
+                        action='store_true',
+                        default=None,
+                        help='Records every statement executed by the fuzzer '
+                             'in a memory-mapped ring buffer which survives a '
+                             'crash.')
+    parser.add_argument('--trace_file',
+                        dest='TRACE_FILE',
+                        type=str,
+                        help='Sets the file of the statement trace. Requires '
+                             'string.')
+    parser.add_argument('--trace_entries',
+                        dest='TRACE_ENTRIES',
+                        type=int,
+                        help='Sets the number of statements kept in the '
+                             'statement trace. Requires int.')
+    parser.add_argument('--profile',
+                        dest='PROFILE',
+                        type=int,
+                        help='Sets the number of cycles, from the first one, '
+                             'profiled by a sampling profiler writing '
+                             'collapsed stacks to the results folder of each '
+                             'cycle. Requires int.')
+    parser.add_argument('--profile_interval',
+                        dest='PROFILE_INTERVAL',
+                        type=float,
+                        help='Sets the number of seconds between samples of '
+                             'the profiler. Requires float.')
+    parser.add_argument('--bug_store',
+                        dest='BUG_STORE',
+                        type=str,
+                        help='Sets the SQLite file in which distinct bugs '
+                             'are stored. Requires string.')
+    parser.add_argument('--reduce_bugs',
+                        dest='REDUCE_BUGS',
+                        action='store_true',
+                        default=None,
+                        help='Reduces the query of each new bug at the end of '
+                             'the cycle in which it was found.')
+    parser.add_argument('--reducer_workers',
+                        dest='REDUCER_WORKERS',
+                        type=int,
+                        help='Sets the number of connections on which '
+                             'reductions are replayed. Requires int.')
+    parser.add_argument('--confirm_bugs',
+                        dest='CONFIRM_BUGS',
+                        action='store_true',
+                        default=None,
+                        help='Confirms each new bug in the background, by '
+                             'replaying it in a fresh table in strict and '
+                             'non-strict sql_mode.')
     parser.add_argument('--save_plots',
                         dest='SAVE_PLOTS',
                         action='store_true',
@@ -443,6 +682,13 @@ def parse_cmd_args(arguments):
                         help='Specify a target seed folder in the "seeds" '
                              'directory that contains a population of '
                              'individuals with which to seed a run.')
+    parser.add_argument('--boundary_seeds',
+                        dest='BOUNDARY_SEEDS',
+                        action=FloatAction,
+                        help='Sets the fraction of the initial population '
+                             'seeded with statements on and around the '
+                             'boundaries of the check constraints, requires '
+                             'float, e.g. 0.2.')
 
     # STATE SAVING/LOADING
     parser.add_argument('--save_state',
@@ -490,6 +736,12 @@ def parse_cmd_args(arguments):
                              ' other nearby agents in the environment. By default'
                              ' 0.5 probability is used. Higher the probability the time'
                              ' to find the solution would be reduced')
+    parser.add_argument('--agent_workers',
+                        dest='AGENT_WORKERS',
+                        type=int,
+                        help='Specifies how many processes the agents are'
+                             ' split across. Each process has its own database'
+                             ' session. By default 4 processes are used.')
 
     # CACHING
     class CachingAction(argparse.Action):
@@ -1,5 +1,8 @@
+from random import getrandbits
 from sys import version_info
 
+from numpy.random import default_rng
+
 
 def check_python_version():
     """
@@ -13,3 +16,15 @@ def check_python_version():
         s = "\nError: Python version not supported.\n" \
             "       Must use at least Python 3.5."
         raise Exception(s)
+
+
+def get_rng():
+    """
+    Return a NumPy random generator seeded from the standard Python RNG. As
+    the Python RNG is the one seeded with params['RANDOM_SEED'], array
+    operators which draw from this generator remain reproducible.
+
+    :return: A numpy.random.Generator instance.
+    """
+
+    return default_rng(getrandbits(64))
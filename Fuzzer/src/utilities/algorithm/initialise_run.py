@@ -6,7 +6,7 @@ from socket import gethostname
 from time import time
 
 from algorithm.parameters import params
-from utilities.stats import trackers
+from utilities.stats import timers, trackers
 from utilities.stats.file_io import generate_folders_and_files
 
 
@@ -21,6 +21,17 @@ def initialise_run_params(create_files):
     start = datetime.now()
     trackers.time_list.append(time())
 
+    # Start timing the run, in which no bugs have been found yet.
+    trackers.run_start_time = trackers.time_list[-1]
+    trackers.first_bug_time = None
+    trackers.evaluations, trackers.bugs_found = 0, 0
+    trackers.seen_errors, trackers.seen_disagreements = set(), set()
+    trackers.error_counts, trackers.new_bugs = {}, []
+
+    # Time the phases of the run if requested.
+    timers.enabled = params['TIMERS']
+    trackers.novelty_archive = []
+
     # Set random seed
     if params['RANDOM_SEED'] is None:
         params['RANDOM_SEED'] = int(start.microsecond)
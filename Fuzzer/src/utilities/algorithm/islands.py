@@ -0,0 +1,256 @@
+from queue import Empty, Full
+from random import choice
+from time import time
+
+from algorithm.parameters import params
+from fitness.evaluation import evaluate_fitness
+from representation.individual import Individual
+from utilities.algorithm.ranking import get_fitness_scores, get_tie_breaks, \
+    top_indices
+from utilities.stats import trackers
+
+island = None
+# The island of the island model run by the current process, if any. Set by
+# init_island in each island process.
+
+
+class Island:
+    """
+    A single island of an island model. Each island runs in its own process
+    with its own population and database schema, and exchanges its best
+    individuals with neighbouring islands through bounded inboxes.
+    """
+
+    def __init__(self, index, inboxes):
+        """
+        :param index: The index of the island.
+        :param inboxes: The migration inboxes of all islands, indexed by
+        island.
+        """
+
+        self.index = index
+        self.inboxes = inboxes
+
+        # Migration counters for the current cycle.
+        self.emigrants, self.immigrants = 0, 0
+
+
+def init_island(index, inboxes):
+    """
+    Set the island run by the current process.
+
+    :param index: The index of the island.
+    :param inboxes: The migration inboxes of all islands, indexed by island.
+    :return: Nothing.
+    """
+
+    global island
+    island = Island(index, inboxes)
+
+
+def get_neighbours(index, n_islands, topology):
+    """
+    Return the islands to which an island sends its emigrants under a given
+    migration topology.
+
+    :param index: The index of the sending island.
+    :param n_islands: The total number of islands.
+    :param topology: The migration topology, one of "ring",
+    "bidirectional_ring", "complete" or "random".
+    :return: A list of island indices.
+    """
+
+    others = [i for i in range(n_islands) if i != index]
+
+    if not others:
+        # A single island has no neighbours.
+        return []
+
+    elif topology == "ring":
+        return [(index + 1) % n_islands]
+
+    elif topology == "bidirectional_ring":
+        return sorted({(index - 1) % n_islands, (index + 1) % n_islands})
+
+    elif topology == "complete":
+        return others
+
+    elif topology == "random":
+        # A new neighbour is picked at every migration.
+        return [choice(others)]
+
+    else:
+        s = "utilities.algorithm.islands.get_neighbours\n" \
+            "Error: Unknown migration topology: %s\n" \
+            "       Valid topologies are ring, bidirectional_ring, complete " \
+            "and random." % topology
+        raise Exception(s)
+
+
+def migrate(individuals, cnx, cursor, logger, cycle_number):
+    """
+    Send copies of the MIGRATION_SIZE best individuals of the population to
+    the neighbouring islands, then receive any individuals sent to this
+    island. Immigrants are re-evaluated against the local schema and replace
+    the worst individuals in the population.
+
+    :param individuals: The population of the island.
+    :return: The population after migration.
+    """
+
+    # Emigrate the best individuals. Only genomes are sent, since fitness
+    # depends on the schema of each island.
+    scores = get_fitness_scores(individuals)
+    genomes = [individuals[i].genome for i in
+               top_indices(scores, params['MIGRATION_SIZE'],
+                           get_tie_breaks(individuals))]
+
+    for neighbour in get_neighbours(island.index, len(island.inboxes),
+                                    params['MIGRATION_TOPOLOGY']):
+        try:
+            island.inboxes[neighbour].put_nowait(genomes)
+            island.emigrants += len(genomes)
+
+        except Full:
+            # Migration is bounded, a neighbour which has not yet received
+            # earlier emigrants does not get any more.
+            pass
+
+    # Receive all waiting immigrants without blocking.
+    immigrants = []
+
+    try:
+        while True:
+            immigrants.extend(Individual(genome, None) for genome in
+                              island.inboxes[island.index].get_nowait())
+
+    except Empty:
+        pass
+
+    # Never let immigrants take over the entire population.
+    immigrants = immigrants[:len(individuals) - 1]
+
+    island.immigrants += len(immigrants)
+
+    return accept_immigrants(individuals, immigrants, cnx, cursor, logger,
+                             cycle_number)
+
+
+def accept_immigrants(individuals, immigrants, cnx, cursor, logger,
+                      cycle_number):
+    """
+    Evaluate immigrants against the local schema and let them replace the
+    worst individuals in the population.
+
+    :param individuals: The population.
+    :param immigrants: A list of unevaluated individuals, fewer than the
+    population.
+    :return: The population after immigration.
+    """
+
+    if not immigrants:
+        return individuals
+
+    immigrants = evaluate_fitness(immigrants, cnx, cursor, logger,
+                                  cycle_number)
+
+    # Immigrants replace the worst individuals in the population.
+    survivors = top_indices(get_fitness_scores(individuals),
+                            len(individuals) - len(immigrants),
+                            get_tie_breaks(individuals))
+
+    return [individuals[i] for i in survivors] + immigrants
+
+
+def get_island_report(cycle_number):
+    """
+    Return a summary of the throughput and bug yield of the current island
+    for a completed fuzzing cycle, and reset the migration counters.
+
+    :param cycle_number: The number of the completed cycle.
+    :return: A dictionary of island stats.
+    """
+
+    report = {"island": island.index,
+              "cycle": cycle_number,
+              "evaluations": trackers.evaluations,
+              "bugs": trackers.bugs_found,
+              "time_to_first_bug": None,
+              "time": time() - trackers.run_start_time,
+              "emigrants": island.emigrants,
+              "immigrants": island.immigrants}
+
+    if trackers.first_bug_time is not None:
+        # Time from the start of the cycle to its first potential bug.
+        report['time_to_first_bug'] = trackers.first_bug_time - \
+                                      trackers.run_start_time
+
+    island.emigrants, island.immigrants = 0, 0
+
+    return report
+
+
+def merge_island_reports(totals, report):
+    """
+    Merge the report of a fuzzing cycle of a single island into the running
+    totals of all islands.
+
+    :param totals: A dictionary of merged stats for each island.
+    :param report: A report returned by get_island_report.
+    :return: Nothing.
+    """
+
+    total = totals.setdefault(report['island'], {
+        "cycles": 0, "evaluations": 0, "bugs": 0, "time": 0,
+        "time_to_first_bug": None, "emigrants": 0, "immigrants": 0})
+
+    total['cycles'] += 1
+
+    for key in ["evaluations", "bugs", "time", "emigrants", "immigrants"]:
+        total[key] += report[key]
+
+    if report['time_to_first_bug'] is not None and \
+            (total['time_to_first_bug'] is None or
+             report['time_to_first_bug'] < total['time_to_first_bug']):
+        # Keep the fastest time to a first bug over all cycles.
+        total['time_to_first_bug'] = report['time_to_first_bug']
+
+
+def format_island_reports(totals):
+    """
+    Format the merged stats of all islands as a single report, with one row
+    per island and a final row for the whole island model.
+
+    :param totals: A dictionary of merged stats for each island.
+    :return: The report as a string.
+    """
+
+    header = ["island", "cycles", "evaluations", "evals/s", "bugs",
+              "bugs/1k evals", "first bug (s)", "emigrants", "immigrants"]
+
+    def row(name, total):
+        evaluations, seconds = total['evaluations'], total['time']
+        first = total['time_to_first_bug']
+        return [str(name), str(total['cycles']), str(evaluations),
+                "%.1f" % (evaluations / seconds if seconds else 0),
+                str(total['bugs']),
+                "%.2f" % (1000 * total['bugs'] / evaluations
+                          if evaluations else 0),
+                "-" if first is None else "%.1f" % first,
+                str(total['emigrants']), str(total['immigrants'])]
+
+    rows = [row(i, totals[i]) for i in sorted(totals)]
+
+    if totals:
+        # Islands run concurrently, so the whole model has run for as long
+        # as its longest running island.
+        overall = {key: sum(t[key] for t in totals.values()) for key in
+                   ["cycles", "evaluations", "bugs", "emigrants",
+                    "immigrants"]}
+        overall['time'] = max(t['time'] for t in totals.values())
+        firsts = [t['time_to_first_bug'] for t in totals.values() if
+                  t['time_to_first_bug'] is not None]
+        overall['time_to_first_bug'] = min(firsts) if firsts else None
+        rows.append(row("all", overall))
+
+    return "\n".join("\t".join(r) for r in [header] + rows)
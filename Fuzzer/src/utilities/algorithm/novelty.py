@@ -0,0 +1,178 @@
+"""Novelty search over the behaviour of SQL statements.
+
+Each evaluated statement is described by a behaviour descriptor built from
+the outcome recorded by the fitness function: its error code, the verdict
+of the constraint oracle, the number of rows affected and the class and
+magnitude of the inserted value. The novelty of an individual is the mean
+distance from its descriptor to its NOVELTY_NEIGHBOURS nearest neighbours
+among the novelty archive and the rest of its generation. Nearest
+neighbours are found in batch, with a single KD-tree per generation."""
+
+import re
+
+import numpy as np
+from algorithm.parameters import params
+from scipy.spatial import cKDTree
+from utilities.stats import trackers
+
+ERRORS = [None, 1064, 3819, 1264, 1366, 1406]
+# Error codes with a dimension of their own in the behaviour descriptor. Any
+# other error code shares a single "other" dimension.
+
+VALUE_CLASSES = ["null", "integer", "decimal", "boolean", "empty_string",
+                 "numeric_string", "numeric_prefix", "string"]
+# Classes of inserted values, see get_value_class. These are also part of
+# the signatures of stored bugs, see db.bug_store.
+
+
+def get_value_class(value):
+    """
+    Return the class of a value inserted by a statement, e.g. "integer" for
+    +5 and "numeric_prefix" for '5a5'.
+
+    :param value: The value as extracted from the phenotype, or None.
+    :return: The class of the value and its magnitude.
+    """
+
+    if value is None or value.upper() == "NULL":
+        return "null", 0
+
+    elif re.fullmatch(r"[+-]?\d+", value):
+        return "integer", float(value)
+
+    elif re.fullmatch(r"[+-]?\d+\.\d+", value):
+        return "decimal", float(value)
+
+    elif value.lower() in ["true", "false"]:
+        return "boolean", float(value.lower() == "true")
+
+    # Quoted strings, the magnitude of which is their length unless they
+    # hold a number.
+    string = value.strip("'\"")
+
+    if not string:
+        return "empty_string", 0
+
+    elif re.fullmatch(r"[+-]?\d+(\.\d+)?", string):
+        # Strings which MySQL converts to a number, e.g. '5'.
+        return "numeric_string", float(string)
+
+    match = re.match(r"[+-]?\d+", string)
+    if match:
+        # Strings which MySQL may silently truncate to a number, e.g. '5a'.
+        return "numeric_prefix", float(match.group())
+
+    return "string", float(len(string))
+
+
+def get_descriptor(outcome):
+    """
+    Return the behaviour descriptor of an evaluated statement.
+
+    :param outcome: The outcome recorded on the individual by the fitness
+    function.
+    :return: A behaviour descriptor vector.
+    """
+
+    descriptor = np.zeros(len(ERRORS) + 1 + 2 + 1 + len(VALUE_CLASSES) + 1)
+
+    # One-hot error code.
+    errno = outcome['errno']
+    descriptor[ERRORS.index(errno) if errno in ERRORS else len(ERRORS)] = 1
+    i = len(ERRORS) + 1
+
+    # One-hot oracle verdict, neither is set if there was no verdict.
+    if outcome['verdict'] is not None:
+        descriptor[i if outcome['verdict'] else i + 1] = 1
+    i += 2
+
+    # Rows affected, on a log scale.
+    descriptor[i] = np.log10(1 + max(outcome['rowcount'], 0))
+    i += 1
+
+    # One-hot value class and signed magnitude of the value, on a log scale.
+    value_class, magnitude = get_value_class(outcome['value'])
+    descriptor[i + VALUE_CLASSES.index(value_class)] = 1
+    descriptor[-1] = np.sign(magnitude) * np.log10(1 + abs(magnitude))
+
+    return descriptor
+
+
+def assess_novelty(individuals):
+    """
+    Compute the novelty of a batch of evaluated individuals and set it as
+    ind.novelty. Individuals which were not run against the database (e.g.
+    invalids and cached phenotypes) re-discover known behaviour and have a
+    novelty of 0. The NOVELTY_ARCHIVE_ADD most novel individuals are then
+    added to the archive, which keeps at most NOVELTY_ARCHIVE_SIZE
+    descriptors.
+
+    :param individuals: A list of evaluated individuals.
+    :return: Nothing.
+    """
+
+    assessed, descriptors = [], []
+
+    for ind in individuals:
+        ind.novelty = 0
+        outcome = getattr(ind, "outcome", None)
+
+        if outcome is not None:
+            assessed.append(ind)
+            descriptors.append(get_descriptor(outcome))
+
+    if not assessed:
+        return
+
+    batch = np.array(descriptors)
+    points = np.vstack(trackers.novelty_archive + [batch])
+
+    # Each descriptor is its own nearest neighbour, so one more neighbour
+    # than needed is queried and the first is dropped.
+    k = min(params['NOVELTY_NEIGHBOURS'], len(points) - 1)
+
+    if k > 0:
+        distances, _ = cKDTree(points).query(batch, k=k + 1)
+        novelty = distances[:, 1:].mean(axis=1)
+
+        for ind, value in zip(assessed, novelty):
+            ind.novelty = value
+
+        # Archive the most novel behaviours of the batch.
+        for i in np.argsort(-novelty)[:params['NOVELTY_ARCHIVE_ADD']]:
+            trackers.novelty_archive.append(batch[i:i + 1])
+
+    else:
+        # The first behaviour seen is trivially novel.
+        trackers.novelty_archive.append(batch)
+
+    # Forget the oldest behaviours once the archive is full.
+    del trackers.novelty_archive[:-params['NOVELTY_ARCHIVE_SIZE']]
+
+
+def get_novelty(population):
+    """
+    Return the novelty of each individual of a population, 0 for individuals
+    whose novelty was not assessed.
+
+    :param population: A population of individuals.
+    :return: A vector of novelty values.
+    """
+
+    return np.fromiter((getattr(ind, "novelty", 0) for ind in population),
+                       dtype=np.float64, count=len(population))
+
+
+def add_novelty(scores, population):
+    """
+    Add NOVELTY_WEIGHT times the novelty of each individual to a vector of
+    fitness scores, where a larger score is better, making novelty a second
+    objective.
+
+    :param scores: A vector of fitness scores, as returned by
+    utilities.algorithm.ranking.get_fitness_scores.
+    :param population: The population of individuals with those scores.
+    :return: A vector of fitness scores including novelty.
+    """
+
+    return scores + params['NOVELTY_WEIGHT'] * get_novelty(population)
@@ -0,0 +1,259 @@
+"""Adaptive operator scheduling.
+
+Treats the variation operators listed in params['ADAPTIVE_CROSSOVERS'] and
+params['ADAPTIVE_MUTATIONS'] as the arms of a multi-armed bandit. Every
+offspring is tagged with the operators which produced it. Once the offspring
+has been evaluated, each of its operators is rewarded for the new error
+codes, new oracle disagreements and fitness improvement over its parents it
+yielded, per database statement spent on its evaluation. Operators are then
+chosen by probability matching over a recency-weighted average of their
+rewards, so the operator mix follows the search as it moves on."""
+
+from random import random
+
+import numpy as np
+from algorithm.parameters import params
+from utilities.stats import trackers
+
+
+def get_operators(kind):
+    """
+    Return the names of the operators scheduled for a kind of variation.
+
+    :param kind: Either "crossover" or "mutation".
+    :return: A list of operator names.
+    """
+
+    return params['ADAPTIVE_' + kind.upper() + 'S']
+
+
+def check_operators():
+    """
+    Check that every operator scheduled in params['ADAPTIVE_CROSSOVERS'] and
+    params['ADAPTIVE_MUTATIONS'] is an operator of operators.crossover or
+    operators.mutation respectively, so that a misspelt operator fails when
+    the params are set rather than in the middle of a generation.
+
+    :return: Nothing.
+    """
+
+    # Imported here, as the operator modules import the operator scheduler.
+    from operators import crossover, mutation
+
+    for kind, module in [("crossover", crossover), ("mutation", mutation)]:
+        names = get_operators(kind)
+
+        if not names:
+            s = "utilities.algorithm.operator_scheduler.check_operators\n" \
+                "Error: no %s operators are scheduled in params['ADAPTIVE_" \
+                "%sS']." % (kind, kind.upper())
+            raise Exception(s)
+
+        unknown = [name for name in names if not
+                   hasattr(getattr(module, name, None), "representation")]
+
+        if unknown:
+            s = "utilities.algorithm.operator_scheduler.check_operators\n" \
+                "Error: unknown %s operators %s in params['ADAPTIVE_%sS']. " \
+                "Scheduled operators must be named as in %s." % \
+                (kind, ", ".join(unknown), kind.upper(), module.__name__)
+            raise Exception(s)
+
+
+def get_operator_probabilities(kind):
+    """
+    Return the probability of choosing each scheduled operator of a kind of
+    variation. Probabilities are proportional to the average reward of each
+    operator, but never drop below params['ADAPTIVE_MIN_PROBABILITY'] so
+    that operators which have fallen out of favour can still recover.
+
+    :param kind: Either "crossover" or "mutation".
+    :return: A list of probabilities, one per operator in get_operators.
+    """
+
+    names = get_operators(kind)
+    rewards = np.array([trackers.operator_rewards.get((kind, name), 0)
+                        for name in names], dtype=float)
+
+    # A minimum probability above uniform would leave nothing to adapt.
+    p_min = min(params['ADAPTIVE_MIN_PROBABILITY'], 1 / len(names))
+
+    if rewards.sum() > 0:
+        return list(p_min + (1 - len(names) * p_min) * rewards /
+                    rewards.sum())
+
+    else:
+        # Nothing has been learned yet, choose uniformly.
+        return [1 / len(names)] * len(names)
+
+
+def choose_operator(kind):
+    """
+    Choose the next operator of a kind of variation by probability matching.
+
+    :param kind: Either "crossover" or "mutation".
+    :return: The name of the chosen operator.
+    """
+
+    names = get_operators(kind)
+    probabilities = get_operator_probabilities(kind)
+
+    r, total = random(), 0
+    for name, p in zip(names, probabilities):
+        total += p
+        if r < total:
+            return name
+
+    # Guard against floating point round-off in the cumulative sum.
+    return names[-1]
+
+
+def tag_crossover(children, name, parents):
+    """
+    Tag the children of a crossover with the operator which produced them.
+    Children are credited with any improvement over the better of their
+    parents.
+
+    :param children: The individuals produced by crossover.
+    :param name: The name of the crossover operator.
+    :param parents: The (evaluated) parents of the children.
+    :return: Nothing.
+    """
+
+    if isinstance(parents[0].fitness, list):
+        reference = None
+
+    else:
+        reference = max(parents).fitness
+
+    for child in children:
+        child.operators = ([("crossover", name)], reference)
+
+
+def tag_mutation(new_ind, name, ind):
+    """
+    Tag a mutated individual with the operator which produced it. The
+    mutated individual inherits the operators and reference fitness of an
+    unevaluated crossover child. An individual without tags has already been
+    evaluated and becomes the reference itself.
+
+    :param new_ind: The mutated individual.
+    :param name: The name of the mutation operator.
+    :param ind: The individual which was mutated.
+    :return: Nothing.
+    """
+
+    operators, reference = getattr(ind, "operators", ([], ind.fitness))
+
+    new_ind.operators = (operators + [("mutation", name)], reference)
+
+
+def get_reward(ind, reference):
+    """
+    Return the reward earned by an evaluated offspring: one unit for an
+    error code not yet seen in this run, one for an oracle disagreement not
+    yet seen in this run and one for improving on the reference fitness,
+    divided by the number of database statements spent on evaluating it.
+
+    :param ind: An evaluated individual.
+    :param reference: The fitness of the parent of the individual.
+    :return: The reward.
+    """
+
+    outcome = getattr(ind, "outcome", None)
+
+    if outcome is None:
+        # Offspring which were not run against the database (and offspring
+        # of fitness functions which do not report an outcome) are only
+        # rewarded for improvement.
+        return float(improves(ind.fitness, reference))
+
+    gain = 0
+
+    if outcome['errno'] is not None and \
+            outcome['errno'] not in trackers.seen_errors:
+        trackers.seen_errors.add(outcome['errno'])
+        gain += 1
+
+    if outcome['bug'] and outcome['value'] not in trackers.seen_disagreements:
+        trackers.seen_disagreements.add(outcome['value'])
+        gain += 1
+
+    if improves(ind.fitness, reference):
+        gain += 1
+
+    return gain / max(outcome['statements'], 1)
+
+
+def improves(fitness, reference):
+    """
+    Check whether a fitness is strictly better than a reference fitness.
+    NaN is worse than any other fitness. Multi-objective fitnesses are not
+    comparable and never improve.
+
+    :param fitness: A fitness value.
+    :param reference: The reference fitness value.
+    :return: True if fitness is better than reference.
+    """
+
+    if isinstance(fitness, list) or reference is None:
+        return False
+
+    elif np.isnan(fitness):
+        return False
+
+    elif np.isnan(reference):
+        return True
+
+    elif params['FITNESS_FUNCTION'].maximise:
+        return fitness > reference
+
+    else:
+        return fitness < reference
+
+
+def reward_operators(individuals):
+    """
+    Reward the operators which produced a list of evaluated offspring and
+    update the average reward of each operator. Tags are removed, so that
+    offspring are only rewarded once and become references for their own
+    offspring.
+
+    :param individuals: A list of evaluated individuals.
+    :return: Nothing.
+    """
+
+    rate = params['ADAPTIVE_LEARNING_RATE']
+
+    for ind in individuals:
+        if not hasattr(ind, "operators"):
+            # Initial, elite and immigrant individuals were not bred.
+            continue
+
+        operators, reference = ind.operators
+        del ind.operators
+
+        reward = get_reward(ind, reference)
+
+        for arm in operators:
+            # Recency-weighted average of the rewards of the operator.
+            old = trackers.operator_rewards.get(arm, 0)
+            trackers.operator_rewards[arm] = old + rate * (reward - old)
+
+
+def get_operator_stats():
+    """
+    Return the current probability of choosing each scheduled operator,
+    keyed by stat name.
+
+    :return: A dictionary of operator weights.
+    """
+
+    weights = {}
+
+    for kind in ["crossover", "mutation"]:
+        for name, p in zip(get_operators(kind),
+                           get_operator_probabilities(kind)):
+            weights["%s_weight_%s" % (kind, name)] = p
+
+    return weights
@@ -0,0 +1,171 @@
+import numpy as np
+from algorithm.parameters import params
+from utilities.algorithm.novelty import add_novelty, get_novelty
+from utilities.stats import trackers
+
+
+def get_fitness_scores(population):
+    """
+    Return the fitness of a single-objective population as a vector of
+    scores where a larger score is always better, regardless of whether
+    the fitness function is maximising or minimising. NaN fitnesses are
+    mapped to -inf so that, as in Individual.__lt__, they always compare
+    as the worst fitness. If params['NOVELTY'] is specified with a non-zero
+    NOVELTY_WEIGHT, the weighted novelty of each individual is added to its
+    score.
+
+    :param population: A population of individuals.
+    :return: A vector of fitness scores.
+    """
+
+    fitness = np.fromiter((ind.fitness for ind in population),
+                          dtype=np.float64, count=len(population))
+
+    if not params['FITNESS_FUNCTION'].maximise:
+        # Lower fitness is better.
+        fitness = -fitness
+
+    scores = np.where(np.isnan(fitness), -np.inf, fitness)
+
+    if params['NOVELTY'] and params['NOVELTY_WEIGHT']:
+        scores = add_novelty(scores, population)
+
+    return scores
+
+
+def get_tie_breaks(population):
+    """
+    Return the values which break ties between equal fitness scores. If
+    params['NOVELTY'] is specified with a NOVELTY_WEIGHT of 0, equal scores
+    are ranked on novelty, without novelty ever outweighing a difference in
+    fitness.
+
+    :param population: A population of individuals.
+    :return: A vector of tie breaks, where a larger value is better, or None
+    if ties are not broken.
+    """
+
+    if params['NOVELTY'] and not params['NOVELTY_WEIGHT']:
+        return get_novelty(population)
+
+    return None
+
+
+def get_rank_key(scores, ties, index):
+    """
+    Return a key by which an entry of one vector of fitness scores can be
+    compared with an entry of another, ranking equal scores on their tie
+    breaks.
+
+    :param scores: A vector of fitness scores.
+    :param ties: A vector of tie breaks, as returned by get_tie_breaks.
+    :param index: An index into the scores vector.
+    :return: A tuple, where a larger tuple is better.
+    """
+
+    return scores[index], 0 if ties is None else ties[index]
+
+
+def best_index(scores, ties=None):
+    """
+    Return the index of the best score, ranking equal scores on their tie
+    breaks. The first of equally ranked scores is returned.
+
+    :param scores: A vector of fitness scores.
+    :param ties: A vector of tie breaks, as returned by get_tie_breaks.
+    :return: An index into the scores vector.
+    """
+
+    if ties is None:
+        return int(np.argmax(scores))
+
+    return int(np.argmax(np.where(scores == scores.max(), ties, -np.inf)))
+
+
+def worst_index(scores, ties=None):
+    """
+    Return the index of the worst score, ranking equal scores on their tie
+    breaks. The first of equally ranked scores is returned.
+
+    :param scores: A vector of fitness scores.
+    :param ties: A vector of tie breaks, as returned by get_tie_breaks.
+    :return: An index into the scores vector.
+    """
+
+    if ties is None:
+        return int(np.argmin(scores))
+
+    return int(np.argmin(np.where(scores == scores.min(), ties, np.inf)))
+
+
+def top_indices(scores, k=None, ties=None):
+    """
+    Return the indices of the k best scores, best first. Only the k best
+    scores are sorted, the rest of the vector is partitioned, so finding a
+    handful of elites in a large population costs O(n + k log k) rather
+    than a full sort. Equal scores keep their original relative order, as
+    with a stable list.sort(reverse=True) of individuals. If k is None all
+    indices are returned. If tie breaks are given, equal scores are ranked
+    on their tie breaks instead.
+
+    :param scores: A vector of fitness scores.
+    :param k: The number of best indices to return.
+    :param ties: A vector of tie breaks, as returned by get_tie_breaks.
+    :return: A vector of indices into the scores vector.
+    """
+
+    if ties is not None:
+        # Sort on scores, then on tie breaks. lexsort sorts on its last key
+        # first and is stable.
+        idx = np.lexsort((-ties, -scores))
+        return idx if k is None else idx[:max(k, 0)]
+
+    if k is None or k >= len(scores):
+        # All indices are required.
+        idx = np.arange(len(scores))
+
+    elif k <= 0:
+        return np.arange(0)
+
+    else:
+        # Find the k-th best score by partitioning. All better scores are
+        # kept, and entries tied with it are taken in their original order
+        # until there are k indices.
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        better = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)[:k - len(better)]
+        idx = np.sort(np.concatenate((better, tied)))
+
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def record_best(population, best):
+    """
+    Record the best individual of a population which has already been
+    ranked (e.g. by replacement), so that it does not need to be found again
+    when generating statistics for the same population.
+
+    :param population: A population of individuals.
+    :param best: The best individual in the population.
+    :return: Nothing.
+    """
+
+    trackers.ranked_population = population
+    trackers.ranked_best = best
+
+
+def get_best(population):
+    """
+    Return the best individual in a single-objective population. If the
+    population was ranked and recorded with record_best, the recorded
+    individual is returned directly.
+
+    :param population: A population of individuals.
+    :return: The best individual in the population.
+    """
+
+    if trackers.ranked_population is population:
+        return trackers.ranked_best
+
+    return population[best_index(get_fitness_scores(population),
+                                 get_tie_breaks(population))]
@@ -0,0 +1,117 @@
+"""SMT-guided immigrants.
+
+A background process translates the table's check constraints into SMT with
+constraint_smt and asks z3 for literals on both sides of each boundary. Each
+literal is written as a statement and reverse-mapped into a genome, and the
+genomes are handed back in batches. At every SMT_INTERVAL generations the
+search loop takes the batches waiting for it without blocking and lets them
+replace the worst individuals in the population, as migrants do in the
+island model. Solving never holds up evolution, and once z3 runs out of
+literals the population simply receives no more immigrants."""
+
+from multiprocessing import Process, Queue
+from queue import Empty
+
+from algorithm.parameters import params
+from operators.boundary_seeding import STATEMENTS, format_number, reverse_map
+from representation.individual import Individual
+from utilities.algorithm.islands import accept_immigrants
+
+
+class SMTImmigrants:
+    """
+    A background process generating immigrants on the boundaries of a list
+    of check constraints.
+    """
+
+    def __init__(self, constraints):
+        """
+        Start generating immigrants.
+
+        :param constraints: A list of constraints, as parsed by
+        constraint_oracle.ConstraintOracle.
+        """
+
+        # A couple of batches are solved ahead of the search loop.
+        self.batches = Queue(maxsize=2)
+
+        self.process = Process(target=generate_genomes,
+                               args=(constraints, self.batches),
+                               daemon=True)
+        self.process.start()
+
+    def immigrate(self, individuals, cnx, cursor, logger, cycle_number):
+        """
+        Let the immigrants generated so far replace the worst individuals in
+        the population.
+
+        :param individuals: The population.
+        :return: The population after immigration.
+        """
+
+        immigrants = []
+
+        try:
+            while True:
+                immigrants.extend(Individual(genome, None) for genome in
+                                  self.batches.get_nowait())
+
+        except Empty:
+            pass
+
+        # Never let immigrants take over the entire population.
+        immigrants = immigrants[:len(individuals) - 1]
+
+        return accept_immigrants(individuals, immigrants, cnx, cursor, logger,
+                                 cycle_number)
+
+    def stop(self):
+        """
+        Stop generating immigrants.
+
+        :return: Nothing.
+        """
+
+        self.process.terminate()
+        self.process.join()
+
+
+def generate_genomes(constraints, batches):
+    """
+    Generate batches of SMT_BATCH_SIZE genomes of statements on the
+    boundaries of a list of check constraints and put them on a queue. Runs
+    in its own process. Statements alternate between the statement types
+    and literals which the grammar cannot produce are skipped.
+
+    :param constraints: A list of constraints, as parsed by
+    constraint_oracle.ConstraintOracle.
+    :param batches: A queue on which to put lists of genomes.
+    :return: Nothing.
+    """
+
+    # Imported here so that z3 is only loaded by the solving process.
+    from constraint_smt import generate_literals
+
+    batch = []
+
+    for kind, literal in generate_literals(constraints, params['SMT_TIMEOUT']):
+        if kind == "number":
+            literal = format_number(literal)
+        else:
+            literal = "'%s'" % literal
+
+        if literal is None:
+            continue
+
+        genome = reverse_map(STATEMENTS[len(batch) % len(STATEMENTS)] %
+                             literal)
+
+        if genome is not None:
+            batch.append(genome)
+
+        if len(batch) == params['SMT_BATCH_SIZE']:
+            batches.put(batch)
+            batch = []
+
+    if batch:
+        batches.put(batch)
@@ -0,0 +1,113 @@
+import numpy as np
+from algorithm.parameters import params
+
+
+def pack_genomes(individuals):
+    """
+    Pack the linear genomes of a population into a single zero-padded
+    matrix. Row i of the matrix holds the genome of individual i, the
+    accompanying length vector gives the number of codons in each row.
+
+    :param individuals: A population of individuals.
+    :return: A (population size x longest genome) matrix of codons and a
+    vector of genome lengths.
+    """
+
+    lengths = np.fromiter((len(ind.genome) if ind.genome else 0
+                           for ind in individuals), dtype=np.int64,
+                          count=len(individuals))
+
+    matrix = np.zeros((len(individuals), max(lengths.max(initial=0), 1)),
+                      dtype=np.int64)
+
+    for i, ind in enumerate(individuals):
+        if lengths[i]:
+            matrix[i, :lengths[i]] = ind.genome
+
+    return matrix, lengths
+
+
+def unpack_genomes(matrix, lengths):
+    """
+    Inverse of pack_genomes. Strip the padding from each row of a genome
+    matrix and return the genomes as lists of ints.
+
+    :param matrix: A zero-padded matrix of codons.
+    :param lengths: A vector of genome lengths.
+    :return: A list of genomes.
+    """
+
+    return [row[:length] for row, length in
+            zip(matrix.tolist(), lengths.tolist())]
+
+
+def get_used_lengths(individuals, lengths):
+    """
+    Return the vector of maximum indices across which linear operations
+    are to be performed for each individual. This is the vectorised
+    equivalent of operators.crossover.get_max_genome_index and
+    operators.mutation.get_effective_length: the used portion of the genome
+    if params['WITHIN_USED'] is set and the individual is valid, else the
+    entire length of the genome.
+
+    :param individuals: A population of individuals.
+    :param lengths: A vector of genome lengths, as returned by pack_genomes.
+    :return: A vector of effective genome lengths.
+    """
+
+    if not params['WITHIN_USED']:
+        return lengths.copy()
+
+    used = np.fromiter((len(ind.genome) if ind.invalid else ind.used_codons
+                        for ind in individuals), dtype=np.float64,
+                       count=len(individuals))
+
+    return np.minimum(np.nan_to_num(used, nan=0).astype(np.int64), lengths)
+
+
+def splice_genomes(matrix, lengths, rows, starts, stops):
+    """
+    Build a new genome matrix where each new genome is the concatenation of
+    a number of slices taken from rows of an existing genome matrix, i.e.
+
+        new[i] = matrix[rows[i, 0]][starts[i, 0]:stops[i, 0]] +
+                 matrix[rows[i, 1]][starts[i, 1]:stops[i, 1]] + ...
+
+    Slice bounds are clipped to the genome lengths in the same way as
+    Python list slicing, so that all linear crossover operators can be
+    expressed as a set of slices.
+
+    :param matrix: A zero-padded matrix of codons.
+    :param lengths: A vector of genome lengths.
+    :param rows: An (n x segments) matrix of source rows.
+    :param starts: An (n x segments) matrix of slice starts.
+    :param stops: An (n x segments) matrix of slice stops.
+    :return: The new zero-padded genome matrix and its length vector.
+    """
+
+    # Clip slices to the lengths of their source genomes.
+    src_lengths = lengths[rows]
+    stops = np.clip(stops, 0, src_lengths)
+    starts = np.clip(starts, 0, stops)
+
+    # Find where each segment begins in the new genomes.
+    seg_lengths = stops - starts
+    ends = np.cumsum(seg_lengths, axis=1)
+    begins = ends - seg_lengths
+    new_lengths = ends[:, -1]
+
+    # For every column of the new matrix find the segment it falls in.
+    cols = np.arange(max(new_lengths.max(initial=0), 1))
+    seg = (cols[None, :, None] >= ends[:, None, :]).sum(axis=2)
+    seg = np.minimum(seg, rows.shape[1] - 1)
+
+    # Map each column back to a row and column of the source matrix.
+    src_rows = np.take_along_axis(rows, seg, axis=1)
+    src_cols = np.take_along_axis(starts, seg, axis=1) + cols[None, :] - \
+        np.take_along_axis(begins, seg, axis=1)
+    src_cols = np.clip(src_cols, 0, matrix.shape[1] - 1)
+
+    new_matrix = matrix[src_rows, src_cols]
+    new_matrix[cols[None, :] >= new_lengths[:, None]] = 0
+
+    return new_matrix, new_lengths
@@ -6,50 +6,6 @@ from algorithm.parameters import params
 from utilities.stats import trackers
 
 
-def save_stats_to_file(stats, end=False):
-    """
-    Write the results to a results file for later analysis
-
-    :param stats: The stats.stats.stats dictionary.
-    :param end: A boolean flag indicating whether or not the evolutionary
-    process has finished.
-    :return: Nothing.
-    """
-
-    if params['VERBOSE']:
-        filename = path.join(params['FILE_PATH'], "stats.tsv")
-        savefile = open(filename, 'a')
-        for stat in sorted(stats.keys()):
-            savefile.write(str(stats[stat]) + "\t")
-        savefile.write("\n")
-        savefile.close()
-
-    elif end:
-        filename = path.join(params['FILE_PATH'], "stats.tsv")
-        savefile = open(filename, 'a')
-        for item in trackers.stats_list:
-            for stat in sorted(item.keys()):
-                savefile.write(str(item[stat]) + "\t")
-            savefile.write("\n")
-        savefile.close()
-
-
-def save_stats_headers(stats):
-    """
-    Saves the headers for all stats in the stats dictionary.
-
-    :param stats: The stats.stats.stats dictionary.
-    :return: Nothing.
-    """
-
-    filename = path.join(params['FILE_PATH'], "stats.tsv")
-    savefile = open(filename, 'w')
-    for stat in sorted(stats.keys()):
-        savefile.write(str(stat) + "\t")
-    savefile.write("\n")
-    savefile.close()
-
-
 def save_best_ind_to_file(stats, ind, end=False, name="best"):
     """
     Saves the best individual to a file.
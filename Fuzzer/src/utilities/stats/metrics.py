@@ -0,0 +1,289 @@
+"""Live metrics of a fuzzing campaign, served over HTTP.
+
+If params['METRICS_PORT'] is set, a background thread serves the metrics of
+the current process at http://127.0.0.1:[METRICS_PORT]/metrics in the
+Prometheus text exposition format. Counters are updated from the evaluation
+path, while gauges (e.g. the current generation) are read when the metrics
+are scraped. Islands serve their own metrics, on consecutive ports from
+METRICS_PORT, while multi-agent shards send what they record to the process
+serving the metrics, see take_metrics. Nothing is recorded unless the server
+is running."""
+
+from bisect import bisect_left
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import time
+
+from stats.stats import stats
+from utilities.stats import trackers
+
+ERRNOS = [1064, 3819, 1264, 1366, 1406]
+# Error codes counted separately, all others are counted as "other".
+
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1, 2.5, 5]
+# Upper bounds of the buckets of latency histograms, in seconds.
+
+enabled = False
+# Whether metrics are recorded, i.e. whether the server is running.
+
+lock = Lock()
+# Metrics are recorded by several threads, e.g. asynchronous evaluators.
+
+
+class Histogram:
+    """
+    A Prometheus histogram of latencies.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+
+    def format(self, name):
+        lines, total = [], 0
+
+        for bound, count in zip(LATENCY_BUCKETS + ["+Inf"], self.counts):
+            total += count
+            lines.append('%s_bucket{le="%s"} %d' % (name, bound, total))
+
+        lines.extend(["%s_sum %f" % (name, self.sum),
+                      "%s_count %d" % (name, total)])
+
+        return lines
+
+
+counters = {
+    "statements": 0,
+    "errors": {str(errno): 0 for errno in ERRNOS + ["other"]},
+    "verdicts": {"agree": 0, "disagree": 0},
+    "cache": {"hit": 0, "miss": 0},
+    "ddl": {"accepted": 0, "rejected": 0},
+}
+# Counters of everything recorded since the server was started.
+
+histograms = {
+    "evaluation": Histogram(),
+    "statement": Histogram(),
+}
+# Latency histograms of whole evaluations and of their first statement.
+
+cycle = 0
+# The current fuzzing cycle.
+
+last_scrape = [time(), 0]
+# The time and number of statements at the previous scrape, from which the
+# current rate of statements is computed.
+
+
+def record_evaluation(outcome, seconds):
+    """
+    Record the outcome of evaluating an individual, as reported by the
+    fitness function.
+
+    :param outcome: The outcome of an individual, or None if the fitness
+    function did not report one.
+    :param seconds: The time taken to evaluate the individual.
+    :return: Nothing.
+    """
+
+    with lock:
+        histograms["evaluation"].observe(seconds)
+
+        if outcome is None:
+            return
+
+        counters["statements"] += outcome["statements"]
+
+        if outcome["errno"] is not None:
+            errno = str(outcome["errno"])
+            errors = counters["errors"]
+            errors[errno if errno in errors else "other"] += 1
+
+        if outcome["verdict"] is not None:
+            counters["verdicts"]["disagree" if outcome["bug"] else "agree"] += 1
+
+        if outcome.get("latency") is not None:
+            histograms["statement"].observe(outcome["latency"])
+
+
+def record(counter, label):
+    """
+    Increment a labelled counter, e.g. record("cache", "hit").
+
+    :param counter: The name of the counter.
+    :param label: The label of the value to increment.
+    :return: Nothing.
+    """
+
+    with lock:
+        counters[counter][label] += 1
+
+
+def take_metrics():
+    """
+    Return everything recorded since the previous call, and reset it. Used
+    by forked processes, e.g. multi-agent shards, which inherit the
+    recording of their parent but not its server, to send what they record
+    to the parent, see merge_metrics.
+
+    :return: The counters and histograms recorded since the previous call.
+    """
+
+    global histograms
+
+    with lock:
+        recorded = deepcopy(counters), histograms
+
+        for name, counter in counters.items():
+            if isinstance(counter, dict):
+                for label in counter:
+                    counter[label] = 0
+            else:
+                counters[name] = 0
+
+        histograms = {name: Histogram() for name in histograms}
+
+    return recorded
+
+
+def merge_metrics(recorded):
+    """
+    Add the metrics recorded by another process to those of this process.
+
+    :param recorded: The counters and histograms returned by take_metrics.
+    :return: Nothing.
+    """
+
+    recorded_counters, recorded_histograms = recorded
+
+    with lock:
+        for name, counter in recorded_counters.items():
+            if isinstance(counter, dict):
+                for label, count in counter.items():
+                    counters[name][label] += count
+            else:
+                counters[name] += counter
+
+        for name, histogram in recorded_histograms.items():
+            histograms[name].merge(histogram)
+
+
+def get_ratio(counter, label):
+    """
+    Return the share of a labelled counter with a given label.
+
+    :param counter: The name of the counter.
+    :param label: The label of the value.
+    :return: The ratio of the value to the total, or 0 if it is empty.
+    """
+
+    total = sum(counters[counter].values())
+
+    return counters[counter][label] / total if total else 0
+
+
+def format_metrics():
+    """
+    Write all metrics in the Prometheus text exposition format.
+
+    :return: A string.
+    """
+
+    with lock:
+        now, statements = time(), counters["statements"]
+        rate = (statements - last_scrape[1]) / max(now - last_scrape[0], 1e-9)
+        last_scrape[:] = [now, statements]
+
+        lines = [
+            "# TYPE fuzzer_statements_total counter",
+            "fuzzer_statements_total %d" % statements,
+            "# TYPE fuzzer_statements_per_second gauge",
+            "fuzzer_statements_per_second %f" % rate,
+            "# TYPE fuzzer_statement_errors_total counter",
+        ]
+        lines.extend('fuzzer_statement_errors_total{errno="%s"} %d' % item
+                     for item in counters["errors"].items())
+
+        lines.append("# TYPE fuzzer_oracle_verdicts_total counter")
+        lines.extend('fuzzer_oracle_verdicts_total{result="%s"} %d' % item
+                     for item in counters["verdicts"].items())
+
+        lines.append("# TYPE fuzzer_cache_lookups_total counter")
+        lines.extend('fuzzer_cache_lookups_total{result="%s"} %d' % item
+                     for item in counters["cache"].items())
+        lines.extend(["# TYPE fuzzer_cache_hit_ratio gauge",
+                      "fuzzer_cache_hit_ratio %f" % get_ratio("cache", "hit")])
+
+        lines.append("# TYPE fuzzer_ddl_total counter")
+        lines.extend('fuzzer_ddl_total{result="%s"} %d' % item
+                     for item in counters["ddl"].items())
+        lines.extend(["# TYPE fuzzer_ddl_rejection_ratio gauge",
+                      "fuzzer_ddl_rejection_ratio %f" %
+                      get_ratio("ddl", "rejected")])
+
+        lines.extend(["# TYPE fuzzer_cycle gauge",
+                      "fuzzer_cycle %d" % cycle,
+                      "# TYPE fuzzer_generation gauge",
+                      "fuzzer_generation %d" % stats['gen'],
+                      "# TYPE fuzzer_bugs gauge",
+                      "fuzzer_bugs %d" % trackers.bugs_found])
+
+        for name, histogram in histograms.items():
+            metric = "fuzzer_%s_latency_seconds" % name
+            lines.append("# TYPE %s histogram" % metric)
+            lines.extend(histogram.format(metric))
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    Serves the metrics at /metrics.
+    """
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = format_metrics().encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are not logged.
+        pass
+
+
+def start_metrics_server(port):
+    """
+    Start serving metrics on a local port from a background thread, and
+    start recording them.
+
+    :param port: The port on which to serve the metrics.
+    :return: The server.
+    """
+
+    global enabled
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    server.daemon_threads = True
+
+    Thread(target=server.serve_forever, daemon=True).start()
+    enabled = True
+
+    return server
@@ -0,0 +1,158 @@
+"""Sampling profiler of fuzzing cycles.
+
+If params['PROFILE'] is set, the first PROFILE cycles are profiled by a
+background thread which samples the Python stacks of the cycle and of its
+asynchronous evaluators every PROFILE_INTERVAL seconds. Nothing is traced
+between samples, so the cycle runs at full speed. Samples taken while a
+thread is in mysql.connector (i.e. waiting on the server) are attributed to
+"mysql", and all others to "cpu", the time spent in the engine itself.
+
+The samples of each cycle are written in the collapsed stack format, e.g.
+
+    cpu;ponyge:run_cycles;ponyge:DBFuzzer.run_fuzzing_cycle;... 42
+
+to profile_cycle[N].folded in the results folder of the cycle, from which
+flame graphs can be drawn with e.g. flamegraph.pl or speedscope. In debug
+mode, where no results folder is created, profiles are written to the logs
+folder instead."""
+
+import sys
+from collections import Counter
+from contextlib import nullcontext
+from os import makedirs, path
+from threading import Event, Thread, enumerate as enumerate_threads, get_ident
+
+from algorithm.parameters import params
+
+cycles = 0
+# The number of cycles to profile, from the first one.
+
+interval = 0.005
+# The time between samples, in seconds.
+
+EVALUATOR_PREFIX = "evaluator"
+# The name prefix of asynchronous evaluator threads, which are sampled along
+# with the thread running the cycle.
+
+MYSQL_MODULE = "mysql.connector"
+# Samples within this package are attributed to waiting on the server.
+
+LOGS_PATH = path.join(path.dirname(__file__), "..", "..", "logs")
+# The folder of profiles in debug mode.
+
+NULL_PROFILER = nullcontext()
+# The profiler of every cycle which is not profiled.
+
+
+class SamplingProfiler:
+    """
+    A context manager sampling the stacks of a fuzzing cycle from a
+    background thread, and writing them when the cycle ends.
+    """
+
+    def __init__(self, cycle_number):
+        self.cycle_number = cycle_number
+        self.samples = Counter()
+        self.labels = {}
+        self.stopped = Event()
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.target = get_ident()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+        self.write()
+
+    def run(self):
+        """
+        Sample the stacks of the cycle until it ends.
+
+        :return: Nothing.
+        """
+
+        while not self.stopped.wait(interval):
+            threads = [thread.ident for thread in enumerate_threads() if
+                       thread.ident == self.target or
+                       thread.name.startswith(EVALUATOR_PREFIX)]
+            frames = sys._current_frames()
+
+            for ident in threads:
+                if ident in frames:
+                    self.samples[self.get_stack(frames[ident])] += 1
+
+    def get_stack(self, frame):
+        """
+        Collapse a stack into a single string, from its outermost frame,
+        prefixed with whether it is waiting on the server.
+
+        :param frame: The innermost frame of a stack.
+        :return: A string.
+        """
+
+        stack, category = [], "cpu"
+
+        while frame is not None:
+            code = frame.f_code
+
+            if code not in self.labels:
+                module = frame.f_globals.get("__name__", "?")
+                self.labels[code] = (
+                    "%s:%s" % (module, getattr(code, "co_qualname",
+                                               code.co_name)),
+                    module.startswith(MYSQL_MODULE))
+
+            label, in_mysql = self.labels[code]
+            stack.append(label)
+
+            if in_mysql:
+                category = "mysql"
+
+            frame = frame.f_back
+
+        stack.append(category)
+
+        return ";".join(reversed(stack))
+
+    def write(self):
+        """
+        Write the samples of the cycle in the collapsed stack format.
+
+        :return: Nothing.
+        """
+
+        if params['DEBUG'] or not params.get('FILE_PATH'):
+            folder = LOGS_PATH
+            name = "profile_%s_cycle%d.folded" % (params.get('TIME_STAMP'),
+                                                  self.cycle_number)
+        else:
+            folder = params['FILE_PATH']
+            name = "profile_cycle%d.folded" % self.cycle_number
+
+        makedirs(folder, exist_ok=True)
+
+        with open(path.join(folder, name), "w") as file:
+            for stack, count in self.samples.most_common():
+                file.write("%s %d\n" % (stack, count))
+
+
+def profile_cycle(cycle_number):
+    """
+    Profile a fuzzing cycle if it is one of the first params['PROFILE']
+    cycles, e.g.
+
+        with profile_cycle(cycle_number):
+            fuzzer.run_fuzzing_cycle()
+
+    :param cycle_number: The number of the cycle.
+    :return: A context manager profiling the cycle, or a null context if
+    the cycle is not profiled.
+    """
+
+    if cycle_number > cycles:
+        return NULL_PROFILER
+
+    return SamplingProfiler(cycle_number)
@@ -0,0 +1,243 @@
+"""Buffered columnar storage of per-generation stats.
+
+Rather than appending each generation to a text file, stats are appended to
+an in-memory buffer and written out by a background thread, in chunks of
+rows, to a binary file of numpy record arrays. Every fuzzing cycle is a new
+run with its own results folder, but the buffer lives for the whole process
+and writes to the folder holding the runs, in one file per process:
+
+    results/[EXPERIMENT_NAME]/stats_[pid].npy
+
+Each row records the run (its time stamp) and the process it came from, so
+the stats of many cycles and many processes (e.g. islands) can be loaded
+back together with load_stats."""
+
+import atexit
+import glob
+import numbers
+from os import getpid, path
+from threading import Condition, Lock, Thread
+
+import numpy as np
+import pandas as pd
+from algorithm.parameters import params
+
+FILE_PREFIX = "stats_"
+# The prefix of the stats files of each process.
+
+KEY_COLUMNS = ["run", "process"]
+# Columns identifying the origin of each row, added to the stats.
+
+
+class StatsBuffer:
+    """
+    An in-memory buffer of stats rows, flushed to disk by a background
+    thread every STATS_FLUSH_INTERVAL seconds or as soon as
+    STATS_FLUSH_ROWS rows are waiting.
+    """
+
+    def __init__(self):
+        self.rows, self.folder, self.pending = [], None, False
+        self.condition, self.writing = Condition(), Lock()
+        self.thread, self.pid = None, None
+
+    def append(self, values, folder):
+        """
+        Add a row of stats to the buffer.
+
+        :param values: A dictionary of stats.
+        :param folder: The folder in which the stats file is kept.
+        :return: Nothing.
+        """
+
+        self.start()
+
+        row = {stat: get_number(value) for stat, value in values.items()}
+        row['run'] = str(params['TIME_STAMP'])
+        row['process'] = self.pid
+
+        with self.condition:
+            if folder != self.folder and self.rows:
+                # Rows are never written to another folder than their own.
+                self.write(*self.take())
+
+            self.folder = folder
+            self.rows.append(row)
+
+            if len(self.rows) >= params['STATS_FLUSH_ROWS']:
+                self.condition.notify()
+
+    def request_flush(self):
+        """
+        Ask the flushing thread to write all buffered rows to disk, without
+        waiting for it to do so.
+
+        :return: Nothing.
+        """
+
+        with self.condition:
+            self.pending = True
+            self.condition.notify()
+
+    def start(self):
+        """
+        Start the flushing thread of the current process, if it isn't
+        running. A process forked from another does not inherit its thread.
+
+        :return: Nothing.
+        """
+
+        if self.pid == getpid():
+            return
+
+        self.pid = getpid()
+        self.rows, self.folder = [], None
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """
+        Flush the buffer whenever it is full or the flush interval has
+        passed. Runs in the flushing thread.
+
+        :return: Nothing.
+        """
+
+        while True:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.pending or
+                    len(self.rows) >= params['STATS_FLUSH_ROWS'],
+                    timeout=params['STATS_FLUSH_INTERVAL'])
+                rows, folder = self.take()
+
+            # Disk writes happen outside the lock, so the search never waits
+            # for them.
+            self.write(rows, folder)
+
+    def flush(self):
+        """
+        Write all buffered rows to disk now.
+
+        :return: Nothing.
+        """
+
+        with self.condition:
+            self.write(*self.take())
+
+    def take(self):
+        """
+        Take all rows from the buffer. The lock must be held.
+
+        :return: The rows and the folder they belong in.
+        """
+
+        rows, self.rows, self.pending = self.rows, [], False
+        return rows, self.folder
+
+    def write(self, rows, folder):
+        """
+        Append rows to the stats file of the current process as a single
+        record array.
+
+        :param rows: A list of rows.
+        :param folder: The folder in which the stats file is kept.
+        :return: Nothing.
+        """
+
+        if not rows:
+            return
+
+        columns = sorted({stat for row in rows for stat in row})
+        dtype = [(stat, "U64" if stat == "run" else np.float64)
+                 for stat in columns]
+
+        chunk = np.array(
+            [tuple(row.get(stat, "" if stat == "run" else np.nan)
+                   for stat in columns) for row in rows], dtype=dtype)
+
+        filename = path.join(folder, FILE_PREFIX + str(getpid()) + ".npy")
+
+        # Chunks are written whole, one at a time.
+        with self.writing, open(filename, "ab") as savefile:
+            np.save(savefile, chunk, allow_pickle=False)
+
+
+buffer = StatsBuffer()
+# The stats buffer of the current process.
+
+# Don't lose the last rows of a process.
+atexit.register(buffer.flush)
+
+
+def get_number(value):
+    """
+    Convert a stat to a number for a numeric column. Stats without a single
+    numeric value (e.g. None, or the fitness vector of a multi-objective
+    individual) become NaN.
+
+    :param value: A stat.
+    :return: A float.
+    """
+
+    if isinstance(value, (numbers.Number, np.number)):
+        return float(value)
+
+    return np.nan
+
+
+def buffer_stats(values):
+    """
+    Add the stats of a generation to the stats buffer of the current
+    process.
+
+    :param values: A dictionary of stats.
+    :return: Nothing.
+    """
+
+    buffer.append(values, path.dirname(params['FILE_PATH']))
+
+
+def flush_stats():
+    """
+    Have the stats buffered so far written to disk in the background, e.g.
+    at the end of a run.
+
+    :return: Nothing.
+    """
+
+    buffer.request_flush()
+
+
+def load_stats(folder):
+    """
+    Load all stats saved in a folder, by all processes, into a single table.
+    Stats which are missing from some rows (e.g. because they were added
+    by a later version, or only in some runs) are NaN in those rows.
+
+    :param folder: A folder holding stats files, e.g.
+    results/[EXPERIMENT_NAME].
+    :return: A pandas DataFrame with a row per generation of each run, and
+    a column per stat.
+    """
+
+    chunks = []
+
+    for filename in sorted(glob.glob(path.join(folder, FILE_PREFIX +
+                                                "*.npy"))):
+        with open(filename, "rb") as loadfile:
+            while True:
+                try:
+                    chunks.append(pd.DataFrame(np.load(loadfile)))
+                except (EOFError, ValueError):
+                    # The end of the file, or a chunk cut short by a crash.
+                    break
+
+    if not chunks:
+        return pd.DataFrame(columns=KEY_COLUMNS)
+
+    stats = pd.concat(chunks, ignore_index=True, sort=True)
+    stats['process'] = stats['process'].astype(int)
+
+    return stats
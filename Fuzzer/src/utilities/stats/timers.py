@@ -0,0 +1,101 @@
+"""Per-phase timers of the fuzzing loop.
+
+The phases of a fuzzing cycle (e.g. DDL generation, mapping, SQL execution,
+the oracle) are timed with perf_counter_ns and accumulated both for the
+current generation and for the whole cycle, and reported by stats.stats as
+phase_[name] stats, in seconds. Phases may nest (e.g. "sql" and "oracle" are
+part of "evaluation"), so the times of all phases do not add up to the time
+of a generation.
+
+Timers are off unless params['TIMERS'] is set, in which case timing a phase
+only costs checking a flag and entering a shared null context."""
+
+from contextlib import nullcontext
+from threading import Lock
+from time import perf_counter_ns
+
+PREFIX = "phase_"
+# The prefix of the stats reporting the time of each phase.
+
+enabled = False
+# Whether phases are timed.
+
+generation_times, cycle_times = {}, {}
+# The nanoseconds spent in each phase in the current generation and cycle.
+
+lock = Lock()
+# Phases may be timed by several threads, e.g. asynchronous evaluators.
+
+NULL_TIMER = nullcontext()
+# The timer of every phase when timers are off.
+
+
+class PhaseTimer:
+    """
+    A context manager adding the time spent within it to a phase.
+    """
+
+    __slots__ = ["phase", "start"]
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = perf_counter_ns() - self.start
+
+        with lock:
+            generation_times[self.phase] = \
+                generation_times.get(self.phase, 0) + elapsed
+            cycle_times[self.phase] = cycle_times.get(self.phase, 0) + elapsed
+
+
+def timer(phase):
+    """
+    Time a phase, e.g.
+
+        with timer("oracle"):
+            ...
+
+    :param phase: The name of the phase.
+    :return: A context manager timing the phase, or a null context if
+    timers are off.
+    """
+
+    if not enabled:
+        return NULL_TIMER
+
+    return PhaseTimer(phase)
+
+
+def start_cycle():
+    """
+    Reset the times of all phases at the start of a fuzzing cycle.
+
+    :return: Nothing.
+    """
+
+    with lock:
+        generation_times.clear()
+        cycle_times.clear()
+
+
+def get_phase_stats(end=False):
+    """
+    Return the time spent in each phase in the generation since the last
+    call, or in the whole cycle at the end of a run.
+
+    :param end: Boolean flag for indicating the end of an evolutionary run.
+    :return: A dictionary of phase_[name] stats, in seconds.
+    """
+
+    with lock:
+        times = cycle_times if end else generation_times
+        phase_stats = {PREFIX + phase: elapsed / 1e9 for phase, elapsed in
+                       sorted(times.items())}
+        generation_times.clear()
+
+    return phase_stats
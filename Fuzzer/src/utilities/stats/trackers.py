@@ -21,9 +21,38 @@ time_list = []
 # time_list stores the system time after each generation has been completed.
 # Useful for keeping track of how long each generation takes.
 
-stats_list = []
-# List for storing stats at each generation
-# Used when verbose mode is off to speed up program
-
 best_ever = None
 # Store the best ever individual here.
+
+run_start_time, first_bug_time = None, None
+# The system time at the start of the current run and the time at which the
+# first potential bug of the run was found.
+
+evaluations, bugs_found = 0, 0
+# The number of fitness evaluations and potential bugs in the current run.
+
+ranked_population, ranked_best = None, None
+# The last population ranked during replacement and its best individual.
+# Allows the stats to re-use the ordering computed during replacement
+# rather than searching the population for the best individual again.
+
+operator_rewards = {}
+# The recency-weighted average reward of each variation operator under
+# adaptive operator scheduling, keyed by (kind, name). Kept across runs, so
+# that the operator mix learned in one fuzzing cycle carries over to the next.
+
+seen_errors, seen_disagreements = set(), set()
+# The error codes and oracle disagreements seen so far in the current run.
+
+error_counts = {}
+# The number of evaluations failing with each error code in the current run.
+
+table_ddl = None
+# The statement which created the table of the current fuzzing cycle.
+
+new_bugs = []
+# The signature, query and table DDL of each bug first found in the current
+# run, see db.bug_store.
+
+novelty_archive = []
+# The behaviour descriptors archived by novelty search in the current run.